@@ -1,6 +1,10 @@
 from Scripts.utils_math import clamp_number_to_range_steps
 import json
-from Scripts.utils import load_images
+from Scripts.animation import AnimationClip
+from Scripts.cache import LRUCache, size_of
+from Scripts.prebake import RotationPrebaker, is_rotatable, rotation_buckets
+from typing import Any, Iterable
+import time
 import pygame
 
 ORG_RES = (1080, 720)
@@ -11,19 +15,40 @@ TILESIZE = 15
 
 GRAVITY = 100
 
+# Simulation läuft mit festem dt, gerendert wird so oft wie möglich (interpoliert)
+SIM_DT = 1 / 60
+MAX_SIM_STEPS_PER_FRAME = 5
+
+# so viel Pixelspeicher dürfen gedrehte/gespiegelte Varianten in AssetManager.get belegen
+ASSET_CACHE_BUDGET = 64 * 1024 * 1024
+# so viel dürfen die Outline Atlanten belegen (get_outlined)
+OUTLINE_CACHE_BUDGET = 8 * 1024 * 1024
+# und die Drehungen vom alten get2
+ROTATED_CACHE_BUDGET = 8 * 1024 * 1024
+ROTATION_STEP = 360 / 32  # gedrehte Assets gibt es nur in diesen Schritten
+OUTLINE_KERNEL = pygame.mask.Mask((3, 3), fill=True)
+
+
+def rotation_bucket(angle: float) -> float:
+    """= clamp_number_to_range_steps(angle, -90, 270, ROTATION_STEP), ohne min/max Aufrufe"""
+    return round((270 if angle > 270 else -90 if angle < -90 else angle) / ROTATION_STEP) * ROTATION_STEP
+
 
 def get_mouse_pos(s=DOWNSCALE_FACTOR) -> tuple[float, float]:
     p = pygame.mouse.get_pos()
     return (p[0] / s, p[1] / s)
 
 
-def parse_tileset(path: str, tilesize: tuple = None, as_array=False, colorkey=(0, 0, 0), alpha=255):
+def parse_tileset(path: str, tilesize: tuple = None, as_array=False, colorkey=(0, 0, 0), alpha=255, img: pygame.Surface = None):
+    """`img`: already decoded (not converted) file, otherwise it is loaded from `path`."""
     if not tilesize:
         tilesize = (TILESIZE, TILESIZE)
+    if img is None:
+        img = pygame.image.load(path)
     if alpha != 255:
-        img = pygame.image.load(path).convert_alpha()
+        img = img.convert_alpha()
     else:
-        img = pygame.image.load(path).convert()
+        img = img.convert()
     img.set_colorkey(colorkey)
     img.set_alpha(alpha)
     img_size = img.get_size()
@@ -43,80 +68,271 @@ def parse_tileset(path: str, tilesize: tuple = None, as_array=False, colorkey=(0
     return ret
 
 
-class AssetManager:
-    roation_steps = 360/32
-    # könnte von ALLEN images die rotated vorgenerien ... :thinking:
+class LazyEntry:
+    """
+    Placeholder in the asset tree for something that is only loaded on first use (`AssetManager.resolve`)
+    or when it is prefetched. See `Scripts.asset_loader.Lazy`.
+    """
 
-    def premake_all_rotations(self) -> None:
+    def load(self) -> Any:
+        """Main thread. Blocks until the background work from `prefetch` is done, if there is any."""
         raise NotImplementedError
 
-    def __init__(self, assets={}):
+    def prefetch(self) -> None: pass
+
+    @staticmethod
+    def prefetch_many(entries: list["LazyEntry"]) -> None:
+        """Subclasses can start several entries as one batch."""
+        for entry in entries:
+            entry.prefetch()
+
+    def started(self) -> bool: return False
+    def ready(self) -> bool: return False
+
+
+def _lazy_entries(container, key, node) -> list[tuple[dict | list, object, LazyEntry]]:
+    """(container, key, entry) of every lazy entry at or below `node` (which is `container[key]`)."""
+    if isinstance(node, LazyEntry):
+        return [(container, key, node)]
+    found = []
+    if isinstance(node, dict):
+        for k, v in node.items():
+            found.extend(_lazy_entries(node, k, v))
+    elif isinstance(node, list):
+        for i, v in enumerate(node):
+            found.extend(_lazy_entries(node, i, v))
+    return found
+
+
+class Asset:
+    """
+    Handle for one asset path, made by `AssetManager.handle`. The path is resolved once (`base`) and the
+    cache keys are built without formatting or splitting strings. Entities, tiles and particles keep the
+    handle and call `get` on it. Variants live in the shared `AssetManager.cache`, same keys as `AssetManager.get`.
+    """
+    __slots__ = ("am", "path", "_base", "_children", "_rotatable")
+
+    def __init__(self, am: "AssetManager", path: str) -> None:
+        self.am = am
+        self.path = path
+        self._base = None
+        self._children: dict[int, Asset] = None
+        self._rotatable: bool = None
+
+    @property
+    def base(self) -> pygame.Surface | list[pygame.Surface] | dict:
+        """The untransformed asset."""
+        if self._base is None:
+            self._base = self.am.resolve(self.path)
+        return self._base
+
+    def __getitem__(self, variant: int) -> "Asset":
+        """Handle of `path/variant` (tile variants, grass blades, ...)."""
+        if self._children is None:
+            self._children = {}
+        if (child := self._children.get(variant)) is None:
+            child = self._children[variant] = self.am.handle(f"{self.path}/{variant}")
+        return child
+
+    def get(self, angle: float = 0.0, flip_x=False, alpha=255, clamp_angle=True) -> pygame.Surface:
+        if clamp_angle:
+            # = rotation_bucket(angle), hier ausgeschrieben weil das jeden Frame sehr oft läuft
+            angle = round((270 if angle > 270 else -90 if angle < -90 else angle) / ROTATION_STEP) * ROTATION_STEP
+        do_flip = 90 < angle < 270
+        key = (self.path, angle, do_flip, flip_x, alpha)
+        if (ret := self.am.cache.get(key)) is not None:
+            return ret
+        return self.am._make_variant(self, key)
+
+    def get_outlined(self, angle: float = 0.0, outline_color=(255, 0, 0), outline_only=False) -> pygame.Surface:
+        """
+        Outlined variant from the outline atlas. Rotatable assets get one atlas with every angle bucket,
+        the others one (single cell) atlas per bucket that is actually used.
+        """
+        angle = rotation_bucket(angle)
+        outline_color = tuple(outline_color)
+        if self._rotatable is None:
+            self._rotatable = is_rotatable(self.path)
+        key = (self.path, outline_color, outline_only, None if self._rotatable else angle)
+        if (entry := self.am.outline_cache.get(key)) is None:
+            angles = rotation_buckets(ROTATION_STEP) if self._rotatable else [angle]
+            atlas, cells = self.am._make_outline_atlas(self, angles, outline_color, outline_only)
+            entry = self.am.outline_cache.put(key, (atlas, cells), size_of(atlas))
+        return entry[1][angle]
+
+    def __repr__(self) -> str: return f"Asset({self.path})"
+
+
+class AssetManager:
+    roation_steps = ROTATION_STEP
+
+    def premake_all_rotations(self, img_types: Iterable[str] = None, threaded=True) -> None:
+        """
+        Bakes all rotations (x flip_x) of `img_types` (default: every rotatable asset, see `Scripts.prebake`)
+        in the background. `publish_prebaked` has to be called on the main thread to move them into the cache.
+        """
+        if self.prebaker is None:
+            self.prebaker = RotationPrebaker(self, threaded)
+        self.prebaker.request(self.prebaker.rotatable_ids() if img_types is None else img_types)
+
+    def publish_prebaked(self) -> int:
+        return self.prebaker.publish() if self.prebaker is not None else 0
+
+    def __init__(self, assets={}, cache_budget=ASSET_CACHE_BUDGET, outline_budget=OUTLINE_CACHE_BUDGET):
+        self.cache = LRUCache(cache_budget, "assets")
+        self.outline_cache = LRUCache(outline_budget, "outlines")  # (asset, farbe, outline_only[, winkel]) -> (atlas, {winkel: outline})
+        self.rotated_cache = LRUCache(ROTATED_CACHE_BUDGET, "rotated (get2)")
+        self.prebaker: RotationPrebaker = None
+        self.handles: dict[str, Asset] = {}
+        self._prefetching: list[tuple[dict | list, object, LazyEntry]] = []
+        self.lazy_stats = {"loaded_on_use": 0, "prefetched": 0, "load_ms": 0.0}
         self.assets = assets
         if "ANIMATIONS" not in self.assets:
             self.assets["ANIMATIONS"] = {}
-        self.cache = {}
-        self.rotated_cache = {}
-        self.outline_cache = {}
+        if not pygame.font.get_init():  # am wird beim Import gebaut, evtl. vor pygame.init()
+            pygame.font.init()
         self.fonts = {
             "default": pygame.font.SysFont("arial", 12)
         }
         self.animation_data = {}
+        self.clips: dict[str, dict[str, AnimationClip]] = {}
 
     def __len__(self) -> int: return len(self.assets)
     def __iter__(self): return iter(self.assets)
 
-    def get(self, img_type: str, angle: float = 0.0, sep="/", clamp_angle_internally=True, flip_x=False, alpha=255) -> pygame.Surface:
-        if clamp_angle_internally:
-            angle = clamp_number_to_range_steps(angle, -90, 270, AssetManager.roation_steps)
-
-        do_flip = 90 < angle < 270
-        key = f"{angle}#{do_flip}#{alpha}#{img_type}"
-
-        if key in self.cache:
-            return self.cache[key]
+    @property
+    def assets(self) -> dict: return self._assets
+
+    @assets.setter
+    def assets(self, assets: dict) -> None:
+        # neue Bilder -> alte Varianten und aufgelöste Handles passen nicht mehr
+        self._assets = assets
+        self.cache.clear()
+        self.outline_cache.clear()
+        self.rotated_cache.clear()
+        self._prefetching.clear()
+        for asset in self.handles.values():
+            asset._base = None
+        if self.prebaker is not None:
+            self.prebaker.reset()
+
+    def handle(self, img_type: str) -> "Asset":
+        """Interned `Asset` for `img_type`, always the same object per path. Keep it instead of the path string."""
+        if (asset := self.handles.get(img_type)) is None:
+            asset = self.handles[img_type] = Asset(self, img_type)
+        return asset
 
+    def get(self, img_type: str, angle: float = 0.0, sep="/", clamp_angle_internally=True, flip_x=False, alpha=255) -> pygame.Surface:
+        """
+        Transformed asset (or list of assets), cached per (asset, angle, flip, alpha) in `self.cache`.
+        The returned surfaces are shared, don't draw on them (`.copy()` first).
+        Hot code should use `handle(img_type).get(...)`, this looks up the handle every call.
+        """
+        if sep != "/":
+            img_type = img_type.replace(sep, "/")
+        return self.handle(img_type).get(angle, flip_x, alpha, clamp_angle_internally)
+
+    def _make_variant(self, asset: "Asset", key: tuple) -> pygame.Surface:
+        _, angle, do_flip, flip_x, alpha = key
+        result = asset.base
+        if isinstance(result, dict):
+            return result.copy()  # ganze Asset Gruppe, wird nicht transformiert
+
+        if isinstance(result, list):
+            return self.cache.put(key, [self._transform(s, angle, do_flip, flip_x, alpha, copy=False) for s in result])
+        else:
+            # erste Drehung -> alle anderen im Hintergrund mitbacken, bis dahin wird hier direkt gedreht
+            if angle and self.prebaker is not None and asset.path not in self.prebaker.requested and self.prebaker.is_rotatable(asset.path):
+                self.prebaker.request((asset.path,))
+            transformed = self._transform(result, angle, do_flip, flip_x, alpha, copy=True)
+            # unverändert -> kein eigener Speicher
+            return self.cache.put(key, transformed, 0 if transformed is result else None)
+
+    def resolve(self, img_type: str, sep="/", load_lazy=True) -> pygame.Surface | list[pygame.Surface] | dict:
+        """
+        The untransformed asset (Surface, list of Surfaces or a whole group) behind `img_type`.
+        Lazy entries on the way are loaded and replaced in the tree (main thread only, `load_lazy=False` leaves them).
+        """
         path_parts = img_type.split(sep)
         current_assets = self.assets
 
         for part in path_parts[:-1]:
-            current_assets = current_assets[part]
+            current_assets = self._child(current_assets, part, load_lazy)
 
         last_part = path_parts[-1]
 
-        result: pygame.Surface = None
-        result_list: list[pygame.Surface] = []
         if isinstance(current_assets, dict):
-            _result = current_assets[last_part].copy()
-            if isinstance(_result, dict):
-                result = _result
-            elif isinstance(_result, list):
-                result_list = _result
-            elif isinstance(_result, pygame.Surface):
-                result = _result
+            return self._child(current_assets, last_part, load_lazy)
         elif isinstance(current_assets, list):
             if last_part.isdigit():
-                result = current_assets[int(last_part)].copy()
-            else:
-                result_list = current_assets
-        else:
-            raise ValueError(f"Asset type for '{img_type}' is not valid.")
-
-        if result_list:
-            if do_flip:
-                result_list = [pygame.transform.flip(s, False, True) for s in result_list]
-            result_list = [pygame.transform.flip(s, flip_x, False) for s in result_list]
-            result_list = [pygame.transform.rotate(s, angle) for s in result_list]
-            [s.set_alpha(alpha) for s in result_list]
-
-            self.cache[key] = result_list
-            return result_list
-        else:
-            if do_flip:
-                result = pygame.transform.flip(result, False, True)
-            result = pygame.transform.flip(result, flip_x, False)
-            result = pygame.transform.rotate(result, angle)
-            result.set_alpha(alpha)
-            return result
+                return self._child(current_assets, int(last_part), load_lazy)
+            return current_assets
+        raise ValueError(f"Asset type for '{img_type}' is not valid.")
+
+    def _child(self, container: dict | list, key, load_lazy=True):
+        value = container[key]
+        if load_lazy and isinstance(value, LazyEntry):
+            t = time.perf_counter()
+            self.lazy_stats["prefetched" if value.ready() else "loaded_on_use"] += 1
+            value = container[key] = value.load()
+            self.lazy_stats["load_ms"] += (time.perf_counter() - t) * 1000
+            if self.prebaker is not None:  # neu geladene drehbare Assets auch vorbereiten (schon angefragte überspringt request)
+                self.prebaker.request(self.prebaker.rotatable_ids())
+        return value
+
+    def prefetch(self, img_types: Iterable[str]) -> int:
+        """
+        Starts loading the lazy entries at (or under) `img_types` in the background, so the first `get` doesn't
+        have to wait for the decoding. `finish_prefetched` puts them into the tree once they are done.
+        Returns how many entries were started.
+        """
+        started: list[tuple[dict | list, object, LazyEntry]] = []
+        seen: set[int] = set()
+        for img_type in img_types:
+            container, key, node = None, None, self.assets
+            for part in img_type.split("/"):
+                if isinstance(node, LazyEntry):
+                    break
+                container, key = node, int(part) if isinstance(node, list) else part
+                node = node[key]
+            for entry in _lazy_entries(container, key, node):
+                if not entry[2].started() and id(entry[2]) not in seen:
+                    seen.add(id(entry[2]))
+                    started.append(entry)
+        # ein Batch pro Art von Eintrag (AssetLoader: ein Dekodier-Job für alle)
+        batches: dict[Any, list[LazyEntry]] = {}
+        for entry in started:
+            batches.setdefault(type(entry[2]).prefetch_many, []).append(entry[2])
+        for prefetch_many, lazies in batches.items():
+            prefetch_many(lazies)
+        self._prefetching.extend(started)
+        return len(started)
+
+    def finish_prefetched(self) -> int:
+        """Main thread: replaces finished prefetches in the asset tree. Returns how many were finished."""
+        n = 0
+        for entry in self._prefetching[:]:
+            container, key, lazy = entry
+            if not lazy.ready():
+                continue
+            self._prefetching.remove(entry)
+            if container[key] is lazy:  # sonst schon von resolve geladen
+                self._child(container, key)
+                n += 1
+        return n
+
+    @staticmethod
+    def _transform(surf: pygame.Surface, angle: float, do_flip: bool, flip_x: bool, alpha: int, copy: bool) -> pygame.Surface:
+        # copy() verliert bei SRCALPHA Surfaces den colorkey, das Ergebnis soll genau so aussehen wie früher ohne Cache
+        copy_changes = copy and surf.get_flags() & pygame.SRCALPHA and surf.get_colorkey() is not None
+        if not angle and not do_flip and not flip_x and alpha == (surf.get_alpha() or 255) and not copy_changes:
+            return surf
+        if copy:
+            surf = surf.copy()
+        surf = pygame.transform.flip(surf, flip_x, do_flip)
+        surf = pygame.transform.rotate(surf, angle)
+        surf.set_alpha(alpha)
+        return surf
 
     def get2(self, img_type: str, angle: float = 0.0, sep="/", clamp_angle_internally=True, flip=False, alpha=255) -> pygame.Surface:
         """
@@ -127,10 +343,9 @@ class AssetManager:
             angle = clamp_number_to_range_steps(angle, -90, 270, AssetManager.roation_steps)
 
         do_flip = 90 < angle < 270
-        key = f"{angle}#{do_flip}#{alpha}"
-        if img_type in self.rotated_cache:
-            if key in self.rotated_cache[img_type]:
-                return self.rotated_cache[img_type][key]
+        key = (img_type, angle, do_flip, alpha)
+        if (cached := self.rotated_cache.get(key)) is not None:
+            return cached
 
         path_parts = img_type.split(sep)
         current_assets = self.assets
@@ -156,10 +371,7 @@ class AssetManager:
             result = pygame.transform.flip(result, False, True)
         result = pygame.transform.rotate(result, angle)
         result.set_alpha(alpha)
-        if img_type not in self.rotated_cache:
-            self.rotated_cache[img_type] = {}
-        self.rotated_cache[img_type][key] = result
-        return result
+        return self.rotated_cache.put(key, result)
         # else:
         #     # Check if result is cached
         #     if img_type in self.cache:
@@ -219,30 +431,39 @@ class AssetManager:
         """
         !!!!!!!!!!!!!!!! Angle is in degrees !!!!!!!!!!!!!!!!
         """
-        surf = self.get(type, angle=angle)
-        key = f"{type};;;{angle};;;OUTLINED;;;{outline_color};;;{outline_only}"
-        if key in self.outline_cache:
-            return self.outline_cache[key]
-
-        convolution_mask = pygame.mask.Mask((3, 3), fill=True)
-        mask = pygame.mask.from_surface(surf)
+        return self.handle(type).get_outlined(angle, outline_color, outline_only)
 
-        surface_outline = mask.convolve(convolution_mask).to_surface(setcolor=outline_color, unsetcolor=surf.get_colorkey())
-
-        if outline_only:
-            mask_surface = mask.to_surface()
-            mask_surface.set_colorkey((0, 0, 0))
-
-            surface_outline.blit(mask_surface, (1, 1))
-        else:
-            surface_outline.blit(surf, (1, 1))
-            surface_outline.set_colorkey((0, 0, 0))
-
-        self.outline_cache[key] = surface_outline
-        return surface_outline
+    def _make_outline_atlas(self, asset: "Asset", angles: list[float], outline_color: tuple, outline_only: bool) -> tuple[pygame.Surface, dict[float, pygame.Surface]]:
+        """
+        Outlines of `asset` for all `angles` next to each other on one Surface. Returns the atlas and a
+        subsurface per angle, every cell looks exactly like the single outlined Surface from before.
+        """
+        surfs = [asset.get(angle, clamp_angle=False) for angle in angles]
+        masks = [pygame.mask.from_surface(surf) for surf in surfs]
+        outlines = [mask.convolve(OUTLINE_KERNEL) for mask in masks]
+        atlas = pygame.Surface((sum(o.get_size()[0] for o in outlines), max(o.get_size()[1] for o in outlines)), pygame.SRCALPHA, 32)
+
+        cells = {}
+        x = 0
+        for angle, surf, mask, outline in zip(angles, surfs, masks, outlines):
+            w, h = outline.get_size()
+            outline.to_surface(atlas, setcolor=outline_color, unsetcolor=surf.get_colorkey(), dest=(x, 0))
+            if outline_only:
+                mask_surface = mask.to_surface()
+                mask_surface.set_colorkey((0, 0, 0))
+                atlas.blit(mask_surface, (x + 1, 1))
+            else:
+                atlas.blit(surf, (x + 1, 1))
+            cells[angle] = atlas.subsurface((x, 0, w, h))
+            x += w
+        if not outline_only:
+            atlas.set_colorkey((0, 0, 0))
+            for cell in cells.values():
+                cell.set_colorkey((0, 0, 0))
+        return atlas, cells
 
     def _add_animation_states(self, states: dict[str, list[pygame.Surface]], animation_id: str) -> None:
-        if animation_id not in self.assets["ANIMATIONS"]:
+        if not isinstance(self.assets["ANIMATIONS"].get(animation_id), dict):  # fehlt oder ist noch lazy
             self.assets["ANIMATIONS"][animation_id] = {}
         for state_name, state_images in states.items():
             self.assets["ANIMATIONS"][animation_id][state_name] = state_images
@@ -262,33 +483,37 @@ class AssetManager:
     def get_animation_number_of_frames(self, id: str, state: str) -> int:
         return len(self.animation_data[id]["states_speeds"][state])
 
+    def get_clip(self, id: str, state: str) -> AnimationClip:
+        if id not in self.clips:  # lazy Animation, wird jetzt geladen
+            self.resolve(f"ANIMATIONS/{id}")
+        return self.clips[id][state]
+
     def load_animation(self, path: str) -> str:
         # Läd animation und gibt die default state zurück.
-        states = {}
-        states_speeds = {}
-        states_looping = {}
-        states_offsets = {}
-        default_state = ""
-        animation_id = ""
+        from Scripts.asset_loader import load_frames  # asset_loader importiert CONFIG
+        config = self.read_animation_config(path)
+        states = {state: load_frames(state_path, colorkey=config["colorkey"]) for state, state_path in self.animation_dirs(config).items()}
+        return self.add_animation(config, states)
 
+    @staticmethod
+    def read_animation_config(path: str) -> dict:
         with open(path, "r") as f:
-            data = json.load(f)
-
-            colorkey = data["colorkey"]
-            default_path = data["file_path"]
-            same_dir = data["samedir"]
-            default_state = data["default"]
-            animation_id = data["id"]
-
-            for animation_state, state_data in data["animations"].items():
-                if same_dir:
-                    states[animation_state] = load_images(default_path, colorkey=colorkey)
-                else:
-                    states[animation_state] = load_images(f"{default_path}/{animation_state}", colorkey=colorkey)
-
-                states_speeds[animation_state] = state_data["frames"]
-                states_looping[animation_state] = state_data["loop"]
-                states_offsets[animation_state] = state_data["offset"]
+            return json.load(f)
+
+    @staticmethod
+    def animation_dirs(config: dict) -> dict[str, str]:
+        """Animation state -> directory with its frames."""
+        default_path = config["file_path"]
+        if config["samedir"]:
+            return {state: default_path for state in config["animations"]}
+        return {state: f"{default_path}/{state}" for state in config["animations"]}
+
+    def add_animation(self, config: dict, states: dict[str, list[pygame.Surface]]) -> str:
+        """Registers the loaded frames of an animation config. Returns the default state."""
+        animation_id = config["id"]
+        states_speeds = {state: state_data["frames"] for state, state_data in config["animations"].items()}
+        states_looping = {state: state_data["loop"] for state, state_data in config["animations"].items()}
+        states_offsets = {state: state_data["offset"] for state, state_data in config["animations"].items()}
 
         self.animation_data[animation_id] = {
             "states_speeds":  states_speeds,
@@ -296,8 +521,12 @@ class AssetManager:
             "states_offsets": states_offsets,
         }
         self._add_animation_states(states, animation_id)
+        self.clips[animation_id] = {
+            state: AnimationClip(animation_id, state, states[state], states_speeds[state], states_looping[state], states_offsets[state])
+            for state in states
+        }
 
-        return default_state
+        return config["default"]
 
 
 am = AssetManager()
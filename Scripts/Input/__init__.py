@@ -271,6 +271,9 @@ class MouseLook:
         if set_mpos:
             pygame.mouse.set_pos(self.get_pos())
 
+    def set_pos(self, pos: tuple[int, int]) -> None:
+        self._x, self._y = pos
+
     def get_pos(self) -> tuple[int, int]:
         self._x = max(1, min(self._x, CFG.ORG_RES[0]-1))
         self._y = max(1, min(self._y, CFG.ORG_RES[1]-1))
@@ -324,6 +327,53 @@ class InputManager(dict):
         return (self.mouse_look.get_pos()[0] / downscale_factor, self.mouse_look.get_pos()[1] / downscale_factor)
 
 
+class ScriptedInput:
+    """
+    Stands in for the real event queue in headless runs.
+    `script` is a list of `(time, event)`, `events(t)` hands out every event that is due at sim time `t`.
+    The mouse position (window coordinates) can't be faked with events under the dummy driver,
+    so `MOUSEMOTION` events in the script are applied to the `InputManager` directly.
+    """
+
+    def __init__(self, script: list[tuple[float, pygame.Event]], input_manager: InputManager = None) -> None:
+        self.script = sorted(script, key=lambda x: x[0])
+        self.input_manager = input_manager
+        self._i = 0
+
+    def events(self, t: float) -> list[pygame.Event]:
+        ret = []
+        while self._i < len(self.script) and self.script[self._i][0] <= t:
+            event = self.script[self._i][1]
+            if event.type == pygame.MOUSEMOTION and self.input_manager:
+                self.input_manager.mouse_look.set_pos(event.pos)
+            ret.append(event)
+            self._i += 1
+        return ret
+
+    @staticmethod
+    def patrol(duration: float, period=1.5, fire=True) -> list[tuple[float, pygame.Event]]:
+        """Walks in a square (d, s, a, w), sweeps the mouse around and fires in bursts."""
+        script = []
+        keys = (pygame.K_d, pygame.K_s, pygame.K_a, pygame.K_w)
+        aim = ((900, 360), (540, 650), (180, 360), (540, 70))
+        t = 0.0
+        i = 0
+        while t < duration:
+            key = keys[i % len(keys)]
+            script.append((t, pygame.Event(pygame.KEYDOWN, key=key)))
+            script.append((t + period, pygame.Event(pygame.KEYUP, key=key)))
+            script.append((t, pygame.Event(pygame.MOUSEMOTION, pos=aim[i % len(aim)])))
+            if fire:
+                script.append((t, pygame.Event(pygame.MOUSEBUTTONDOWN, button=1)))
+                script.append((t + period / 2, pygame.Event(pygame.MOUSEBUTTONUP, button=1)))
+            # ab und zu aufheben, damit der Spieler überhaupt eine Waffe hat
+            script.append((t + period / 4, pygame.Event(pygame.KEYDOWN, key=pygame.K_e)))
+            script.append((t + period / 4 + 0.1, pygame.Event(pygame.KEYUP, key=pygame.K_e)))
+            t += period
+            i += 1
+        return script
+
+
 if __name__ == "__main__":
     pygame.init()
     pygame.joystick.init()
@@ -1,5 +1,6 @@
 import pygame
 import math
+import time
 import numpy as np
 
 from Scripts.utils import load_image
@@ -167,6 +168,127 @@ class IKArmFABRIK:
         # pygame.draw.circle(surface, (0, 255, 0), self.joints[2], 3)
 
 
+def solve_two_bone(shoulders: np.ndarray, targets: np.ndarray, arm1_lens: np.ndarray, arm2_lens: np.ndarray, focus_directions: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Analytic two-bone IK (law of cosines like `IkArmLawOfCosines`) for N arms at once.
+    All inputs are arrays with N rows. Returns `(elbows, hands)`, both (N, 2).
+    Of the two possible elbows the one that lies further in `focus_direction` is taken.
+    """
+    delta = targets - shoulders
+    d = np.hypot(delta[:, 0], delta[:, 1])
+    base_angle = np.where(d > 0, np.arctan2(delta[:, 1], delta[:, 0]), 0.0)
+    # nicht erreichbare Ziele: Arm ganz ausstrecken (bzw. so weit wie nötig anwinkeln)
+    d = np.clip(d, np.abs(arm1_lens - arm2_lens) + 1e-6, arm1_lens + arm2_lens)
+
+    # Winkel an der Schulter zwischen Oberarm und Linie Schulter -> Ziel
+    cos_a = (arm1_lens**2 + d**2 - arm2_lens**2) / (2 * arm1_lens * d)
+    a = np.arccos(np.clip(cos_a, -1.0, 1.0))
+
+    elbows_pos = shoulders + arm1_lens[:, None] * np.stack((np.cos(base_angle + a), np.sin(base_angle + a)), axis=1)
+    elbows_neg = shoulders + arm1_lens[:, None] * np.stack((np.cos(base_angle - a), np.sin(base_angle - a)), axis=1)
+    use_pos = np.einsum("ij,ij->i", elbows_pos - elbows_neg, focus_directions) >= 0
+    elbows = np.where(use_pos[:, None], elbows_pos, elbows_neg)
+
+    reach = shoulders + d[:, None] * np.stack((np.cos(base_angle), np.sin(base_angle)), axis=1)
+    forearm = reach - elbows
+    forearm_len = np.hypot(forearm[:, 0], forearm[:, 1])
+    forearm_len[forearm_len == 0] = 1.0
+    hands = elbows + forearm * (arm2_lens / forearm_len)[:, None]
+    return elbows, hands
+
+
+class IKBatchSolver:
+    """Collects the solve requests of all `IKArmTwoBone`s during the frame and solves them in one `flush`."""
+
+    def __init__(self) -> None:
+        self.arms: list["IKArmTwoBone"] = []
+        self.shoulders: list[tuple] = []
+        self.targets: list[tuple] = []
+        self.focus_directions: list[tuple] = []
+        self._index: dict["IKArmTwoBone", int] = {}
+
+        self.stats = {"arms": 0, "ms": 0.0}
+
+    def request(self, arm: "IKArmTwoBone", shoulder: tuple, target: tuple, focus_direction: tuple) -> None:
+        # bei mehreren Simulationsschritten pro Frame zählt nur der letzte Request pro Arm
+        if (i := self._index.get(arm)) is not None:
+            self.shoulders[i] = shoulder
+            self.targets[i] = target
+            self.focus_directions[i] = focus_direction
+            return
+        self._index[arm] = len(self.arms)
+        self.arms.append(arm)
+        self.shoulders.append(shoulder)
+        self.targets.append(target)
+        self.focus_directions.append(focus_direction)
+
+    def flush(self) -> None:
+        """Call once per frame after all updates and before rendering."""
+        if not self.arms:
+            self.stats["arms"] = 0
+            return
+        t = time.perf_counter()
+        elbows, hands = solve_two_bone(
+            np.array(self.shoulders, dtype=float),
+            np.array(self.targets, dtype=float),
+            np.array([arm.joint_lengths[0] for arm in self.arms], dtype=float),
+            np.array([arm.joint_lengths[1] for arm in self.arms], dtype=float),
+            np.array(self.focus_directions, dtype=float),
+        )
+        for arm, shoulder, elbow, hand in zip(self.arms, self.shoulders, elbows.tolist(), hands.tolist()):
+            arm.joints = [shoulder, elbow, hand]
+
+        self.stats["arms"] = len(self.arms)
+        self.stats["ms"] = (time.perf_counter() - t) * 1000
+        self.arms.clear()
+        self._index.clear()
+        self.shoulders.clear()
+        self.targets.clear()
+        self.focus_directions.clear()
+
+
+class IKArmTwoBone:
+    """
+    Same interface as `IKArmFABRIK`, but `solve` only queues the arm in the shared `batch`
+    (set by Game), the joints are written by `IKBatchSolver.flush`. Without a batch it solves right away.
+    """
+    batch: IKBatchSolver = None
+
+    def __init__(self, pos: tuple, arm1_len: float, arm2_len: float) -> None:
+        self.fixed_base_pos = pos
+        self.joints: list[tuple] = [
+            pos,
+            (pos[0] + arm1_len, pos[1]),
+            (pos[0] + arm1_len + arm2_len, pos[1]),
+        ]
+        self.joint_lengths: list[float] = [arm1_len, arm2_len]  # [oberarm (an der Schulter), unterarm]
+
+    def set_base_pos(self, pos: tuple) -> None:
+        self.fixed_base_pos = pos
+
+    def solve(self, target: tuple, focus_direction: tuple[int, int] = (0, 0)):
+        # focus_direction: auf welche Seite der Ellbogen knickt
+        if IKArmTwoBone.batch:
+            IKArmTwoBone.batch.request(self, self.fixed_base_pos, target, focus_direction)
+            return
+        elbows, hands = solve_two_bone(
+            np.array([self.fixed_base_pos], dtype=float),
+            np.array([target], dtype=float),
+            np.array([self.joint_lengths[0]], dtype=float),
+            np.array([self.joint_lengths[1]], dtype=float),
+            np.array([focus_direction], dtype=float),
+        )
+        self.joints = [self.fixed_base_pos, tuple(elbows[0]), tuple(hands[0])]
+
+    def update(self, target: tuple) -> None:
+        self.solve(target)
+
+    def render(self, surface: pygame.Surface, c1=(0, 0, 255), c2=(255, 0, 0), upperarm_width=5, lowerarm_width=3, offset: tuple = (0, 0)) -> None:
+        j0, j1, j2 = self.joints
+        pygame.draw.line(surface, c1, (j0[0] - offset[0], j0[1] - offset[1]), (j1[0] - offset[0], j1[1] - offset[1]), upperarm_width)
+        pygame.draw.line(surface, c2, (j1[0] - offset[0], j1[1] - offset[1]), (j2[0] - offset[0], j2[1] - offset[1]), lowerarm_width)
+
+
 # RES = (600, 600)
 
 
@@ -0,0 +1,111 @@
+import math
+import time
+from typing import Callable, Iterable, Iterator
+
+from Scripts.utils_math import dist
+
+
+# (max Entfernung zur Kamera in px, jede wie vielte Frame geupdated wird)
+DEFAULT_LOD_BANDS: tuple[tuple[float, int], ...] = (
+    (220.0, 1),     # auf dem Bildschirm und knapp daneben: jeden Frame
+    (450.0, 3),
+    (math.inf, 6),
+)
+DEFAULT_FRAME_BUDGET_MS = 2.0  # nur für die weiter entfernten Bänder, Band 0 wird immer komplett geupdated. None = kein Budget (deterministisch)
+MIN_DEFERRED_UPDATES = 4  # so viele werden pro Frame mindestens geupdated, auch wenn das Budget schon weg ist
+MAX_ACCUMULATED_DT = 0.25  # damit ein lange verschobener Zombie keinen riesigen Schritt macht
+
+
+class AIScheduler:
+    """
+    Sorts zombies into level-of-detail bands by their distance to the camera.
+    Band 0 is updated every frame. Farther bands are updated every `interval` frames with the
+    accumulated dt, spread round-robin over the frames (by entity id), and only as long as the
+    per-frame time budget lasts (at least `min_updates` of them, so nobody starves).
+    Zombies that didn't fit into the budget are updated first next frame.
+    Zombies whose `needs_update` is False (finished corpses) are skipped completely.
+    """
+
+    def __init__(self, bands: Iterable[tuple[float, int]] = DEFAULT_LOD_BANDS, frame_budget_ms: float = DEFAULT_FRAME_BUDGET_MS, min_updates: int = MIN_DEFERRED_UPDATES) -> None:
+        self.bands = tuple(sorted(bands))
+        self.frame_budget_ms = frame_budget_ms
+        self.min_updates = min_updates
+
+        self.frame = 0
+        self._accumulated_dt: dict[object, float] = {}
+        self._deferred: list = []
+
+        self.stats = {}
+        self._reset_stats()
+
+    def _reset_stats(self) -> None:
+        self.stats = {
+            "bands": [{"max_dist": max_dist, "interval": interval, "count": 0, "updated": 0, "ms": 0.0} for max_dist, interval in self.bands],
+            "skipped_idle": 0,  # tote Zombies, deren Animation fertig ist
+            "deferred": 0,      # waren dran, passten aber nicht mehr ins Budget
+            "frame_ms": 0.0,
+        }
+
+    def band_of(self, pos: tuple, camera_center: tuple) -> int:
+        d = dist(pos, camera_center)
+        for i, (max_dist, _) in enumerate(self.bands):
+            if d <= max_dist:
+                return i
+        return len(self.bands) - 1
+
+    def run(self, zombies: list, dt: float, camera_center: tuple, update: Callable[[object, float], dict]) -> Iterator[tuple[object, dict]]:
+        """
+        Generator, yields `(zombie, update(zombie, accumulated_dt))` for every zombie that is updated this frame.
+        The time the caller spends on the yielded result counts towards the budget, too.
+        """
+        self.frame += 1
+        self._reset_stats()
+        band_stats = self.stats["bands"]
+        frame_start = time.perf_counter()
+
+        accumulated_dt = {}
+        near = []
+        due = []
+        due_set = set()
+        for zombie in zombies:
+            if not zombie.needs_update:
+                self.stats["skipped_idle"] += 1
+                continue
+            acc = min(self._accumulated_dt.get(zombie, 0.0) + dt, MAX_ACCUMULATED_DT)
+            accumulated_dt[zombie] = acc
+            band = self.band_of(zombie.center, camera_center)
+            band_stats[band]["count"] += 1
+            interval = self.bands[band][1]
+            if interval <= 1:
+                near.append((zombie, band))
+            elif (self.frame + zombie._id) % interval == 0:
+                due.append((zombie, band))
+                due_set.add(zombie)
+        # die vom letzten Frame liegen gebliebenen zuerst, damit niemand verhungert
+        deferred = [(zombie, self.band_of(zombie.center, camera_center)) for zombie in self._deferred if zombie in accumulated_dt and zombie not in due_set]
+        due = deferred + due
+        self._deferred = []
+        # alte Einträge (entfernte Zombies) fliegen hier automatisch raus
+        self._accumulated_dt = accumulated_dt
+
+        for zombie, band in near:
+            yield zombie, self._update(zombie, band, update)
+
+        budget_end = time.perf_counter() + (self.frame_budget_ms or 0.0) / 1000
+        for i, (zombie, band) in enumerate(due):
+            if self.frame_budget_ms is not None and i >= self.min_updates and time.perf_counter() > budget_end:
+                self._deferred = [z for z, _ in due[i:]]
+                self.stats["deferred"] = len(self._deferred)
+                break
+            yield zombie, self._update(zombie, band, update)
+
+        self.stats["frame_ms"] = (time.perf_counter() - frame_start) * 1000
+
+    def _update(self, zombie, band: int, update: Callable[[object, float], dict]) -> dict:
+        t = time.perf_counter()
+        ret = update(zombie, self._accumulated_dt[zombie])
+        self._accumulated_dt[zombie] = 0.0
+        s = self.stats["bands"][band]
+        s["updated"] += 1
+        s["ms"] += (time.perf_counter() - t) * 1000
+        return ret
@@ -0,0 +1,38 @@
+import pygame
+from pygame import Surface
+
+
+class AnimationClip:
+    """
+    One state of an animation config (e.g. zombie/run), resolved once when the config is loaded.
+    Entities keep a reference to their current clip and only advance an int frame index,
+    the surfaces are handed to the renderer directly.
+    """
+    __slots__ = ("id", "state", "frames", "frames_flipped", "durations", "loop", "offset", "n_frames")
+
+    def __init__(self, id: str, state: str, frames: list[Surface], durations: list[float], loop: bool, offset: tuple = (0, 0)) -> None:
+        self.id = id
+        self.state = state
+        self.frames = tuple(frames)
+        self.frames_flipped = tuple(pygame.transform.flip(s, True, False) for s in frames)
+        self.durations = tuple(durations)
+        self.loop = loop
+        self.offset = tuple(offset)
+        self.n_frames = len(self.durations)
+
+    def image(self, frame: int, flip_x=False) -> Surface:
+        return self.frames_flipped[frame] if flip_x else self.frames[frame]
+
+    def advance(self, frame: int, timer: float, dt: float) -> tuple[int, float, bool]:
+        """Returns `(frame, timer, ended)`. `ended` is True when a non-looping clip tries to go past its last frame."""
+        timer += dt
+        if timer < self.durations[frame]:
+            return frame, timer, False
+        frame += 1
+        if frame < self.n_frames:
+            return frame, 0.0, False
+        if self.loop:
+            return 0, 0.0, False
+        return self.n_frames - 1, 0.0, True
+
+    def __repr__(self) -> str: return f"AnimationClip({self.id}/{self.state}, {self.n_frames} frames)"
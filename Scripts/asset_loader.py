@@ -0,0 +1,282 @@
+import contextlib
+import hashlib
+import io
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, NamedTuple
+
+import pygame
+
+import Scripts.CONFIG as CFG
+from Scripts.bundle import Bundle
+from Scripts.cache import LRUCache
+from Scripts.utils import list_images, prepare_image
+
+
+class Image(NamedTuple):
+    """Manifest entry, loaded like `load_image`."""
+    path: str
+    colorkey: tuple = (0, 0, 0)
+    flip_x: bool = False
+    flip_y: bool = False
+
+
+class Images(NamedTuple):
+    """Manifest entry, loaded like `load_images` (every png in the directory)."""
+    path: str
+    colorkey: tuple = (0, 0, 0)
+    imgnames_are_ints: bool = False
+
+
+class Tileset(NamedTuple):
+    """Manifest entry, loaded like `CFG.parse_tileset(..., as_array=True)`."""
+    path: str
+    colorkey: tuple = (0, 0, 0)
+    alpha: int = 255
+
+
+# (ordner, colorkey, imgnames_are_ints) -> fertige Frames (Images Einträge), für alle Loader, Spiele und Animationen geteilt
+FRAME_CACHE = LRUCache(None, "frame lists")
+
+
+class Lazy(NamedTuple):
+    """Manifest entry (or whole group) that is only loaded on first use or `AssetManager.prefetch`."""
+    entry: Any
+
+
+def lazy_each(group: dict) -> dict:
+    """Every entry of `group` lazy on its own."""
+    return {k: Lazy(v) for k, v in group.items()}
+
+
+class StartupTimer:
+    """Wall time per named startup phase. A phase that is entered more than once adds up."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}  # name -> ms
+        self.start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (time.perf_counter() - t) * 1000
+
+    def report(self) -> str:
+        total = (time.perf_counter() - self.start) * 1000
+        return "startup: " + "  ".join(f"{name}={ms:.1f}ms" for name, ms in self.phases.items()) + f"  (total {total:.1f}ms)"
+
+
+class AssetLoader:
+    """
+    Loads a manifest: nested dicts/lists whose leaves are `Image`, `Images` and `Tileset` entries,
+    everything else is taken over as it is (e.g. "ANIMATIONS": {}).
+    The files are decoded on a thread pool (pygame.image.load doesn't need the display), `convert()`,
+    colorkeys and tileset splitting happen afterwards on the calling (main) thread.
+
+    If there is an up to date `Bundle` (`python -m Scripts.bundle`), its atlas pages are decoded instead of
+    the single files: each page is converted once and the images are subsurfaces of it. Files that are not
+    in the bundle are still loaded on their own.
+
+    Nothing is loaded twice: `Images` directories come from `FRAME_CACHE` once they were loaded (e.g. the
+    states of a `samedir` animation, a second zombie type with the same frames), and files with the same
+    content (or the same bundle rect) share one Surface.
+    """
+
+    def __init__(self, workers: int = None, timer: StartupTimer = None, use_bundle=True) -> None:
+        self.workers = workers or min(8, (os.cpu_count() or 1) + 1)
+        self.timer = timer if timer is not None else StartupTimer()
+        self.use_bundle = use_bundle
+        self.bundle: Bundle = None
+        self._pages: dict[int, pygame.Surface] = {}  # dekodiert, für Tilesets (die konvertieren selbst)
+        self._converted_pages: dict[int, pygame.Surface] = {}
+        self._background: ThreadPoolExecutor = None  # für prefetch
+        self._sources: dict[str, bytes] = {}  # einzeln geladene Datei -> hash vom Inhalt
+        self._prepared: dict[tuple, pygame.Surface] = {}  # (quelle, flip_x, flip_y, colorkey) -> fertiges Bild
+        self.stats = {"files": 0, "bundled": 0, "pages": 0}
+
+    def load(self, manifest: Any) -> Any:
+        decoded = self._decode(manifest, self.timer.phase)
+        with self.timer.phase("convert"):
+            return self._build(manifest, decoded)
+
+    def decode_async(self, manifest: Any) -> Future:
+        """Scan + decode in the background. `build(manifest, future.result())` on the main thread."""
+        if self._background is None:
+            self._background = ThreadPoolExecutor(1, thread_name_prefix="AssetPrefetch")
+        return self._background.submit(self._decode, manifest, lambda name: contextlib.nullcontext())
+
+    def build(self, manifest: Any, decoded: dict[str, pygame.Surface]) -> Any:
+        return self._build(manifest, decoded)
+
+    def _decode(self, manifest: Any, phase) -> dict[str, pygame.Surface]:
+        with phase("scan"):
+            if self.use_bundle and self.bundle is None:
+                self.bundle = Bundle.open()
+                self.use_bundle = self.bundle is not None
+            paths = list(dict.fromkeys(self._collect(manifest)))  # jede Datei nur einmal
+            # geänderte oder neue Dateien (Bundle nicht neu gebaut) werden einzeln geladen
+            files = [path for path in paths if not (self.bundle and self.bundle.is_current(path))]
+            bundled = set(paths).difference(files)
+            pages = sorted({self.bundle.locate(path)[0] for path in bundled} - self._pages.keys())
+        with phase("decode"):
+            page_paths = [self.bundle.page_path(page) for page in pages]
+            if len(page_paths) + len(files) > 1:
+                with ThreadPoolExecutor(self.workers, thread_name_prefix="AssetLoader") as pool:
+                    self._pages.update(zip(pages, pool.map(pygame.image.load, page_paths)))
+                    loaded = list(pool.map(_read_image, files))
+            else:  # eine Datei, dafür lohnt sich kein Pool
+                self._pages.update(zip(pages, map(pygame.image.load, page_paths)))
+                loaded = list(map(_read_image, files))
+        decoded = {}
+        by_content: dict[bytes, pygame.Surface] = {}
+        for path, (digest, surf) in zip(files, loaded):
+            decoded[path] = by_content.setdefault(digest, surf)  # gleicher Inhalt -> gleiche Surface
+            self._sources[path] = digest
+        self.stats["files"] += len(files)
+        self.stats["bundled"] += len(paths) - len(files)
+        self.stats["pages"] += len(pages)
+        return decoded
+
+    def _image(self, path: str, decoded: dict[str, pygame.Surface], flip_x=False, flip_y=False, colorkey=(0, 0, 0)) -> pygame.Surface:
+        if path in decoded:  # einzeln geladen
+            key = (self._sources[path], flip_x, flip_y, tuple(colorkey))
+            if (img := self._prepared.get(key)) is None:
+                img = self._prepared[key] = prepare_image(decoded[path], flip_x, flip_y, colorkey)
+            return img
+        page, rect = self.bundle.locate(path)
+        key = ((page, tuple(rect)), flip_x, flip_y, tuple(colorkey))
+        if (img := self._prepared.get(key)) is None:
+            if page not in self._converted_pages:
+                self._converted_pages[page] = self._pages[page].convert()
+            img = self._prepared[key] = prepare_image(self._converted_pages[page].subsurface(rect), flip_x, flip_y, colorkey, convert=False)
+        return img
+
+    def _frames(self, entry: Images, decoded: dict[str, pygame.Surface]) -> list[pygame.Surface]:
+        key = frames_key(entry)
+        if (frames := FRAME_CACHE.get(key)) is None:
+            frames = FRAME_CACHE.put(key, [self._image(path, decoded, colorkey=entry.colorkey) for path in list_images(entry.path, entry.imgnames_are_ints)])
+        return list(frames)  # die Surfaces sind geteilt, die Liste nicht
+
+    def _decoded(self, path: str, decoded: dict[str, pygame.Surface]) -> pygame.Surface:
+        """The unconverted image (own Surface or a subsurface of its page)."""
+        if path in decoded:
+            return decoded[path]
+        page, rect = self.bundle.locate(path)
+        return self._pages[page].subsurface(rect)
+
+    def load_animations(self, paths: list[str], am: "CFG.AssetManager" = None, lazy=False) -> list[str]:
+        """
+        `AssetManager.load_animation` for several configs, all frames decoded together. Returns the default states.
+        `lazy`: only the configs are read, the frames are loaded on the first `get_clip` (or `prefetch("ANIMATIONS/<id>")`).
+        """
+        am = am if am is not None else CFG.am
+        configs = [am.read_animation_config(path) for path in paths]
+        manifest = [{state: Images(path, colorkey=config["colorkey"]) for state, path in am.animation_dirs(config).items()} for config in configs]
+        if lazy:
+            for config, states in zip(configs, manifest):
+                am.assets["ANIMATIONS"][config["id"]] = LazyAnimation(self, states, am, config)
+            return [config["default"] for config in configs]
+        states = self.load(manifest)
+        with self.timer.phase("animations"):
+            return [am.add_animation(config, config_states) for config, config_states in zip(configs, states)]
+
+    def _collect(self, entry: Any):
+        if isinstance(entry, Lazy):
+            return
+        if isinstance(entry, Images):
+            if frames_key(entry) not in FRAME_CACHE:
+                yield from list_images(entry.path, entry.imgnames_are_ints)
+        elif isinstance(entry, (Image, Tileset)):
+            yield entry.path
+        elif isinstance(entry, dict):
+            for v in entry.values():
+                yield from self._collect(v)
+        elif isinstance(entry, list):
+            for v in entry:
+                yield from self._collect(v)
+
+    def _build(self, entry: Any, decoded: dict[str, pygame.Surface]) -> Any:
+        # Reihenfolge der Checks: die Einträge sind NamedTuples, also auch tuple
+        if isinstance(entry, Lazy):
+            return LazyAsset(self, entry.entry)
+        if isinstance(entry, Image):
+            return self._image(entry.path, decoded, entry.flip_x, entry.flip_y, entry.colorkey)
+        if isinstance(entry, Images):
+            return self._frames(entry, decoded)
+        if isinstance(entry, Tileset):
+            return CFG.parse_tileset(entry.path, as_array=True, colorkey=entry.colorkey, alpha=entry.alpha, img=self._decoded(entry.path, decoded))
+        if isinstance(entry, dict):
+            return {k: self._build(v, decoded) for k, v in entry.items()}
+        if isinstance(entry, list):
+            return [self._build(v, decoded) for v in entry]
+        return entry
+
+
+def frames_key(entry: Images) -> tuple:
+    return (os.path.normpath(entry.path), tuple(entry.colorkey), entry.imgnames_are_ints)  # colorkey aus json configs ist eine Liste
+
+
+def _read_image(path: str) -> tuple[bytes, pygame.Surface]:
+    with open(path, "rb") as f:
+        data = f.read()
+    return hashlib.blake2b(data, digest_size=16).digest(), pygame.image.load(io.BytesIO(data), path)
+
+
+_frame_loader: AssetLoader = None
+
+
+def load_frames(path: str, colorkey=(0, 0, 0), imgnames_are_ints=False) -> list[pygame.Surface]:
+    """`load_images` through `FRAME_CACHE`: every frame directory is only loaded once. Main thread."""
+    global _frame_loader
+    if _frame_loader is None:
+        _frame_loader = AssetLoader()
+    return _frame_loader.load(Images(path, colorkey, imgnames_are_ints))
+
+
+class LazyAsset(CFG.LazyEntry):
+    """What a `Lazy` manifest entry turns into in the loaded asset tree."""
+
+    def __init__(self, loader: AssetLoader, entry: Any) -> None:
+        self.loader = loader
+        self.entry = entry
+        self.future: Future = None
+
+    def prefetch(self) -> None:
+        LazyAsset.prefetch_many([self])
+
+    @staticmethod
+    def prefetch_many(entries: list["LazyAsset"]) -> None:
+        """All entries of a loader in one background decode, each builds its part from the shared result."""
+        by_loader: dict[AssetLoader, list[LazyAsset]] = {}
+        for entry in entries:
+            if entry.future is None:
+                by_loader.setdefault(entry.loader, []).append(entry)
+        for loader, group in by_loader.items():
+            future = loader.decode_async([entry.entry for entry in group])
+            for entry in group:
+                entry.future = future
+
+    def started(self) -> bool: return self.future is not None
+    def ready(self) -> bool: return self.future is not None and self.future.done()
+
+    def load(self) -> Any:
+        if self.future is not None:
+            return self.loader.build(self.entry, self.future.result())
+        return self.loader.build(self.entry, self.loader._decode(self.entry, lambda name: contextlib.nullcontext()))
+
+
+class LazyAnimation(LazyAsset):
+    """Frames of an animation, registered with `AssetManager.add_animation` when loaded."""
+
+    def __init__(self, loader: AssetLoader, states: dict[str, Images], am: "CFG.AssetManager", config: dict) -> None:
+        super().__init__(loader, states)
+        self.am = am
+        self.config = config
+
+    def load(self) -> dict:
+        self.am.add_animation(self.config, super().load())
+        return self.am.assets["ANIMATIONS"][self.config["id"]]
@@ -0,0 +1,82 @@
+NEIGHBOR_CELLS = ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+class LastSeenBlackboard:
+    """
+    Group knowledge about where the player was last seen, stored on a coarse grid.
+
+    Zombies that see the player `report` into the cell they stand in (only the first report
+    per cell and frame counts). The cell keeps an exponentially smoothed position.
+    Zombies that don't see the player `read` their cell (or the fresh neighbour cells) in O(1).
+    Entries expire after `ttl` seconds and are purged in `update`, so the board can't grow without bound.
+    """
+
+    def __init__(self, cell_size: int = 64, ttl: float = 6.0, smoothing: float = 0.5) -> None:
+        self.cell_size = cell_size
+        self.ttl = ttl
+        self.smoothing = smoothing  # 1.0 = nur neuester Wert zählt
+
+        self.time = 0.0
+        self.frame = 0
+        # cell -> [x, y, zeitpunkt des letzten reports, frame des letzten reports]
+        self.cells: dict[tuple[int, int], list] = {}
+        self._purge_timer = 0.0
+
+        self.stats = {"reports": 0, "reads": 0, "hits": 0, "expired": 0}
+
+    def cell(self, pos: tuple[float, float]) -> tuple[int, int]:
+        return (int(pos[0] // self.cell_size), int(pos[1] // self.cell_size))
+
+    def update(self, dt: float) -> None:
+        """Call once per frame before the zombies are updated."""
+        self.time += dt
+        self.frame += 1
+
+        self._purge_timer += dt
+        if self._purge_timer > self.ttl:
+            self._purge_timer = 0.0
+            expired = [cell for cell, entry in self.cells.items() if self.time - entry[2] > self.ttl]
+            for cell in expired:
+                del self.cells[cell]
+            self.stats["expired"] += len(expired)
+
+    def report(self, reporter_pos: tuple[float, float], player_pos: tuple[float, float]) -> None:
+        cell = self.cell(reporter_pos)
+        entry = self.cells.get(cell)
+        if entry and entry[3] == self.frame:  # pro Zelle nur einmal pro Frame
+            return
+        self.stats["reports"] += 1
+        if entry and self.time - entry[2] <= self.ttl:
+            entry[0] += (player_pos[0] - entry[0]) * self.smoothing
+            entry[1] += (player_pos[1] - entry[1]) * self.smoothing
+            entry[2] = self.time
+            entry[3] = self.frame
+        else:
+            self.cells[cell] = [player_pos[0], player_pos[1], self.time, self.frame]
+
+    def read(self, pos: tuple[float, float]) -> tuple[float, float] | None:
+        """
+        Smoothed last seen position for the cell of `pos`. Falls back to the average of the
+        fresh neighbour cells. None if nobody around has seen the player recently.
+        """
+        self.stats["reads"] += 1
+        cx, cy = self.cell(pos)
+        entry = self.cells.get((cx, cy))
+        if entry and self.time - entry[2] <= self.ttl:
+            self.stats["hits"] += 1
+            return (entry[0], entry[1])
+
+        x, y, c = 0.0, 0.0, 0
+        for ox, oy in NEIGHBOR_CELLS:
+            entry = self.cells.get((cx + ox, cy + oy))
+            if entry and self.time - entry[2] <= self.ttl:
+                x += entry[0]
+                y += entry[1]
+                c += 1
+        if not c:
+            return None
+        self.stats["hits"] += 1
+        return (x / c, y / c)
+
+    def clear(self) -> None:
+        self.cells.clear()
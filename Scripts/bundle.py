@@ -0,0 +1,154 @@
+import glob
+import hashlib
+import os
+import struct
+import time
+
+import pygame
+from pygame import Rect, Surface
+
+
+# wird nicht eingecheckt, sondern mit `python -m Scripts.bundle` gebaut (z.B. vor dem Packen von dist/)
+BUNDLE_DIR = "assets/bundle"
+BUNDLE_SOURCES = "assets/**/*.png"
+PAGE_SIZE = 512
+MAGIC = b"GGAB"
+VERSION = 1
+# magic, version, Anzahl Seiten, Anzahl Bilder
+HEADER = struct.Struct("<4sHHI")
+# seite, x, y, w, h, länge vom pfad (der pfad folgt als utf-8)
+ENTRY = struct.Struct("<HHHHHH")
+
+
+class Bundle:
+    """
+    All source PNGs packed into a few atlas pages (`page<i>.png`) plus `manifest.bin` with the rect of every file.
+    `AssetLoader` decodes the pages instead of the single files and cuts the images out as subsurfaces.
+    """
+
+    def __init__(self, directory: str, pages: list[str], rects: dict[str, tuple[int, Rect]], mtime: float) -> None:
+        self.directory = directory
+        self.pages = pages  # dateinamen der Seiten
+        self.rects = rects  # normalisierter quellpfad -> (seite, rect)
+        self.mtime = mtime  # vom manifest, neuere Quelldateien werden einzeln geladen
+
+    def __contains__(self, path: str) -> bool: return normpath(path) in self.rects
+
+    def is_current(self, path: str) -> bool:
+        """`path` is in the bundle and wasn't changed after it was built."""
+        return path in self and os.path.getmtime(path) <= self.mtime
+    def locate(self, path: str) -> tuple[int, Rect]: return self.rects[normpath(path)]
+    def page_path(self, page: int) -> str: return os.path.join(self.directory, self.pages[page])
+
+    @classmethod
+    def open(cls, directory: str = BUNDLE_DIR) -> "Bundle | None":
+        """The bundle in `directory`, or None if there is none (or from another version)."""
+        manifest_path = os.path.join(directory, "manifest.bin")
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            return None
+        magic, version, n_pages, n_entries = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            return None
+
+        rects = {}
+        offset = HEADER.size
+        for _ in range(n_entries):
+            page, x, y, w, h, n = ENTRY.unpack_from(data, offset)
+            offset += ENTRY.size
+            rects[data[offset:offset + n].decode("utf-8")] = (page, Rect(x, y, w, h))
+            offset += n
+        return cls(directory, [f"page{i}.png" for i in range(n_pages)], rects, os.path.getmtime(manifest_path))
+
+
+def normpath(path: str) -> str:
+    return os.path.normpath(path).replace("\\", "/")
+
+
+def bundle_sources() -> list[str]:
+    return sorted(normpath(p) for p in glob.glob(BUNDLE_SOURCES, recursive=True) if not normpath(p).startswith(BUNDLE_DIR + "/"))
+
+
+def pack(sizes: list[tuple[int, int]], page_size: int = PAGE_SIZE) -> list[tuple[int, int, int] | None]:
+    """
+    Shelf packing, highest images first. Returns (page, x, y) per size, None for images larger than a page.
+    """
+    placements: list[tuple[int, int, int] | None] = [None] * len(sizes)
+    page, x, y, shelf_h = 0, 0, 0, 0
+    for i in sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0])):
+        w, h = sizes[i]
+        if w > page_size or h > page_size:
+            continue
+        if x + w > page_size:  # neues Regal
+            x, y, shelf_h = 0, y + shelf_h, 0
+        if y + h > page_size:  # neue Seite
+            page, x, y, shelf_h = page + 1, 0, 0, 0
+        placements[i] = (page, x, y)
+        x += w
+        shelf_h = max(shelf_h, h)
+    return placements
+
+
+def build_bundle(directory: str = BUNDLE_DIR, page_size: int = PAGE_SIZE) -> Bundle:
+    """
+    Build step: packs every source PNG into atlas pages and writes them with the binary manifest.
+    Files with the same content are packed once and share their rect.
+    """
+    paths = bundle_sources()
+    by_content: dict[bytes, str] = {}
+    duplicates: dict[str, str] = {}  # pfad -> pfad mit gleichem Inhalt, der gepackt wird
+    for path in paths:
+        with open(path, "rb") as f:
+            digest = hashlib.blake2b(f.read(), digest_size=16).digest()
+        if (first := by_content.setdefault(digest, path)) != path:
+            duplicates[path] = first
+    paths = [path for path in paths if path not in duplicates]
+    images = [pygame.image.load(p) for p in paths]
+    placements = pack([img.get_size() for img in images], page_size)
+    n_pages = max((p[0] for p in placements if p), default=-1) + 1
+
+    pages = [Surface((page_size, page_size), pygame.SRCALPHA, 32) for _ in range(n_pages)]
+    page_pixels = [(pygame.surfarray.pixels3d(page), pygame.surfarray.pixels_alpha(page)) for page in pages]
+    rects = {}
+    for path, img, placement in zip(paths, images, placements):
+        if placement is None:
+            print(f"{path} is larger than a page ({page_size}px), stays a single file")
+            continue
+        page, x, y = placement
+        w, h = img.get_size()
+        # Pixel genau kopieren: ein normaler blit würde mischen und der colorkey aus tRNS Pixel auslassen
+        rgb, alpha = page_pixels[page]
+        rgb[x:x + w, y:y + h] = pygame.surfarray.array3d(img)
+        alpha[x:x + w, y:y + h] = pygame.surfarray.array_alpha(img) if img.get_flags() & pygame.SRCALPHA else 255
+        rects[path] = (page, Rect(x, y, w, h))
+    del page_pixels  # pixels3d sperrt die Surfaces
+    for path, first in duplicates.items():
+        if first in rects:
+            rects[path] = rects[first]
+
+    os.makedirs(directory, exist_ok=True)
+    page_names = [f"page{i}.png" for i in range(n_pages)]
+    for page, name in zip(pages, page_names):
+        pygame.image.save(page, os.path.join(directory, name))
+    entries = [HEADER.pack(MAGIC, VERSION, n_pages, len(rects))]
+    for path, (page, r) in rects.items():
+        encoded = path.encode("utf-8")
+        entries.append(ENTRY.pack(page, r.x, r.y, r.w, r.h, len(encoded)) + encoded)
+    # manifest zuletzt, sein mtime markiert das bundle als fertig
+    manifest_path = os.path.join(directory, "manifest.bin")
+    with open(manifest_path, "wb") as f:
+        f.write(b"".join(entries))
+    return Bundle(directory, page_names, rects, os.path.getmtime(manifest_path))
+
+
+if __name__ == "__main__":
+    # python -m Scripts.bundle
+    pygame.init()
+    t = time.perf_counter()
+    bundle = build_bundle()
+    packed = {(page, tuple(r)) for page, r in bundle.rects.values()}  # gleiche Dateien teilen sich ein Rect
+    fill = sum(r[2] * r[3] for _, r in packed) / max(1, len(bundle.pages) * PAGE_SIZE * PAGE_SIZE)
+    print(f"wrote {BUNDLE_DIR}: {len(bundle.rects)} images ({len(packed)} packed) on {len(bundle.pages)} pages ({fill:.0%} used) in {(time.perf_counter() - t) * 1000:.1f}ms")
@@ -0,0 +1,140 @@
+import collections
+import functools
+from typing import Any, Callable, Hashable, NamedTuple
+
+import pygame
+
+
+# name -> Cache, jeder benannte LRUCache trägt sich ein (für snapshot() und das F3 Overlay)
+CACHES: dict[str, "LRUCache"] = {}
+
+
+class CacheSnapshot(NamedTuple):
+    name: str
+    entries: int
+    bytes: int
+    max_bytes: int | None
+    max_entries: int | None
+    hits: int
+    misses: int
+    hit_rate: float
+    evictions: int
+    evicted_bytes: int
+
+
+class LRUCache:
+    """
+    Dict with a byte budget. Every entry is stored with its size; when the total goes over
+    `max_bytes` (or there are more than `max_entries`) the least recently used entries are evicted
+    until it fits again. `None` never evicts. Values are shared, callers must not modify them.
+    Named caches are listed in `CACHES`, a newer cache with the same name replaces the older one there.
+    """
+
+    def __init__(self, max_bytes: int | None, name="", max_entries: int = None) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.name = name
+        self.entries: collections.OrderedDict[Hashable, tuple[Any, int]] = collections.OrderedDict()
+        self.bytes = 0
+
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "evicted_bytes": 0}
+        if name:
+            CACHES[name] = self
+
+    def get(self, key: Hashable, default=None) -> Any:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return default
+        self.entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any, nbytes: int = None) -> Any:
+        """Stores `value` (size from `nbytes` or `size_of`) and returns it."""
+        if nbytes is None:
+            nbytes = size_of(value)
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (value, nbytes)
+        self.bytes += nbytes
+        self._evict()
+        return value
+
+    def discard(self, key: Hashable) -> None:
+        if (entry := self.entries.pop(key, None)) is not None:
+            self.bytes -= entry[1]
+
+    def __contains__(self, key: Hashable) -> bool: return key in self.entries
+    def __len__(self) -> int: return len(self.entries)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.bytes = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def snapshot(self) -> CacheSnapshot:
+        return CacheSnapshot(self.name, len(self.entries), self.bytes, self.max_bytes, self.max_entries, self.stats["hits"],
+                             self.stats["misses"], self.hit_rate, self.stats["evictions"], self.stats["evicted_bytes"])
+
+    def _evict(self) -> None:
+        if self.max_entries is not None:
+            while len(self.entries) > self.max_entries and len(self.entries) > 1:
+                self._evict_oldest()
+        if self.max_bytes is None:
+            return
+        # das gerade eingefügte bleibt immer drin, auch wenn es alleine schon zu groß ist
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            self._evict_oldest()
+
+    def _evict_oldest(self) -> None:
+        _, (_, nbytes) = self.entries.popitem(last=False)
+        self.bytes -= nbytes
+        self.stats["evictions"] += 1
+        self.stats["evicted_bytes"] += nbytes
+
+    def __repr__(self) -> str:
+        return f"LRUCache({self.name}, {len(self.entries)} entries, {self.bytes / 1024:.0f}/{(self.max_bytes or 0) / 1024:.0f} KiB, hit rate {self.hit_rate:.1%}, {self.stats})"
+
+
+def memoize(cache: LRUCache) -> Callable:
+    """Like `functools.lru_cache`, but the results are kept in `cache` (budget, stats, `snapshot`)."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(kwargs.items())) if kwargs else args
+            if (value := cache.get(key)) is None:
+                value = cache.put(key, func(*args, **kwargs))
+            return value
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def snapshot() -> list[CacheSnapshot]:
+    """Every named cache, largest first."""
+    return sorted((cache.snapshot() for cache in CACHES.values()), key=lambda s: -s.bytes)
+
+
+def format_snapshot(snapshots: list[CacheSnapshot] = None) -> list[str]:
+    """One line per cache plus the total, for the debug overlay and benchmark.py."""
+    snapshots = snapshot() if snapshots is None else snapshots
+    lines = []
+    for s in snapshots:
+        budget = f"/{s.max_bytes / 1024:.0f}" if s.max_bytes is not None else ""
+        lines.append(f"{s.name}: {s.entries} entries  {s.bytes / 1024:.0f}{budget} KiB  hit {s.hit_rate:.1%}  evicted {s.evictions}")
+    lines.append(f"total: {sum(s.bytes for s in snapshots) / 1024 / 1024:.2f} MiB")
+    return lines
+
+
+def size_of(value: Any) -> int:
+    """Pixel memory (w x h x bytes per pixel) of a Surface (or a list/tuple of them), other values count as 0."""
+    if isinstance(value, pygame.Surface):
+        return value.get_width() * value.get_height() * value.get_bytesize()
+    if isinstance(value, (list, tuple)):
+        return sum(size_of(v) for v in value)
+    return 0
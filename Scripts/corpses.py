@@ -0,0 +1,131 @@
+import collections
+import math
+
+import pygame
+from pygame import Surface
+
+
+CHUNK_SIZE = 256
+MAX_CORPSES = 120  # danach werden die ältesten ausgeblendet
+FADE_TIME = 4.0
+FADE_STEPS = 8  # so oft wird ein Chunk während dem Ausblenden neu gebacken
+# Bereich um (x, y - z_offset), in dem ein Zombie (Körper + Kopf) gezeichnet wird
+SNAPSHOT_PADDING = (16, 16)
+SNAPSHOT_SIZE = (48, 64)
+
+
+class Corpse:
+    __slots__ = ("surf", "pos", "alpha", "fade")
+
+    def __init__(self, surf: Surface, pos: tuple[int, int]) -> None:
+        self.surf = surf
+        self.pos = pos  # world space topleft
+        self.alpha = 255
+        self.fade = 0.0  # vergangene Zeit seit Beginn vom Ausblenden
+
+    @property
+    def rect(self) -> pygame.Rect:
+        return pygame.Rect(self.pos, self.surf.size)
+
+
+class CorpseLayer:
+    """
+    Dead zombies whose death animation is finished get stamped once into baked
+    ground-decal chunk surfaces, so they can leave every per-frame entity list.
+    Rendering is one blit per visible chunk, no matter how many corpses there are.
+
+    Only the oldest corpses beyond `max_corpses` are touched again: they fade out
+    over `fade_time` (their chunks are re-baked `FADE_STEPS` times) and are dropped.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, max_corpses=MAX_CORPSES, fade_time=FADE_TIME) -> None:
+        self.chunk_size = chunk_size
+        self.max_corpses = max_corpses
+        self.fade_time = fade_time
+
+        self.chunks: dict[tuple[int, int], Surface] = {}
+        self.corpses: collections.deque[Corpse] = collections.deque()
+        self._chunk_corpses: dict[tuple[int, int], list[Corpse]] = collections.defaultdict(list)
+
+        self.stats = {"baked": 0, "faded": 0, "rebakes": 0}
+
+    def bake(self, zombie) -> None:
+        """Stamp the current frame of `zombie` into the chunks. The caller removes the entity afterwards."""
+        origin = (int(zombie.x - zombie.x_offset - SNAPSHOT_PADDING[0]), int(zombie.y - zombie.z_offset - SNAPSHOT_PADDING[1]))
+        snapshot = Surface(SNAPSHOT_SIZE, pygame.SRCALPHA)
+        zombie.render(snapshot, scroll=origin)
+
+        bounds = snapshot.get_bounding_rect()
+        if not bounds.w or not bounds.h:
+            return
+        corpse = Corpse(snapshot.subsurface(bounds).copy(), (origin[0] + bounds.x, origin[1] + bounds.y))
+        self.corpses.append(corpse)
+        for chunk_pos in self._chunks_of(corpse.rect):
+            self._chunk_corpses[chunk_pos].append(corpse)
+            self._get_chunk(chunk_pos).blit(corpse.surf, (corpse.pos[0] - chunk_pos[0] * self.chunk_size, corpse.pos[1] - chunk_pos[1] * self.chunk_size))
+        self.stats["baked"] += 1
+
+    def update(self, dt: float) -> None:
+        n_fading = len(self.corpses) - self.max_corpses
+        if n_fading <= 0:
+            return
+
+        dirty = set()
+        for i in range(n_fading):
+            corpse = self.corpses[i]
+            corpse.fade += dt
+            step = math.ceil((1 - min(corpse.fade / self.fade_time, 1.0)) * FADE_STEPS)
+            alpha = 255 * step // FADE_STEPS
+            if alpha != corpse.alpha:
+                corpse.alpha = alpha
+                dirty.update(self._chunks_of(corpse.rect))
+
+        while self.corpses and self.corpses[0].alpha <= 0:
+            corpse = self.corpses.popleft()
+            for chunk_pos in self._chunks_of(corpse.rect):
+                self._chunk_corpses[chunk_pos].remove(corpse)
+            self.stats["faded"] += 1
+
+        for chunk_pos in dirty:
+            self._rebake(chunk_pos)
+
+    def render(self, surface: Surface, offset=(0, 0)) -> None:
+        cs = self.chunk_size
+        x0, y0 = int(offset[0] // cs), int(offset[1] // cs)
+        x1, y1 = int((offset[0] + surface.width) // cs), int((offset[1] + surface.height) // cs)
+        blits = []
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                if (chunk := self.chunks.get((cx, cy))):
+                    blits.append((chunk, (cx * cs - offset[0], cy * cs - offset[1])))
+        surface.fblits(blits)
+
+    def clear(self) -> None:
+        self.chunks.clear()
+        self.corpses.clear()
+        self._chunk_corpses.clear()
+
+    def _chunks_of(self, rect: pygame.Rect) -> list[tuple[int, int]]:
+        cs = self.chunk_size
+        return [(cx, cy) for cy in range(rect.top // cs, (rect.bottom - 1) // cs + 1) for cx in range(rect.left // cs, (rect.right - 1) // cs + 1)]
+
+    def _get_chunk(self, chunk_pos: tuple[int, int]) -> Surface:
+        if chunk_pos not in self.chunks:
+            self.chunks[chunk_pos] = Surface((self.chunk_size, self.chunk_size), pygame.SRCALPHA)
+        return self.chunks[chunk_pos]
+
+    def _rebake(self, chunk_pos: tuple[int, int]) -> None:
+        corpses = self._chunk_corpses.get(chunk_pos)
+        if not corpses:
+            self.chunks.pop(chunk_pos, None)
+            self._chunk_corpses.pop(chunk_pos, None)
+            return
+        chunk = self._get_chunk(chunk_pos)
+        chunk.fill((0, 0, 0, 0))
+        ox, oy = chunk_pos[0] * self.chunk_size, chunk_pos[1] * self.chunk_size
+        for corpse in corpses:
+            if corpse.alpha < 255:
+                corpse.surf.set_alpha(corpse.alpha)
+            chunk.blit(corpse.surf, (corpse.pos[0] - ox, corpse.pos[1] - oy))
+            corpse.surf.set_alpha(None)
+        self.stats["rebakes"] += 1
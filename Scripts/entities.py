@@ -1,6 +1,6 @@
 import Scripts.InverseKinematics as ik
 from typing import assert_type
-import random
+import Scripts.rng as rng
 import math
 import Scripts.CONFIG as CFG
 import pygame
@@ -9,11 +9,22 @@ from Scripts.tilemap import TileMap, EntityMap
 import collections
 from Scripts.utils_math import dist, normalize, vector2d_from_angle, rotate_vector2d, sign_vector2d, vector2d_mult, vector2d_sub, clamp
 import json
-from Scripts.utils import load_image, load_images, draw_rect_alpha
+from Scripts.utils import load_image, draw_rect_alpha
+from Scripts.asset_loader import load_frames
 import time
 import dataclasses
 import abc
 from Scripts.timer import Timer
+from Scripts.markers import get_item_anchors, get_head_offsets, find_first_pixel
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from Scripts.flowfield import FlowField
+    from Scripts.blackboard import LastSeenBlackboard
+    from Scripts.line_of_sight import LineOfSight
+
+
+PROJECTILE_ASSET = CFG.am.handle("items/guns/projectile")
 
 
 class FrozenDict(collections.abc.Mapping):  # https://stackoverflow.com/questions/2703599/what-would-a-frozen-dict-be
@@ -167,9 +178,9 @@ class Animation:
                 if loaded_already:
                     self.states[state] = loaded_already
                 elif same_dir:
-                    self.states[state] = load_images(default_path, colorkey=colorkey)
+                    self.states[state] = load_frames(default_path, colorkey=colorkey)
                 else:
-                    self.states[state] = load_images(f"{default_path}/{state}", colorkey=colorkey)
+                    self.states[state] = load_frames(f"{default_path}/{state}", colorkey=colorkey)
                 self.states_looping[state] = state_data["loop"]
                 self.states_frame_times[state] = state_data["frames"]
                 self.states_offset[state] = state_data["offset"]
@@ -213,12 +224,7 @@ class Animation:
 
 
 def find_first_occurance_of_pixel_with_color_X(surf: Surface, color: tuple) -> tuple[int, int]:
-    color = pygame.Color(*color)
-    for x in range(surf.width):
-        for y in range(surf.height):
-            if surf.get_at((x, y)) == color:
-                return (x, y)
-    return None
+    return find_first_pixel(surf, color)
 
 
 class Player(BaseEntityABC):
@@ -234,16 +240,18 @@ class Player(BaseEntityABC):
 
         upperarm_len = 3
         lowerarm_len = 5
-        self.right_arm = ik.IKArmFABRIK(self.shoulder_right_pos, lowerarm_len, upperarm_len)
-        self.left_arm = ik.IKArmFABRIK(self.shoulder_left_pos, lowerarm_len, upperarm_len)
+        self.right_arm = ik.IKArmTwoBone(self.shoulder_right_pos, upperarm_len, lowerarm_len)
+        self.left_arm = ik.IKArmTwoBone(self.shoulder_left_pos, upperarm_len, lowerarm_len)
         self.animation_frame = 0
         self.animation_frame_timer = 0.
         self.animation_type = "idle"
+        self.animation_clip = CFG.am.get_clip(self.base_type, self.animation_type)
         self.head_angle = 0.0  # radians
 
         if self.base_type not in Player.head_pos_cache_per_type:
             Player.head_pos_cache_per_type[self.base_type] = self._parse_headdata("assets/entities/enemies/zombie/head_offsets/config.json")  # müsste eigentlich players headoffsets sein, aber dann gehen die Zombies headoffsets nicht mehr. Da gamejam = egal
         self.head_position_cache = Player.head_pos_cache_per_type[self.base_type]
+        self.head_asset = CFG.am.handle(f"{self.base_type}_head")
         # print(self.head_position_cache)
 
         self.damageable = True
@@ -253,22 +261,9 @@ class Player(BaseEntityABC):
         self.inventory = []
         self.inventory_idx = 0
 
-    def _parse_headdata(self, path: str) -> None:
-        offsets = {}
-        with open(path, "r") as f:
-            data = json.load(f)
-            colorkey = data["colorkey"]
-            default_path = data["file_path"]
-            id = data["id"]
-
-            for animation_state, state_data in data["animations"].items():
-                state_offsets = [(0, 0)] * state_data["len"]
-                imgs = load_images(f"{default_path}/{animation_state}", colorkey=colorkey)
-                for i, img in enumerate(imgs):
-                    state_offsets[i] = find_first_occurance_of_pixel_with_color_X(img, state_data["pixel_color"])
-                offsets[animation_state] = state_offsets
-
-        return offsets
+    def _parse_headdata(self, path: str) -> dict:
+        # vorkompiliert in assets/markers.json (siehe Scripts/markers.py)
+        return get_head_offsets(path)
 
     @property
     def hitbox(self) -> FRect:
@@ -314,20 +309,22 @@ class Player(BaseEntityABC):
         self.animation_frame_timer = 0.0
 
     def update_animation_state(self, dt: float):
-        self.animation_frame_timer += dt
-        if self.animation_frame_timer >= CFG.am.get_animation_frame_data(self.base_type, self.animation_type)[self.animation_frame]:
-            self.animation_frame += 1
-            if CFG.am.get_animation_looping(self.base_type, self.animation_type):
-                self.animation_frame %= CFG.am.get_animation_number_of_frames(self.base_type, self.animation_type)
-                # self.animation_frame = (self.animation_frame + 1) % CFG.am.get_animation_number_of_frames(self.base_type, self.animation_type)
-            else:
-                self.animation_frame = min(self.animation_frame, CFG.am.get_animation_number_of_frames(self.base_type, self.animation_type) - 1)
-            self.animation_frame_timer = 0.0
-        self.type = f"ANIMATIONS/{self.base_type}/{self.animation_type}/{int(self.animation_frame)}"
+        self.animation_frame, self.animation_frame_timer, _ = self.animation_clip.advance(self.animation_frame, self.animation_frame_timer, dt)
+
+    @property
+    def animation_finished(self) -> bool:
+        if self.animation_clip.loop:
+            return False
+        return self.animation_frame >= self.animation_clip.n_frames - 1
+
+    @property
+    def image(self) -> Surface:
+        return self.animation_clip.image(self.animation_frame, self.render_fliped)
 
     def set_animation_state(self, type: str) -> None:
         if self.animation_type != type:
             self.animation_type = type
+            self.animation_clip = CFG.am.get_clip(self.base_type, type)
             self.reset_animation_timer()
 
     def update_arms(self) -> None:
@@ -472,7 +469,7 @@ class Player(BaseEntityABC):
             ]
             draw_rect_alpha(surface, (180, 180, 180), r, 125)
             pygame.draw.rect(surface, (180, 180, 180), r, 1)
-            s = CFG.am.get_outlined(item.type, outline_color=(180, 180, 180))
+            s = item.asset.get_outlined(outline_color=(180, 180, 180))
             fblits.append((
                 s,
                 s.get_rect(center=((
@@ -488,7 +485,7 @@ class Player(BaseEntityABC):
     def render_body(self, surface: Surface, scroll=(0, 0), draw_rect=False) -> None:
         p = (self.x - scroll[0] - self.x_offset, self.y - self.z_offset - scroll[1])
         # print(self)
-        surface.blit(CFG.am.get(self.type, angle=self.angle_degrees, flip_x=self.render_fliped), p)
+        surface.blit(self.image, p)
         if draw_rect:
             r = self.frect
             pygame.draw.rect(surface, (0, 255, 255), [r.x - scroll[0], r.y - scroll[1], *r.size], 1)
@@ -496,7 +493,7 @@ class Player(BaseEntityABC):
             pygame.draw.rect(surface, (0, 255, 0), [r.x - scroll[0], r.y - scroll[1], *r.size], 1)
 
     def render_head(self, surface: Surface, scroll=(0, 0)) -> None:
-        head_surf = CFG.am.get(f"{self.base_type}_head", angle=self.head_angle_degrees)
+        head_surf = self.head_asset.get(self.head_angle_degrees)
         p = head_surf.get_frect(center=self.head_pos)
         surface.blit(head_surf, (p[0] - scroll[0] - self.x_offset, p[1] - scroll[1]))
 
@@ -514,7 +511,7 @@ class Player(BaseEntityABC):
         if not self.held_item:
             return
         ent = self.held_item
-        surf = CFG.am.get(ent.type, angle=ent.angle_degrees)
+        surf = ent.asset.get(ent.angle_degrees)
         center_pos = (
             ent.centerx - ent.direction[0] * ent.stats.holding_offset - ent.direction[0] * ent.recoil,
             ent.centery - ent.direction[1] * ent.stats.holding_offset - ent.direction[1] * ent.recoil
@@ -532,13 +529,22 @@ class Player(BaseEntityABC):
 
 
 class ZombieBase(Player):
-    player_last_seen_map: dict["ZombieBase", tuple] = {}
+    flow_field: "FlowField" = None  # wird von Game gesetzt, alle Zombies teilen sich ein Feld zum Spieler
+    blackboard: "LastSeenBlackboard" = None  # wird von Game gesetzt, wo der Spieler zuletzt gesehen wurde
+    line_of_sight: "LineOfSight" = None  # wird von Game gesetzt, damit Zombies nicht durch Wände sehen
 
     def __init__(self, r, vel=(0, 0, 0), type="zombie"):
         super().__init__(r, vel, type=type)
         self.damageable = True
 
-    def rule1(self, target_pos: tuple) -> tuple:
+    def can_see(self, pos: tuple) -> bool:
+        return not ZombieBase.line_of_sight or ZombieBase.line_of_sight.visible(self.pos, pos)
+
+    def rule1(self, target_pos: tuple, follow_flow_field=False) -> tuple:
+        if follow_flow_field and ZombieBase.flow_field and (flow_dir := ZombieBase.flow_field.sample(self.center)):
+            # gleiche Stärke wie direkt drauf zu laufen, nur entlang des Weges um die Wände herum
+            strength = dist(target_pos, self.pos) * 0.2
+            return (flow_dir[0] * strength, flow_dir[1] * strength)
         return (
             (target_pos[0] - self.pos[0]) * 0.2,
             (target_pos[1] - self.pos[1]) * 0.2
@@ -555,6 +561,11 @@ class ZombieBase(Player):
         )
         return c
 
+    @property
+    def needs_update(self) -> bool:
+        # tote Zombies, deren Animation fertig ist und die nichts mehr fallen lassen müssen, brauchen kein update mehr
+        return not (self.dead and self.animation_finished and not self.held_item)
+
     def kill(self):
         self.health = 0
         self.dead = True
@@ -583,8 +594,6 @@ class Zombie(ZombieBase):
         self.time_between_reload = 0.0
         self.no_target_sight_time = 0.0
 
-        ZombieBase.player_last_seen_map[self] = None
-
         self.target_point = (0, 0)
 
         if self.base_type not in Player.head_pos_cache_per_type:
@@ -596,7 +605,7 @@ class Zombie(ZombieBase):
     def update(self, dt, player_pos: tuple, entity_map: EntityMap):
         if self.animation_type == "spawn":
             self.update_animation_state(dt)
-            if self.animation_frame == CFG.am.get_animation_number_of_frames(self.base_type, self.animation_type) - 1:
+            if self.animation_frame == self.animation_clip.n_frames - 1:
                 self.set_animation_state("idle")
             return {"type": self.base_type, "pickedup_items": [], "dropped_items": []}
 
@@ -617,33 +626,20 @@ class Zombie(ZombieBase):
         if self.held_item and self.time_between_reload > self.held_item.ammo * 2 and self.held_item.ammo != self.held_item.stats.ammo:
             do_reload = True
 
-        if dist(player_pos, self.pos) > self.see_dist:
-            # get average of last seen poses.
-            last_seen_pos = self.pos
-            c = 1
-            for zombie_pos, zombie_data in entity_map.query(self.pos):
-                if not isinstance(zombie_data["ent"], ZombieBase):
-                    continue
-                if (_pos := ZombieBase.player_last_seen_map[zombie_data["ent"]]):
-                    last_seen_pos = (
-                        last_seen_pos[0] + _pos[0],
-                        last_seen_pos[1] + _pos[1]
-                    )
-                    c += 1
-            last_seen_pos = (
-                last_seen_pos[0] // c,
-                last_seen_pos[1] // c
-            )
-            target_pos = last_seen_pos
+        if dist(player_pos, self.pos) > self.see_dist or not self.can_see(player_pos):
+            # was die Gruppe in der Nähe zuletzt vom Spieler gesehen hat, sonst stehen bleiben
+            last_seen_pos = ZombieBase.blackboard.read(self.pos) if ZombieBase.blackboard else None
+            target_pos = last_seen_pos if last_seen_pos else self.pos
             self.no_target_sight_time += dt
         else:
             target_pos = player_pos
-            ZombieBase.player_last_seen_map[self] = target_pos
+            if ZombieBase.blackboard:
+                ZombieBase.blackboard.report(self.pos, target_pos)
             can_shoot = bool(self.held_item) and self.held_item.ammo
             self.no_target_sight_time = 0.0
         v = (0, 0)
         if do_reload or not can_shoot:
-            v1 = self.rule1(target_pos)
+            v1 = self.rule1(target_pos, follow_flow_field=target_pos == player_pos)
             v2 = self.rule2(entity_map)
 
             v = (v1[0] + v2[0], v1[1] + v2[1])
@@ -719,7 +715,6 @@ class SucideZombie(ZombieBase):
         self.did_explode = False
 
         self.target_point = (0, 0)
-        ZombieBase.player_last_seen_map[self] = (0, 0)  # gegen crash
 
         if self.base_type not in Player.head_pos_cache_per_type:
             Player.head_pos_cache_per_type[self.base_type] = self._parse_headdata("assets/entities/enemies/zombie_suicide/head_offsets/config.json")
@@ -727,12 +722,23 @@ class SucideZombie(ZombieBase):
 
         self.update_animation_state(0.0)
 
+    @property
+    def needs_update(self) -> bool:
+        return super().needs_update or not self.did_explode
+
+    def detonate(self) -> float | None:
+        """Vest goes off right now (chain reaction). Returns the radius, None if it exploded already."""
+        if self.did_explode:
+            return None
+        self.did_explode = True
+        return self.explode_range
+
     def update(self, dt, player_pos: tuple, entity_map: EntityMap):
         explode = False
 
         if self.animation_type == "spawn":
             self.update_animation_state(dt)
-            if self.animation_frame == CFG.am.get_animation_number_of_frames(self.base_type, self.animation_type) - 1:
+            if self.animation_frame == self.animation_clip.n_frames - 1:
                 self.set_animation_state("idle")
             return {"type": self.base_type, "explode": explode, "radius": self.explode_range}
 
@@ -749,14 +755,15 @@ class SucideZombie(ZombieBase):
         target_pos = (0, 0)
 
         target_pos = player_pos
-        ZombieBase.player_last_seen_map[self] = target_pos
+        if ZombieBase.blackboard:
+            ZombieBase.blackboard.report(self.pos, target_pos)
 
         explode = dist(target_pos, self.pos) < self.explode_range
         if explode and not self.did_explode:
             self.did_explode = True
 
         v = (0, 0)
-        v1 = self.rule1(target_pos)
+        v1 = self.rule1(target_pos, follow_flow_field=True)
         v2 = self.rule2(entity_map)
 
         v = (v1[0] + v2[0], v1[1] + v2[1])
@@ -924,28 +931,23 @@ class ItemABC(BaseEntityABC):
         self.stats = stats
         super().__init__(r, self.stats.type)
         self.owner: Player = None
+        self.asset = CFG.am.handle(self.type)
 
         # region handle-points & barreltip point offsets
-        self.handle_pos_offset = find_first_occurance_of_pixel_with_color_X(CFG.am.get(f"{self.type}_lt"), (255, 0, 0))
-        self.handle_pos2_offset = find_first_occurance_of_pixel_with_color_X(CFG.am.get(f"{self.type}_lt"), (0, 255, 0))
-        self.barrel_pos_offset = find_first_occurance_of_pixel_with_color_X(CFG.am.get(f"{self.type}_lt"), (0, 0, 255))
-        self.bulletcasing_pos_offset = find_first_occurance_of_pixel_with_color_X(CFG.am.get(f"{self.type}_lt"), (255, 255, 0))
-        # offset to "centerline" of rect
-        self.handle_pos_offset = (self.handle_pos_offset[0], self.handle_pos_offset[1] - self._r.h/2)
-        self.handle_pos2_offset = (self.handle_pos2_offset[0], self.handle_pos2_offset[1] - self._r.h/2)
-        self.barrel_pos_offset = (self.barrel_pos_offset[0], self.barrel_pos_offset[1] - self._r.h/2)
-        self.bulletcasing_pos_offset = (self.bulletcasing_pos_offset[0], self.bulletcasing_pos_offset[1] - self._r.h/2)
+        # werden einmal pro item type aus dem "_lt" Bild gelesen und dann geteilt
+        anchors = get_item_anchors(self.type)
+        h2 = self._r.h/2  # offset to "centerline" of rect
+        self.handle_pos_offset = (anchors["handle"][0], anchors["handle"][1] - h2)
+        self.handle_pos2_offset = (anchors["handle2"][0], anchors["handle2"][1] - h2)
+        self.barrel_pos_offset = (anchors["barrel"][0], anchors["barrel"][1] - h2)
+        self.bulletcasing_pos_offset = (anchors["bulletcasing"][0], anchors["bulletcasing"][1] - h2)
 
         # für self.render_flipped
-        self.handle_pos_offset_flipped = find_first_occurance_of_pixel_with_color_X(pygame.transform.flip(CFG.am.get(f"{self.type}_lt"), False, True), (255, 0, 0))
-        self.handle_pos2_offset_flipped = find_first_occurance_of_pixel_with_color_X(pygame.transform.flip(CFG.am.get(f"{self.type}_lt"), False, True), (0, 255, 0))
-        self.barrel_pos_offset_flipped = find_first_occurance_of_pixel_with_color_X(pygame.transform.flip(CFG.am.get(f"{self.type}_lt"), False, True), (0, 0, 255))
-        self.bulletcasing_pos_offset_flipped = find_first_occurance_of_pixel_with_color_X(pygame.transform.flip(CFG.am.get(f"{self.type}_lt"), False, True), (255, 255, 0))
-        # offset to "centerline" of rect
-        self.handle_pos_offset_flipped = (self.handle_pos_offset_flipped[0], self.handle_pos_offset_flipped[1] - self._r.h/2)
-        self.handle_pos2_offset_flipped = (self.handle_pos2_offset_flipped[0], self.handle_pos2_offset_flipped[1] - self._r.h/2)
-        self.barrel_pos_offset_flipped = (self.barrel_pos_offset_flipped[0], self.barrel_pos_offset_flipped[1] - self._r.h/2)
-        self.bulletcasing_pos_offset_flipped = (self.bulletcasing_pos_offset_flipped[0], self.bulletcasing_pos_offset_flipped[1] - self._r.h/2)
+        self.handle_pos_offset_flipped = (anchors["handle_flipped"][0], anchors["handle_flipped"][1] - h2)
+        self.handle_pos2_offset_flipped = (anchors["handle2_flipped"][0], anchors["handle2_flipped"][1] - h2)
+        self.barrel_pos_offset_flipped = (anchors["barrel_flipped"][0], anchors["barrel_flipped"][1] - h2)
+        self.bulletcasing_pos_offset_flipped = (anchors["bulletcasing_flipped"][0], anchors["bulletcasing_flipped"][1] - h2)
+        # endregion
 
         self.recoil = 0.0
 
@@ -1054,11 +1056,11 @@ class BulletCasing(BaseEntityABC):
             angle = 0.97
         # print(a, angle)
         vel = vector2d_from_angle(angle)
-        vel = (vel[0] * speed, vel[1] * speed, random.random()*50-25)
+        vel = (vel[0] * speed, vel[1] * speed, rng.weapons.random()*50-25)
         super().__init__(r, "bullet_casing", vel, angle)
         self.length = length
         self.speed = speed
-        self.max_fall = max_fall + random.random() * 5
+        self.max_fall = max_fall + rng.weapons.random() * 5
         self.org_y = self.y
         self.alive = 0.0
 
@@ -1155,6 +1157,9 @@ class Gun(ItemABC):
             reload_input = self.owner.reload_input
             shoot_input = self.owner.shoot_input
             lookpoint = vector2d_sub(self.owner.target_point, scroll)  # weil targetpoint in worldspace ist. Der Punkt muss erst zu screenspace umgewandelt werden.
+            # nicht in die Wand schießen, wenn der Lauf schon um der Ecke ist
+            if shoot_input and ZombieBase.line_of_sight and not ZombieBase.line_of_sight.visible(self.pos, self.owner.target_point):
+                shoot_input = False
 
         if reload_input or (self.ammo == 0 and shoot_input and not self.reloadtimer.just_ended):
             self.reloadtimer.start()
@@ -1182,7 +1187,7 @@ class Gun(ItemABC):
         pygame.draw.rect(surface, (255, 255, 255), r, 1)
 
         fblits = []
-        proj_surf = CFG.am.get("items/guns/projectile")
+        proj_surf = PROJECTILE_ASSET.get()
 
         if not self.reloadtimer.ended and self.reloadtimer.remaining():
             counter = int((self.reloadtimer.duration - self.reloadtimer.remaining()) / self.reloadtimer.duration * self.stats.ammo)
@@ -1210,7 +1215,7 @@ class Gun(ItemABC):
                 proj_surf,
                 r
             ))
-        s = CFG.am.get_outlined(self.type, outline_color=(255, 255, 255))
+        s = self.asset.get_outlined(outline_color=(255, 255, 255))
         fblits.append((
             s,
             s.get_rect(center=(br[0]-padding[0]-reload_bar_item_size[0]-padding[0]-icon_image_size[0]/2, br[1]-padding[1]-icon_image_size[1]/2))
@@ -1311,7 +1316,7 @@ class Medkit(Consumable):
         pygame.draw.rect(surface, (255, 255, 255), r, 1)
 
         fblits = []
-        proj_surf = CFG.am.get("items/guns/projectile")
+        proj_surf = PROJECTILE_ASSET.get()
 
         counter = self.uses
 
@@ -1337,7 +1342,7 @@ class Medkit(Consumable):
                 r
             ))
 
-        s = CFG.am.get_outlined(self.type, outline_color=(255, 255, 255))
+        s = self.asset.get_outlined(outline_color=(255, 255, 255))
         fblits.append((
             s,
             s.get_rect(center=(br[0]-padding[0]-reload_bar_item_size[0]-padding[0]-icon_image_size[0]/2, br[1]-padding[1]-icon_image_size[1]/2))
@@ -1352,11 +1357,14 @@ class AmmoStats(ItemStats):
 
 
 class LootDrop(BaseEntityABC):
+    # alles, was make_items ziehen kann (main lädt das für Level mit Kisten vor)
+    LOOT_ASSETS = tuple(f"items/guns/{gun}" for gun in ("ring", "m60", "kriss_vector", "rocketlauncher", "shotgun", "pistol", "pistol_silenced", "rifle")) + ("items/medkit",)
+
     def __init__(self, r, vel=(0, 0, 0), angle=0):
         super().__init__(r, "creates", vel, angle)
 
         self.contained_items = []
-        self.make_items(random.randint(1, 4))
+        self.make_items(rng.loot.randint(1, 4))
 
         self.max_health = 150
         self.health = self.max_health
@@ -1380,25 +1388,25 @@ class LootDrop(BaseEntityABC):
     def make_items(self, n: int) -> None:
         for _ in range(n):
             item = None
-            p = random.randint(0, 100)
+            p = rng.loot.randint(0, 100)
             if p <= 50:  # gun
-                p2 = random.randint(0, 100)
+                p2 = rng.loot.randint(0, 100)
                 type = "gun_to_be_chosen"
                 if p2 <= 5:  # ring
                     type = "ring"
                 elif p2 <= 15:  # m60 or vector
-                    type = random.choice(["m60", "kriss_vector"])
+                    type = rng.loot.choice(["m60", "kriss_vector"])
                 elif p2 <= 25:  # rocketlauncher
                     type = "rocketlauncher"
                 elif p2 <= 35:  # shotgun
                     type = "shotgun"
                 else:  # rest (pistol, rifle)
-                    type = random.choice(["pistol", "pistol_silenced", "rifle"])
+                    type = rng.loot.choice(["pistol", "pistol_silenced", "rifle"])
                 size = CFG.am.get(f"items/guns/{type}").size
                 item = Gun(FRect(self.x, self.y, *size), f"items/guns/{type}")
 
             elif p <= 100:  # heal
-                if random.randint(0, 100) <= 50:
+                if rng.loot.randint(0, 100) <= 50:
                     continue
                 size = CFG.am.get(f"items/medkit").size
                 item = Medkit(FRect(self.x, self.y, *size), HealStats(name="Medkit", type="items/medkit", heal_amount=50, uses=1))
@@ -1412,12 +1420,12 @@ class LootDrop(BaseEntityABC):
         self.planks_to_spawn.add((
             self.frect.center,
             (
-                (random.random() * math.pi * 16 - 8*math.pi) * (random.random() * 2),
-                (random.random() * math.pi * 16 - 8*math.pi) * (random.random() * 2)
+                (rng.weapons.random() * math.pi * 16 - 8*math.pi) * (rng.weapons.random() * 2),
+                (rng.weapons.random() * math.pi * 16 - 8*math.pi) * (rng.weapons.random() * 2)
                 # direction[0] * 14,
                 # direction[1] * 14,
             ),
-            random.randint(0, 2)  # welcher typ von plank
+            rng.weapons.randint(0, 2)  # welcher typ von plank
         ))
 
     def update(self, dt):
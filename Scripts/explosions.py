@@ -0,0 +1,107 @@
+from typing import NamedTuple
+
+import numpy as np
+
+from Scripts.tilemap import EntityMap
+
+
+DAMAGE_FACTOR = 3.5  # Schaden = radius / (entfernung + 1) * radius * DAMAGE_FACTOR
+MAX_CHAIN_DEPTH = 16  # so viele Wellen Kettenreaktion pro Frame, danach wird abgebrochen
+
+
+class Explosion(NamedTuple):
+    pos: tuple[float, float]
+    radius: float
+    source: object = None  # Entity, die explodiert ist (bekommt keinen Schaden von der eigenen Explosion)
+    depth: int = 0  # 0 = direkt ausgelöst, > 0 = von einer anderen Explosion in Gang gesetzt
+
+
+class DamageEvent(NamedTuple):
+    target: object
+    amount: float
+    direction: tuple[float, float]  # von der Explosion zum Ziel (wie vorher vector2d_sub(pos, ziel))
+    explosion: Explosion
+    killed: bool
+
+
+class ExplosionSystem:
+    """
+    Collects the explosions of a frame and resolves them together in `resolve`.
+
+    Every wave gathers the candidates of all its explosions from the `EntityMap` cells under the
+    circles' bounding boxes, then distance and falloff for all (explosion, candidate) pairs are computed
+    as one numpy array. Each hit is applied with `damage` and recorded as a `DamageEvent`.
+    Hit targets that have a `detonate()` method (suicide zombies) and are dead go off in the next wave,
+    so a whole cluster chains in the same frame.
+    """
+
+    def __init__(self, entitymap: EntityMap, damage_factor=DAMAGE_FACTOR, max_chain_depth=MAX_CHAIN_DEPTH) -> None:
+        self.entitymap = entitymap
+        self.damage_factor = damage_factor
+        self.max_chain_depth = max_chain_depth
+
+        self.pending: list[Explosion] = []
+        self.events: list[DamageEvent] = []  # vom letzten resolve
+
+        self.stats = {"explosions": 0, "chained": 0, "candidates": 0, "hits": 0, "waves": 0}
+
+    def add(self, pos: tuple[float, float], radius: float, source=None) -> None:
+        self.pending.append(Explosion(pos, radius, source))
+
+    def resolve(self) -> list[Explosion]:
+        """Applies the damage of all added explosions. Returns every explosion that went off, chained ones included."""
+        for k in self.stats:
+            self.stats[k] = 0
+        self.events = []
+        done: list[Explosion] = []
+
+        wave = self.pending
+        self.pending = []
+        while wave:
+            done.extend(wave)
+            self.stats["waves"] += 1
+            wave = self._resolve_wave(wave)
+
+        self.stats["explosions"] = len(done)
+        return done
+
+    def _resolve_wave(self, wave: list[Explosion]) -> list[Explosion]:
+        candidates = []
+        seen = set()
+        for explosion in wave:
+            for ent in self.entitymap.entities_near(explosion.pos, explosion.radius):
+                if ent.damageable and id(ent) not in seen:
+                    seen.add(id(ent))
+                    candidates.append(ent)
+        self.stats["candidates"] += len(candidates)
+        if not candidates:
+            return []
+
+        centers = np.array([explosion.pos for explosion in wave], dtype=float)  # (N, 2)
+        radii = np.array([explosion.radius for explosion in wave], dtype=float)[:, None]  # (N, 1)
+        targets = np.array([ent.frect.center for ent in candidates], dtype=float)  # (M, 2)
+
+        direction = centers[:, None, :] - targets[None, :, :]  # (N, M, 2)
+        d = np.hypot(direction[..., 0], direction[..., 1])
+        hit = d < radii
+        for i, explosion in enumerate(wave):
+            if explosion.source is not None and id(explosion.source) in seen:
+                hit[i, candidates.index(explosion.source)] = False
+        amount = radii / (d + 1) * radii * self.damage_factor
+
+        chained = []
+        for i, j in zip(*np.nonzero(hit)):
+            explosion, target = wave[i], candidates[j]
+            dmg, dmg_dir = float(amount[i, j]), (float(direction[i, j, 0]), float(direction[i, j, 1]))
+            was_dead = getattr(target, "dead", False)
+            target.damage(dmg, dmg_dir)
+            killed = not was_dead and getattr(target, "dead", False)
+            self.events.append(DamageEvent(target, dmg, dmg_dir, explosion, killed))
+            self.stats["hits"] += 1
+
+            # auch schon vorher tote (Weste tickt noch) gehen sofort mit hoch
+            if getattr(target, "dead", False) and explosion.depth < self.max_chain_depth and hasattr(target, "detonate"):
+                if (radius := target.detonate()):
+                    chained.append(Explosion(target.center, radius, target, explosion.depth + 1))
+        self.stats["chained"] += len(chained)
+        return chained
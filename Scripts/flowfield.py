@@ -0,0 +1,237 @@
+import collections
+import math
+import threading
+import time
+
+import numpy as np
+
+import Scripts.CONFIG as CFG
+from Scripts.tilemap import TileMap
+
+
+# (dx, dy). Diagonalen sind nur erlaubt, wenn beide Nachbarn frei sind (kein corner cutting).
+STRAIGHT_OFFSETS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+DIAGONAL_OFFSETS = ((1, 1), (-1, 1), (1, -1), (-1, -1))
+UNREACHABLE = np.inf
+
+
+class FlowField:
+    """
+    One BFS from the player's tile over the solidity grid of the `TileMap`.
+    Every cell stores a unit vector pointing along the shortest path to the player,
+    so every zombie can look up its steering direction in O(1) with `sample`.
+
+    The field is only rebuilt when the player changes tiles or the tiles change (`refresh_grid`,
+    called by `TileMap.tiles_changed`). With `threaded=True` the rebuild runs on a worker thread
+    and the finished field is swapped in atomically; until then zombies keep sampling the previous field.
+    """
+
+    def __init__(self, tilemap: TileMap, layer=0, threaded=False) -> None:
+        self.tilemap = tilemap
+        self.layer = layer
+        self.threaded = threaded
+
+        # (origin, grid) und (target_tile, origin, distances, directions) werden jeweils als ganzes Tupel ausgetauscht
+        # -> kein halb fertiges Feld beim sample, und jedes Feld wird mit dem origin gelesen, mit dem es gebaut wurde.
+        self._solidity: tuple[tuple[int, int], np.ndarray] = tilemap.get_solidity_grid(layer)
+        self._field: tuple[tuple[int, int], tuple[int, int], np.ndarray, np.ndarray] | None = None
+        self._requested_target: tuple[int, int] | None = None
+        self._pending: tuple[int, int] | None = None
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker: threading.Thread | None = None
+        self._running = False
+
+        self.stats = {
+            "builds": 0,
+            "skipped": 0,  # Anfragen, die von einer neueren ueberholt wurden, bevor der Worker dran war
+            "last_build_ms": 0.0,
+            "avg_build_ms": 0.0,
+            "max_build_ms": 0.0,
+            "reachable_cells": 0,
+        }
+
+        if self.threaded:
+            self._running = True
+            self._worker = threading.Thread(target=self._work, name="FlowField", daemon=True)
+            self._worker.start()
+        tilemap.on_tiles_changed.append(self.refresh_grid)
+
+    # region public
+    @property
+    def origin(self) -> tuple[int, int]: return self._solidity[0]
+    @property
+    def grid(self) -> np.ndarray: return self._solidity[1]
+
+    @property
+    def target_tile(self) -> tuple[int, int] | None:
+        field = self._field
+        return field[0] if field else None
+
+    def update(self, target_pos: tuple[float, float]) -> None:
+        """Call once per frame with the player's (world) position. Rebuilds only on a tile change."""
+        target_tile = world_to_tile(target_pos)
+        if target_tile == self._requested_target:
+            return
+        self._requested_target = target_tile
+
+        if self.threaded:
+            with self._lock:
+                if self._pending is not None:  # alte Anfrage wurde noch nicht gebaut und wird jetzt verworfen
+                    self.stats["skipped"] += 1
+                self._pending = target_tile
+            self._wakeup.set()
+        else:
+            self._build(target_tile)
+
+    def sample(self, pos: tuple[float, float]) -> tuple[float, float] | None:
+        """
+        Unit vector towards the target for the world position `pos`.
+        Returns None if there is no field yet, pos is outside of the grid / unreachable, or pos is on the target tile.
+        """
+        field = self._field
+        if not field:
+            return None
+        target, origin, _, directions = field
+        tx, ty = world_to_tile(pos)
+        if (tx, ty) == target:
+            return None
+        gx, gy = tx - origin[0], ty - origin[1]
+        if not (0 <= gy < directions.shape[0] and 0 <= gx < directions.shape[1]):
+            return None
+        d = directions[gy, gx]
+        if not (d[0] or d[1]):
+            return None
+        return (float(d[0]), float(d[1]))
+
+    def distance(self, pos: tuple[float, float]) -> float:
+        """Path length in tiles from `pos` to the target. `math.inf` if unknown/unreachable."""
+        field = self._field
+        if not field:
+            return math.inf
+        _, origin, distances, _ = field
+        tx, ty = world_to_tile(pos)
+        gx, gy = tx - origin[0], ty - origin[1]
+        if not (0 <= gy < distances.shape[0] and 0 <= gx < distances.shape[1]):
+            return math.inf
+        return float(distances[gy, gx])
+
+    def refresh_grid(self) -> None:
+        """Re-read the solidity grid (after the tilemap changed) and rebuild for the current target."""
+        self._solidity = self.tilemap.get_solidity_grid(self.layer)
+        target = self._requested_target
+        self._requested_target = None
+        if target is not None:
+            self.update((target[0] * CFG.TILESIZE, target[1] * CFG.TILESIZE))
+
+    def stop(self) -> None:
+        self._running = False
+        self._wakeup.set()
+        if self._worker:
+            self._worker.join(timeout=1.0)
+            self._worker = None
+    # endregion
+
+    def _work(self) -> None:
+        while self._running:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._lock:
+                target = self._pending
+                self._pending = None
+            if target is not None and self._running:
+                self._build(target)
+
+    def _build(self, target_tile: tuple[int, int]) -> None:
+        t = time.perf_counter()
+        origin, grid = self._solidity  # einmal lesen, der Main Thread kann es beim refresh_grid austauschen
+        distances = bfs_distances(grid, (target_tile[0] - origin[0], target_tile[1] - origin[1]))
+        directions = directions_from_distances(grid, distances)
+        self._field = (target_tile, origin, distances, directions)
+
+        build_ms = (time.perf_counter() - t) * 1000
+        s = self.stats
+        s["builds"] += 1
+        s["last_build_ms"] = build_ms
+        s["avg_build_ms"] += (build_ms - s["avg_build_ms"]) / s["builds"]
+        s["max_build_ms"] = max(s["max_build_ms"], build_ms)
+        s["reachable_cells"] = int(np.count_nonzero(np.isfinite(distances)))
+
+
+def world_to_tile(pos: tuple[float, float]) -> tuple[int, int]:
+    return (int(pos[0] // CFG.TILESIZE), int(pos[1] // CFG.TILESIZE))
+
+
+def bfs_distances(grid: np.ndarray, start: tuple[int, int]) -> np.ndarray:
+    """
+    4-neighbour BFS over `grid` (True = blocked) starting at `start` (x, y in grid space).
+    Returns a float array with the step count per cell, `inf` for unreachable ones.
+    """
+    h, w = grid.shape
+    distances = np.full(grid.shape, UNREACHABLE)
+    sx, sy = start
+    if not (0 <= sx < w and 0 <= sy < h):
+        return distances
+
+    # BFS auf flachen Listen ist deutlich schneller, als auf dem numpy Array einzeln zu indexieren.
+    blocked = grid.ravel().tolist()
+    dist = [-1] * (w * h)
+    start_idx = sy * w + sx
+    dist[start_idx] = 0
+    # Steht der Spieler (durch noclip o.ä.) in einer Wand, trotzdem von dort aus suchen.
+    queue = collections.deque((start_idx,))
+    while queue:
+        idx = queue.popleft()
+        d = dist[idx] + 1
+        x = idx % w
+        if x > 0 and dist[idx - 1] < 0 and not blocked[idx - 1]:
+            dist[idx - 1] = d
+            queue.append(idx - 1)
+        if x < w - 1 and dist[idx + 1] < 0 and not blocked[idx + 1]:
+            dist[idx + 1] = d
+            queue.append(idx + 1)
+        if idx >= w and dist[idx - w] < 0 and not blocked[idx - w]:
+            dist[idx - w] = d
+            queue.append(idx - w)
+        if idx < (h - 1) * w and dist[idx + w] < 0 and not blocked[idx + w]:
+            dist[idx + w] = d
+            queue.append(idx + w)
+
+    dist_arr = np.array(dist, dtype=float).reshape(grid.shape)
+    distances[dist_arr >= 0] = dist_arr[dist_arr >= 0]
+    return distances
+
+
+def directions_from_distances(grid: np.ndarray, distances: np.ndarray) -> np.ndarray:
+    """
+    For every cell pick the neighbour (8-neighbourhood, no corner cutting) with the lowest distance
+    and store the normalized direction to it. Vectorized over the whole grid.
+    """
+    h, w = grid.shape
+    padded = np.pad(distances, 1, constant_values=UNREACHABLE)
+    padded_free = np.pad(~grid, 1, constant_values=False)
+
+    offsets = STRAIGHT_OFFSETS + DIAGONAL_OFFSETS
+    candidates = np.empty((len(offsets), h, w))
+    for i, (dx, dy) in enumerate(offsets):
+        c = padded[1 + dy:1 + dy + h, 1 + dx:1 + dx + w].copy()
+        if dx and dy:
+            # diagonal nur, wenn beide geraden Nachbarn frei sind
+            free_x = padded_free[1:1 + h, 1 + dx:1 + dx + w]
+            free_y = padded_free[1 + dy:1 + dy + h, 1:1 + w]
+            c[~(free_x & free_y)] = UNREACHABLE
+            c += math.sqrt(2) - 1  # Diagonalen sind etwas teurer, sonst laufen Zombies Zickzack
+        candidates[i] = c
+
+    best = np.argmin(candidates, axis=0)
+    best_dist = np.take_along_axis(candidates, best[None], axis=0)[0]
+
+    vecs = np.array(offsets, dtype=float)
+    vecs /= np.linalg.norm(vecs, axis=1)[:, None]
+    directions = vecs[best]
+
+    # Nur Zellen, die erreichbar sind und einen besseren Nachbarn haben bekommen eine Richtung.
+    valid = np.isfinite(distances) & (best_dist < distances)
+    directions[~valid] = 0.0
+    return directions
@@ -0,0 +1,103 @@
+from typing import Iterable
+
+import numpy as np
+
+import Scripts.CONFIG as CFG
+from Scripts.tilemap import TileMap
+
+
+class LineOfSight:
+    """
+    Visibility checks over the solidity grid of the `TileMap`.
+
+    Rays go from the center of the source cell to the center of the target cell, so the result
+    only depends on the two cells and is cached per (source cell, target cell) for the frame.
+    All queries known up front (`prefetch`) are traversed together with a vectorized DDA, one
+    numpy step per crossed cell for all rays at once. `visible` answers from the cache or
+    traverses a single ray if nobody asked before.
+    Start and end cell don't block, cells outside of the grid do.
+    """
+
+    def __init__(self, tilemap: TileMap, layer=0) -> None:
+        self.tilemap = tilemap
+        self.layer = layer
+
+        self.origin, self.grid = tilemap.get_solidity_grid(layer)
+        self._cache: dict[tuple[tuple[int, int], tuple[int, int]], bool] = {}
+
+        self.stats = {"queries": 0, "hits": 0, "rays": 0, "batches": 0}
+
+    def new_frame(self) -> None:
+        """Call once per frame. Drops the cache and picks up tile changes."""
+        self._cache.clear()
+        # get_solidity_grid ist in der TileMap gecached und wird bei tiles_changed neu gebaut
+        self.origin, self.grid = self.tilemap.get_solidity_grid(self.layer)
+        for k in self.stats:
+            self.stats[k] = 0
+
+    def visible(self, a: tuple[float, float], b: tuple[float, float]) -> bool:
+        self.stats["queries"] += 1
+        key = (world_to_cell(a), world_to_cell(b))
+        if (ret := self._cache.get(key)) is not None:
+            self.stats["hits"] += 1
+            return ret
+        self._traverse([key])
+        return self._cache[key]
+
+    def prefetch(self, pairs: Iterable[tuple[tuple[float, float], tuple[float, float]]]) -> None:
+        """Resolve all `(a, b)` pairs in one batch, so the following `visible` calls are cache hits."""
+        keys = {(world_to_cell(a), world_to_cell(b)) for a, b in pairs}
+        keys = [key for key in keys if key not in self._cache]
+        if keys:
+            self._traverse(keys)
+
+    def _traverse(self, keys: list[tuple[tuple[int, int], tuple[int, int]]]) -> None:
+        self.stats["rays"] += len(keys)
+        self.stats["batches"] += 1
+
+        cells = np.array(keys, dtype=np.int64).reshape(-1, 4)  # sx, sy, ex, ey
+        cells[:, 0::2] -= self.origin[0]
+        cells[:, 1::2] -= self.origin[1]
+        x, y = cells[:, 0].copy(), cells[:, 1].copy()
+        ex, ey = cells[:, 2], cells[:, 3]
+
+        # DDA (Amanatides & Woo) von Zellmitte zu Zellmitte
+        dx = (ex - x).astype(float)
+        dy = (ey - y).astype(float)
+        step_x = np.sign(dx).astype(np.int64)
+        step_y = np.sign(dy).astype(np.int64)
+        with np.errstate(divide="ignore"):
+            t_delta_x = np.where(dx != 0, 1.0 / np.abs(dx), np.inf)
+            t_delta_y = np.where(dy != 0, 1.0 / np.abs(dy), np.inf)
+        # von der Zellmitte aus ist die erste Grenze eine halbe Zelle entfernt
+        t_max_x = t_delta_x * 0.5
+        t_max_y = t_delta_y * 0.5
+
+        h, w = self.grid.shape
+        visible = np.ones(len(keys), dtype=bool)
+        active = (x != ex) | (y != ey)
+        # jeder Schritt geht genau eine Zelle weiter, mehr als |dx| + |dy| Schritte braucht kein Strahl
+        for _ in range(int(np.abs(dx).max() + np.abs(dy).max()) if len(keys) else 0):
+            if not active.any():
+                break
+            go_x = active & (t_max_x < t_max_y)
+            go_y = active & ~go_x
+            x += np.where(go_x, step_x, 0)
+            t_max_x += np.where(go_x, t_delta_x, 0.0)
+            y += np.where(go_y, step_y, 0)
+            t_max_y += np.where(go_y, t_delta_y, 0.0)
+
+            arrived = (x == ex) & (y == ey)
+            inside = (x >= 0) & (x < w) & (y >= 0) & (y < h)
+            blocked = ~inside
+            blocked[inside] = self.grid[y[inside], x[inside]]
+            hit = active & ~arrived & blocked
+            visible[hit] = False
+            active &= ~(arrived | hit)
+
+        for key, v in zip(keys, visible.tolist()):
+            self._cache[key] = v
+
+
+def world_to_cell(pos: tuple[float, float]) -> tuple[int, int]:
+    return (int(pos[0] // CFG.TILESIZE), int(pos[1] // CFG.TILESIZE))
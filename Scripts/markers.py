@@ -0,0 +1,183 @@
+import glob
+import json
+import os
+import time
+
+import numpy as np
+import pygame
+from pygame import Surface
+
+import Scripts.CONFIG as CFG
+from Scripts.utils import load_image, load_images
+
+
+# Farben der Markierungspixel in den "<item>_lt" Bildern
+ITEM_ANCHOR_COLORS: dict[str, tuple[int, int, int]] = {
+    "handle": (255, 0, 0),
+    "handle2": (0, 255, 0),
+    "barrel": (0, 0, 255),
+    "bulletcasing": (255, 255, 0),
+}
+ITEM_MARKER_IMAGES = "assets/items/**/*_lt.png"
+HEAD_OFFSET_CONFIGS = "assets/entities/**/head_offsets/config.json"
+# wird nicht eingecheckt, sondern beim Start (oder mit `python -m Scripts.markers`) aus den Bildern gebaut
+MARKERS_PATH = "assets/markers.json"
+MARKERS_VERSION = 1
+
+# item type -> {"handle": (x, y), ..., "handle_flipped": (x, y), ...}, None wenn die Farbe fehlt
+item_anchors: dict[str, dict[str, tuple[int, int] | None]] = {}
+# head_offsets config path -> {animation state: [(x, y) pro frame]}
+head_offsets: dict[str, dict[str, list[tuple[int, int] | None]]] = {}
+
+
+def find_first_pixels(surf: Surface, colors: list[tuple]) -> list[tuple[int, int] | None]:
+    """
+    Vectorized `find_first_occurance_of_pixel_with_color_X` for several colors at once.
+    Same order as the old scan (x outer, y inner), i.e. the smallest x and then the smallest y wins.
+    """
+    return [_first_in_mask(mask) for mask in _color_masks(surf, colors)]
+
+
+def find_first_pixel(surf: Surface, color: tuple) -> tuple[int, int] | None:
+    return find_first_pixels(surf, [color])[0]
+
+
+def get_item_anchors(item_type: str) -> dict[str, tuple[int, int] | None]:
+    """Anchor points of the `<item_type>_lt` image (plain and vertically flipped). Computed once per type."""
+    if item_type not in item_anchors:
+        item_anchors[item_type] = compute_item_anchors(CFG.am.get(f"{item_type}_lt"))
+    return item_anchors[item_type]
+
+
+def compute_item_anchors(surf: Surface) -> dict[str, tuple[int, int] | None]:
+    anchors = {}
+    masks = _color_masks(surf, list(ITEM_ANCHOR_COLORS.values()))
+    for name, mask in zip(ITEM_ANCHOR_COLORS, masks):
+        anchors[name] = _first_in_mask(mask)
+        # entspricht der Suche auf pygame.transform.flip(surf, False, True)
+        anchors[f"{name}_flipped"] = _first_in_mask(mask[:, ::-1])
+    return anchors
+
+
+def get_head_offsets(config_path: str) -> dict[str, list[tuple[int, int] | None]]:
+    """Head position per animation frame. Only parses the images if `load_markers` didn't provide them."""
+    config_path = _normpath(config_path)
+    if config_path not in head_offsets:
+        head_offsets[config_path] = compute_head_offsets(config_path)
+    return head_offsets[config_path]
+
+
+def compute_head_offsets(config_path: str) -> dict[str, list[tuple[int, int] | None]]:
+    offsets = {}
+    with open(config_path, "r") as f:
+        data = json.load(f)
+    colorkey = data["colorkey"]
+    default_path = data["file_path"]
+    for animation_state, state_data in data["animations"].items():
+        state_offsets = [(0, 0)] * state_data["len"]
+        imgs = load_images(f"{default_path}/{animation_state}", colorkey=colorkey)
+        for i, img in enumerate(imgs):
+            state_offsets[i] = find_first_pixel(img, state_data["pixel_color"])
+        offsets[animation_state] = state_offsets
+    return offsets
+
+
+# region compiled marker file
+def marker_sources() -> tuple[list[str], list[str]]:
+    """(head offset configs, item marker images) that end up in the compiled file."""
+    head_configs = sorted(_normpath(p) for p in glob.glob(HEAD_OFFSET_CONFIGS, recursive=True))
+    item_images = sorted(_normpath(p) for p in glob.glob(ITEM_MARKER_IMAGES, recursive=True))
+    return head_configs, item_images
+
+
+def newest_source_mtime(head_configs: list[str], item_images: list[str]) -> float:
+    paths = list(item_images)
+    for config_path in head_configs:
+        paths.append(config_path)
+        with open(config_path, "r") as f:
+            data = json.load(f)
+        for animation_state in data["animations"]:
+            paths.extend(glob.glob(f"{data['file_path']}/{animation_state}/*.png"))
+    return max((os.path.getmtime(p) for p in paths), default=0.0)
+
+
+def compile_markers(path: str = MARKERS_PATH) -> dict:
+    """Build step: scans every head offset config and item marker image and writes one compact file."""
+    head_configs, item_images = marker_sources()
+    data = {
+        "version": MARKERS_VERSION,
+        "heads": {config_path: compute_head_offsets(config_path) for config_path in head_configs},
+        # "assets/items/guns/pistol_lt.png" -> "items/guns/pistol"
+        "items": {p[len("assets/"):-len("_lt.png")]: compute_item_anchors(load_image(p)) for p in item_images},
+    }
+    try:
+        with open(path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+    except OSError as e:  # z.B. read-only Installation, dann eben nur im Speicher
+        print(f"could not write {path}: {e}")
+    return data
+
+
+def load_markers(path: str = MARKERS_PATH) -> bool:
+    """
+    Fills `head_offsets` and `item_anchors` with one read of the compiled file.
+    Rebuilds the file first if it is missing, from an older version or older than any of its sources.
+    Returns True if it had to rebuild. Needs a display (the images are converted).
+    """
+    t = time.perf_counter()
+    rebuilt = False
+    data = None
+    if os.path.exists(path) and os.path.getmtime(path) >= newest_source_mtime(*marker_sources()):
+        with open(path, "r") as f:
+            data = json.load(f)
+        if data.get("version") != MARKERS_VERSION:
+            data = None
+    if data is None:
+        data = compile_markers(path)
+        rebuilt = True
+
+    for config_path, states in data["heads"].items():
+        head_offsets[config_path] = {state: [tuple(p) if p else None for p in frames] for state, frames in states.items()}
+    for item_type, anchors in data["items"].items():
+        item_anchors[item_type] = {name: tuple(p) if p else None for name, p in anchors.items()}
+
+    print(f"markers {'compiled' if rebuilt else 'loaded'} in {(time.perf_counter() - t) * 1000:.1f}ms")
+    return rebuilt
+# endregion
+
+
+def _color_masks(surf: Surface, colors: list[tuple]) -> list[np.ndarray]:
+    rgb = pygame.surfarray.array3d(surf)  # [x, y, c]
+    if surf.get_flags() & pygame.SRCALPHA:
+        # get_at vergleicht auch alpha, die gesuchten Farben sind voll deckend
+        opaque = pygame.surfarray.array_alpha(surf) == 255
+    else:
+        opaque = None
+    masks = []
+    for color in colors:
+        mask = np.all(rgb == np.array(color[:3], dtype=rgb.dtype), axis=2)
+        if opaque is not None:
+            mask &= opaque
+        masks.append(mask)
+    return masks
+
+
+def _normpath(path: str) -> str:
+    return path.replace("\\", "/")
+
+
+def _first_in_mask(mask: np.ndarray) -> tuple[int, int] | None:
+    # mask ist [x, y], argwhere liefert in C-Order, also x außen, y innen
+    hits = np.argwhere(mask)
+    if not len(hits):
+        return None
+    return (int(hits[0][0]), int(hits[0][1]))
+
+
+if __name__ == "__main__":
+    # python -m Scripts.markers
+    pygame.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    t = time.perf_counter()
+    data = compile_markers()
+    print(f"wrote {MARKERS_PATH}: {len(data['heads'])} head configs, {len(data['items'])} items in {(time.perf_counter() - t) * 1000:.1f}ms")
@@ -3,19 +3,25 @@ import pygame
 from typing import Callable, Hashable, Sequence, Iterable, Optional
 
 import Scripts.CONFIG as CFG
+from Scripts.cache import LRUCache
+
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from Scripts.pool import ObjectPool
 
 
 class ImageCache:
-    def __init__(self, make_image_func: Callable[[Hashable], pygame.Surface]):
-        self.cache: dict[Hashable, pygame.Surface] = {}
-        self.misses = 0
+    def __init__(self, make_image_func: Callable[[Hashable], pygame.Surface], name="particle images", max_bytes: int = None):
+        self.cache = LRUCache(max_bytes, name)
         self.make_image = make_image_func
 
+    @property
+    def misses(self) -> int: return self.cache.stats["misses"]
+
     def get_image(self, item: Hashable) -> pygame.Surface:
-        if item not in self.cache:
-            self.misses += 1
-            self.cache[item] = self.make_image(item)
-        return self.cache[item]
+        if (image := self.cache.get(item)) is None:
+            image = self.cache.put(item, self.make_image(item))
+        return image
 
 
 class Particle:
@@ -29,11 +35,15 @@ class Particle:
     def cache_lookup(self) -> Hashable:
         raise NotImplementedError
 
+    def image(self) -> pygame.Surface:
+        return CFG.am.get(self.cache_lookup())
+
 
 class ParticleGroup:
-    def __init__(self, blend: int = pygame.BLENDMODE_NONE, particles: Optional[list[Particle]] = None):
+    def __init__(self, blend: int = pygame.BLENDMODE_NONE, particles: Optional[list[Particle]] = None, pool: "ObjectPool" = None):
         self.particles: list[Particle] = particles if particles is not None else []
         self.blend = blend
+        self.pool = pool  # tote Partikel gehen dahin zurück
 
     def __len__(self):
         return len(self.particles)
@@ -48,11 +58,14 @@ class ParticleGroup:
             self.particles.extend(particles)
 
     def update(self, dt: float, *args, **kwargs):
-        self.particles = [p for p in self.particles if p.update(dt, *args, **kwargs)]
+        if self.pool:
+            self.particles = self.pool.keep_alive(self.particles, lambda p: p.update(dt, *args, **kwargs))
+        else:
+            self.particles = [p for p in self.particles if p.update(dt, *args, **kwargs)]
 
     def _get_render_tuple(self, p: Particle, offset=(0, 0)) -> tuple[pygame.Surface, Sequence[float]]:
         pos = p.draw_pos()
-        return (CFG.am.get(p.cache_lookup()), (pos[0]-offset[0], pos[1]-offset[1]))
+        return (p.image(), (pos[0]-offset[0], pos[1]-offset[1]))
 
     def render(self, screen: pygame.Surface, offset=(0, 0), blend: int = pygame.BLENDMODE_NONE):
         screen.fblits([self._get_render_tuple(p, offset) for p in self.particles], blend if blend else self.blend)
@@ -65,7 +78,8 @@ class AnimationParticle(Particle):
         self.animation_state = state
         self.pos = pos
         self.vel = vel
-        self.max_frames = CFG.am.get_animation_number_of_frames(f"particles-{self.base_type}", self.animation_state) - 1
+        self.clip = CFG.am.get_clip(f"particles-{self.base_type}", self.animation_state)
+        self.max_frames = self.clip.n_frames - 1
         self.animation_frame = 0
         self.animation_frame_timer = 0.0
 
@@ -76,19 +90,12 @@ class AnimationParticle(Particle):
         return True
 
     def draw_pos(self) -> Sequence[float]: return self.pos
-    def cache_lookup(self) -> str: return self.type
+    def cache_lookup(self) -> str: return f"ANIMATIONS/particles-{self.base_type}/{self.animation_state}/{self.animation_frame}"
+    def image(self) -> pygame.Surface: return self.clip.frames[self.animation_frame]
 
     def update_animation_state(self, dt: float) -> bool:
         # returnt True sobald Animation fertig ist.
-        end = False
-        self.animation_frame_timer += dt
-        if self.animation_frame_timer >= CFG.am.get_animation_frame_data(f"particles-{self.base_type}", self.animation_state)[self.animation_frame]:
-            self.animation_frame += 1
-            if self.animation_frame > self.max_frames:
-                end = True
-            self.animation_frame = min(self.animation_frame, self.max_frames)
-            self.animation_frame_timer = 0.0
-        self.type = f"ANIMATIONS/particles-{self.base_type}/{self.animation_state}/{int(self.animation_frame)}"
+        self.animation_frame, self.animation_frame_timer, end = self.clip.advance(self.animation_frame, self.animation_frame_timer, dt)
         return end
 
 
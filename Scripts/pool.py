@@ -0,0 +1,73 @@
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class ObjectPool(Generic[T]):
+    """
+    Keeps released objects around and hands them out again instead of allocating new ones.
+
+    `acquire(*args, **kwargs)` either creates `factory(*args, **kwargs)` or takes a free object and calls
+    `reset(obj, *args, **kwargs)` on it. By default reset re-runs the class' `__init__`, so pooled classes
+    don't need extra code. `on_release(obj)` runs when an object comes back (e.g. to drop references).
+    At most `max_free` objects are kept, the rest is left to the GC.
+    Releasing an object twice, or using it after release, is a bug of the caller.
+    """
+
+    def __init__(self, factory: Callable[..., T], reset: Callable[..., None] = None, on_release: Callable[[T], None] = None, max_free=1024, name="") -> None:
+        self.factory = factory
+        self.reset = reset if reset else _reinit
+        self.on_release = on_release
+        self.max_free = max_free
+        self.name = name or getattr(factory, "__name__", "pool")
+
+        self.free: list[T] = []
+        self.in_use = 0
+
+        self.stats = {"created": 0, "reused": 0, "released": 0, "dropped": 0, "high_water": 0}
+
+    def acquire(self, *args, **kwargs) -> T:
+        if self.free:
+            obj = self.free.pop()
+            self.reset(obj, *args, **kwargs)
+            self.stats["reused"] += 1
+        else:
+            obj = self.factory(*args, **kwargs)
+            self.stats["created"] += 1
+        self.in_use += 1
+        if self.in_use > self.stats["high_water"]:
+            self.stats["high_water"] = self.in_use
+        return obj
+
+    def release(self, obj: T) -> None:
+        self.in_use -= 1
+        self.stats["released"] += 1
+        if self.on_release:
+            self.on_release(obj)
+        if len(self.free) < self.max_free:
+            self.free.append(obj)
+        else:
+            self.stats["dropped"] += 1
+
+    def release_all(self, objs) -> None:
+        for obj in objs:
+            self.release(obj)
+
+    def keep_alive(self, objs: list[T], alive: Callable[[T], bool]) -> list[T]:
+        """`[o for o in objs if alive(o)]`, but the dead ones are released into the pool."""
+        kept = []
+        for obj in objs:
+            if alive(obj):
+                kept.append(obj)
+            else:
+                self.release(obj)
+        return kept
+
+    def clear(self) -> None:
+        self.free.clear()
+
+    def __repr__(self) -> str: return f"ObjectPool({self.name}, in_use={self.in_use}, free={len(self.free)}, {self.stats})"
+
+
+def _reinit(obj, *args, **kwargs) -> None:
+    type(obj).__init__(obj, *args, **kwargs)
@@ -0,0 +1,147 @@
+import fnmatch
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Iterable
+
+import pygame
+
+if TYPE_CHECKING:
+    from Scripts.CONFIG import AssetManager
+
+
+# Assets, die gedreht gezeichnet werden (Waffen, Items am Boden, Projektil, Köpfe). Marker Bilder (_lt) nicht.
+ROTATABLE_ASSETS = ("items/*", "*_head")
+NOT_ROTATABLE_ASSETS = ("*_lt",)
+CHUNK_SIZE = 8  # so viele Surfaces am Stück, dann darf der Main Thread wieder
+
+
+class RotationPrebaker:
+    """
+    Bakes every rotation bucket (`AssetManager.roation_steps`) x flip_x of the rotatable assets in a worker thread.
+
+    The worker only reads the source surfaces and builds new ones. pygame's transforms do the heavy part
+    in C, and the worker yields after every `CHUNK_SIZE` surfaces, so the main thread keeps running.
+    A finished asset is handed over as one dict and put into the `AssetManager` cache by `publish` on the
+    main thread, so the cache (not thread safe) is only touched there and an asset appears with all its
+    variants at once. Until then `AssetManager.get` keeps rotating on demand.
+    """
+
+    def __init__(self, asset_manager: "AssetManager", threaded=True) -> None:
+        self.am = asset_manager
+        self.threaded = threaded
+
+        self.requested: set[str] = set()
+        self.generation = 0  # + 1 bei neuen Assets, ältere Ergebnisse werden verworfen
+        self._todo: queue.SimpleQueue[tuple[int, str] | None] = queue.SimpleQueue()
+        self._done: queue.SimpleQueue[tuple[int, str, dict]] = queue.SimpleQueue()
+        self._worker: threading.Thread | None = None
+
+        self.stats = {"requested": 0, "baked_assets": 0, "baked_surfaces": 0, "published": 0, "bake_ms": 0.0}
+
+    def angles(self) -> list[float]:
+        return rotation_buckets(self.am.roation_steps)
+
+    def is_rotatable(self, img_type: str) -> bool:
+        return is_rotatable(img_type)
+
+    def rotatable_ids(self) -> list[str]:
+        return [img_type for img_type in asset_ids(self.am.assets) if is_rotatable(img_type)]
+
+    def request(self, img_types: Iterable[str]) -> None:
+        for img_type in img_types:
+            if img_type in self.requested:
+                continue
+            self.requested.add(img_type)
+            self.stats["requested"] += 1
+            if self.threaded:
+                self._start_worker()
+                self._todo.put((self.generation, img_type))
+            else:
+                self._done.put((self.generation, img_type, self._bake(img_type)))
+
+    def publish(self) -> int:
+        """Main thread: moves every finished asset into the cache. Returns how many were published."""
+        n = 0
+        while True:
+            try:
+                generation, img_type, variants = self._done.get_nowait()
+            except queue.Empty:
+                return n
+            if generation != self.generation:
+                continue
+            src = self.am.resolve(img_type, load_lazy=False)
+            for key, surf in variants.items():
+                # unverändert (0°, nicht gespiegelt) -> kein eigener Speicher, wie in AssetManager._make_variant
+                self.am.cache.put(key, surf, 0 if surf is src else None)
+            self.stats["published"] += 1
+            n += 1
+
+    def pending(self) -> int:
+        return self.stats["requested"] - self.stats["published"]
+
+    def reset(self) -> None:
+        """The assets were replaced: everything has to be requested again, queued work is thrown away."""
+        self.generation += 1
+        self.requested.clear()
+        self.stats["requested"] = self.stats["published"] = 0
+
+    def stop(self) -> None:
+        if self._worker:
+            self._todo.put(None)
+            self._worker.join(timeout=1.0)
+            self._worker = None
+
+    def _start_worker(self) -> None:
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._work, name="RotationPrebaker", daemon=True)
+            self._worker.start()
+
+    def _work(self) -> None:
+        while (job := self._todo.get()) is not None:
+            generation, img_type = job
+            if generation == self.generation:
+                self._done.put((generation, img_type, self._bake(img_type)))
+
+    def _bake(self, img_type: str) -> dict:
+        t = time.perf_counter()
+        src = self.am.resolve(img_type, load_lazy=False)  # laden (convert) nur im Main Thread
+        variants = {}
+        if not isinstance(src, pygame.Surface):
+            return variants
+        n = 0
+        for angle in self.angles():
+            do_flip = 90 < angle < 270
+            for flip_x in (False, True):
+                variants[(img_type, angle, do_flip, flip_x, 255)] = self.am._transform(src, angle, do_flip, flip_x, 255, copy=True)
+                n += 1
+                if self.threaded and n % CHUNK_SIZE == 0:
+                    time.sleep(0)
+        self.stats["baked_assets"] += 1
+        self.stats["baked_surfaces"] += n
+        self.stats["bake_ms"] += (time.perf_counter() - t) * 1000
+        return variants
+
+
+def rotation_buckets(step: float) -> list[float]:
+    """Every value `clamp_number_to_range_steps(angle, -90, 270, step)` can produce."""
+    return [k * step for k in range(round(-90 / step), round(270 / step) + 1)]
+
+
+def is_rotatable(img_type: str) -> bool:
+    return any(fnmatch.fnmatchcase(img_type, p) for p in ROTATABLE_ASSETS) and not any(fnmatch.fnmatchcase(img_type, p) for p in NOT_ROTATABLE_ASSETS)
+
+
+def asset_ids(assets: dict, prefix="") -> list[str]:
+    """Every id of a single Surface in the asset tree ("items/guns/pistol", "grass/3", ...)."""
+    ids = []
+    for k, v in assets.items():
+        if k == "ANIMATIONS":
+            continue
+        if isinstance(v, dict):
+            ids.extend(asset_ids(v, f"{prefix}{k}/"))
+        elif isinstance(v, list):
+            ids.extend(f"{prefix}{k}/{i}" for i in range(len(v)))
+        elif isinstance(v, pygame.Surface):
+            ids.append(f"{prefix}{k}")
+    return ids
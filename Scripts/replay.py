@@ -0,0 +1,88 @@
+import gzip
+import struct
+from typing import NamedTuple
+
+
+class InputFrame(NamedTuple):
+    """Everything `Game.step` reads from the input, sampled once per simulation step."""
+    hmove: float
+    vmove: float
+    mouse: tuple[float, float]  # im Screenspace (schon herunterskaliert)
+    fire: bool
+    reload: bool
+    pickup: bool
+    drop: bool
+    inventory_cycle: int
+
+
+MAGIC = b"GGRP"
+VERSION = 1
+# magic, version, seed, sim dt, Anzahl Frames
+HEADER = struct.Struct("<4sHQdI")
+# dt, hmove, vmove, mouse x, mouse y, flags (fire, reload, pickup, drop), inventory_cycle
+FRAME = struct.Struct("<dddddBb")
+_FLAGS = ("fire", "reload", "pickup", "drop")
+
+
+class ReplayError(Exception):
+    pass
+
+
+class InputRecorder:
+    """
+    Collects `(dt, InputFrame)` per simulation step and writes them gzipped with the seed.
+    Together with the seeded rng streams that is enough to play the round again.
+    """
+
+    def __init__(self, seed: int, sim_dt: float) -> None:
+        self.seed = seed
+        self.sim_dt = sim_dt
+        self.frames: list[bytes] = []
+
+    def record(self, dt: float, frame: InputFrame) -> None:
+        flags = 0
+        for i, name in enumerate(_FLAGS):
+            if getattr(frame, name):
+                flags |= 1 << i
+        inventory_cycle = max(-128, min(int(frame.inventory_cycle), 127))
+        self.frames.append(FRAME.pack(dt, frame.hmove, frame.vmove, frame.mouse[0], frame.mouse[1], flags, inventory_cycle))
+
+    def save(self, path: str) -> None:
+        with gzip.open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed, self.sim_dt, len(self.frames)))
+            f.write(b"".join(self.frames))
+
+
+class Replay:
+    """A loaded recording. Iterating gives `(dt, InputFrame)` in the recorded order."""
+
+    def __init__(self, seed: int, sim_dt: float, frames: list[tuple[float, InputFrame]]) -> None:
+        self.seed = seed
+        self.sim_dt = sim_dt
+        self.frames = frames
+
+    @property
+    def duration(self) -> float: return sum(dt for dt, _ in self.frames)
+
+    def __iter__(self): return iter(self.frames)
+    def __len__(self) -> int: return len(self.frames)
+
+    @classmethod
+    def load(cls, path: str) -> "Replay":
+        with gzip.open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ReplayError(f"{path}: too short for a replay")
+        magic, version, seed, sim_dt, n = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError(f"{path}: not a replay file")
+        if version != VERSION:
+            raise ReplayError(f"{path}: replay version {version}, expected {VERSION}")
+        if len(data) != HEADER.size + n * FRAME.size:
+            raise ReplayError(f"{path}: truncated ({n} frames in header)")
+
+        frames = []
+        for dt, hmove, vmove, mx, my, flags, inventory_cycle in FRAME.iter_unpack(data[HEADER.size:]):
+            bits = {name: bool(flags & (1 << i)) for i, name in enumerate(_FLAGS)}
+            frames.append((dt, InputFrame(hmove, vmove, (mx, my), inventory_cycle=inventory_cycle, **bits)))
+        return cls(seed, sim_dt, frames)
@@ -0,0 +1,36 @@
+import random
+
+
+class RNGStreams:
+    """
+    One `random.Random` per subsystem, all derived from one seed.
+    A subsystem drawing more or fewer numbers (e.g. particles only spawned while rendering)
+    doesn't shift the numbers of the others, so with the same seed and the same input
+    the simulation plays out the same way every time.
+    """
+
+    def __init__(self, seed: int = None) -> None:
+        self.streams: dict[str, random.Random] = {}
+        self.seed(seed)
+
+    def seed(self, seed: int = None) -> None:
+        """Reseeds every stream. `None` picks a random seed (which is kept in `base_seed` for recordings)."""
+        self.base_seed = seed if seed is not None else random.SystemRandom().randrange(2**32)
+        for name, stream in self.streams.items():
+            stream.seed(f"{self.base_seed}/{name}")
+
+    def __getitem__(self, name: str) -> random.Random:
+        if name not in self.streams:
+            self.streams[name] = random.Random(f"{self.base_seed}/{name}")
+        return self.streams[name]
+
+
+streams = RNGStreams()
+
+# die Streams, die es gibt. Modulattribute, damit die Aufrufer kurz bleiben (rng.spawn.choice(...))
+spawn = streams["spawn"]          # Zombie Wellen
+loot = streams["loot"]            # Kisteninhalt
+world = streams["world"]          # Tile Varianten beim Laden
+weapons = streams["weapons"]      # Hülsen, Splitter von Kisten
+particles = streams["particles"]  # Effekte der Simulation (Funken, Blut, Rauch)
+render = streams["render"]        # nur fürs Zeichnen (Screen Shake), hat keinen Einfluss auf die Simulation
@@ -1,13 +1,15 @@
 import collections
-from typing import Any
+from typing import Any, Callable
 import math
-import functools
 import json
 
+import numpy as np
 import pygame
 import random
+import Scripts.rng as rng
 
 import Scripts.CONFIG as CFG
+from Scripts.cache import LRUCache, memoize
 from Scripts.utils_math import clamp_number_to_range_steps, dist, sign
 from Scripts.timer import Timer
 
@@ -38,12 +40,20 @@ AUTOTILE_MAP = {
 
 NEIGHBOR_OFFSETS = [(-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (0, 0), (-1, 1), (0, 1), (1, 1)]
 PHYSICS_TILES = {"sides", "blocker", "stone"}
+COLLISION_TILES = {"sides", "stone"}  # die Tiles, gegen die handle_collision wirklich testet
 AUTOTILE_TYPES = {"dirt", "stone"}
 FALLTRHOGH_TILES = {}
 DONT_RENDER = {"blocker"}
 MAX_PLADES_PER_PATCH = 3
 BLADES_STIFFNESS = 360
 MAKE_RANDOM_VARIANTS_TYPES = {"grass"}
+GRASS_CACHE_BUDGET = 4 * 1024 * 1024  # gedrehte Grashalme (make_rot_image)
+DIMMED_LAYER_ALPHA = 125  # Layer, die nicht main_layer sind (Editor)
+CHUNK_TILES = 16  # Kantenlänge der vorgebackenen Layer Chunks in Tiles
+CHUNK_COLORKEY = (0, 0, 0)  # = colorkey der Tiles, nur Tiles mit genau dem können gebacken werden
+CHUNK_CACHE_BUDGET = 32 * 1024 * 1024  # ein Chunk sind 256x256 Pixel, verdrängte werden neu gebacken
+EMPTY_CHUNK = pygame.Surface((0, 0))
+_UNBAKED = object()
 
 
 class GrassTile:
@@ -71,17 +81,17 @@ class GrassTile:
             (0, -4), (4, -4), (8, -4),
             (0, -8), (4, -8), (8, -8),
         ]
-        random.seed(hash(self.pos))
+        # eigener Generator pro Tile statt den globalen neu zu seeden, so sieht das Gras immer gleich aus
+        blade_rng = random.Random(hash(self.pos))
         for offset in offsets:
-            if random.random() >= 3/9:
+            if blade_rng.random() >= 3/9:
                 continue
             pos = (
                 self.pos[0] * CFG.TILESIZE + offset[0],
                 self.pos[1] * CFG.TILESIZE + offset[1]
             )
-            variant = random.randint(0, 5)
+            variant = blade_rng.randint(0, 5)
             self.add_blade(pos, variant)
-        random.seed(0)
 
     def sim_wind(self, rot_func):
         for blade in self.blades:
@@ -126,6 +136,10 @@ class TileMap:
         self.offgrid_tiles = []
         self.shadows = {}
         self.grass_tiles: dict[tuple, GrassTile] = {}
+        self._solidity_grids: dict[tuple, tuple[tuple[int, int], np.ndarray]] = {}
+        # (layer, chunk x, chunk y, render_dont_render) -> gebackene Tiles, None = Tile für Tile zeichnen
+        self._chunks = LRUCache(CHUNK_CACHE_BUDGET, "tile chunks")
+        self.on_tiles_changed: list[Callable[[], None]] = []  # z.B. FlowField.refresh_grid
 
         GrassTile.game = game
 
@@ -135,20 +149,61 @@ class TileMap:
         str_pos = str(pos[0]) + ';' + str(pos[1])
         # print(self.tilemap[layer])
         self.tilemap[layer][str_pos] = tile
+        self.tiles_changed(pos, layer)
 
     def remove_tile(self, pos: tuple, layer=0) -> None:
         if layer in self.tilemap:
             str_pos = str(pos[0]) + ';' + str(pos[1])
             if str_pos in self.tilemap[layer]:
                 del self.tilemap[layer][str_pos]
+                self.tiles_changed(pos, layer)
+
+    def tiles_changed(self, pos: tuple = None, layer=0) -> None:
+        # alles was aus den tiles abgeleitet und gecached wird, muss hier invalidiert werden.
+        self._solidity_grids.clear()
+        if pos is None:
+            self._chunks.clear()
+        else:  # nur ein Tile (Editor), nur dessen Chunk neu backen
+            cx, cy = int(pos[0]) // CHUNK_TILES, int(pos[1]) // CHUNK_TILES
+            for render_dont_render in (False, True):
+                self._chunks.discard((layer, cx, cy, render_dont_render))
+        for callback in self.on_tiles_changed:
+            callback()
+
+    def get_solidity_grid(self, layer=0, types: set[str] = COLLISION_TILES) -> tuple[tuple[int, int], np.ndarray]:
+        """
+        Returns `(origin, grid)`. `grid[y, x]` is True for blocked cells, `origin` is the tilepos of `grid[0, 0]`.
+        Cells without a tile count as blocked, because there is nothing to walk on.
+        """
+        key = (layer, tuple(sorted(types)))
+        if key in self._solidity_grids:
+            return self._solidity_grids[key]
+
+        tiles = self.tilemap.get(layer, {})
+        if not tiles:
+            ret = ((0, 0), np.ones((1, 1), dtype=bool))
+            self._solidity_grids[key] = ret
+            return ret
+
+        xs = [tile["pos"][0] for tile in tiles.values()]
+        ys = [tile["pos"][1] for tile in tiles.values()]
+        origin = (min(xs), min(ys))
+        grid = np.ones((max(ys) - origin[1] + 1, max(xs) - origin[0] + 1), dtype=bool)
+        for tile in tiles.values():
+            grid[tile["pos"][1] - origin[1], tile["pos"][0] - origin[0]] = tile["type"] in types
+
+        ret = (origin, grid)
+        self._solidity_grids[key] = ret
+        return ret
 
     def make_random_variations(self, layer=0):
         for str_pos, tile in self.tilemap[layer].items():
             if tile["type"] in MAKE_RANDOM_VARIANTS_TYPES:
-                if random.randint(0, 100) > 80:
-                    tile["variant"] = random.randint(1, len(CFG.am.get(tile["type"])) - 1)
+                if rng.world.randint(0, 100) > 80:
+                    tile["variant"] = rng.world.randint(1, len(CFG.am.get(tile["type"])) - 1)
                 else:
                     tile["variant"] = 0
+        self.tiles_changed()
 
     def extract(self, id_pairs, keep=False):
         matches = []
@@ -169,6 +224,8 @@ class TileMap:
                     if not keep:
                         del self.tilemap[layer][loc]
 
+        if not keep:
+            self.tiles_changed()
         return matches
 
     def remove_grass_tile(self, location):
@@ -326,6 +383,7 @@ class TileMap:
         f.close()
 
         self.tilemap = {int(key): value for key, value in map_data['tilemap'].items()}
+        self.tiles_changed()
         CFG.TILESIZE = map_data['tile_size']
         self.offgrid_tiles = map_data['offgrid']
         for pos, data in map_data["blades"].items():
@@ -373,29 +431,29 @@ class TileMap:
         render_layer: list[int] = [0]
     ):
         fblits = []
+        chunk_px = CHUNK_TILES * CFG.TILESIZE
         for layer in range(render_layer[0], render_layer[-1]+1):
             if layer not in self.tilemap:
                 continue
-            for x in range(int(offset[0] // CFG.TILESIZE), int((offset[0] + surf.get_width()) // CFG.TILESIZE + 1)):
-                for y in range(int(offset[1] // CFG.TILESIZE), int((offset[1] + surf.get_height()) // CFG.TILESIZE + 1)):
-                    loc = str(x) + ';' + str(y)
-                    if loc in self.tilemap[layer]:
-                        tile = self.tilemap[layer][loc]
-                        if render_dont_render or tile["type"] not in DONT_RENDER:
-                            # surf.blit(CFG.am.get(f"{tile["type"]}/{tile["variant"]}"), (tile['pos'][0] * CFG.TILESIZE - offset[0], tile['pos'][1] * CFG.TILESIZE - offset[1]))
-                            a = 125 if main_layer != None and main_layer != layer else 255
-                            # print(tile["pos"], f"{tile["type"]}/{tile["variant"]}", a, type(CFG.am.get(f"{tile["type"]}/{tile["variant"]}", alpha=a)))
-                            fblits.append((
-                                CFG.am.get(f"{tile["type"]}/{tile["variant"]}", alpha=a),
-                                (tile['pos'][0] * CFG.TILESIZE - offset[0], tile['pos'][1] * CFG.TILESIZE - offset[1])
-                            ))
-        surf.fblits(fblits)
-        fblits.clear()
+            a = DIMMED_LAYER_ALPHA if main_layer != None and main_layer != layer else 255
+            # ganze Chunks auf einmal, die Layer Transparenz wird einmal pro Chunk gesetzt statt pro Tile
+            for cx in range(int(offset[0] // chunk_px), int((offset[0] + surf.get_width()) // chunk_px + 1)):
+                for cy in range(int(offset[1] // chunk_px), int((offset[1] + surf.get_height()) // chunk_px + 1)):
+                    key = (layer, cx, cy, render_dont_render)
+                    if (chunk := self._chunks.get(key, _UNBAKED)) is _UNBAKED:
+                        chunk = self._chunks.put(key, self._bake_chunk(*key))
+                    if chunk is None:
+                        self._chunk_tiles(fblits, layer, cx, cy, render_dont_render, offset, a)
+                    elif chunk is not EMPTY_CHUNK:
+                        chunk.set_alpha(a if a != 255 else None)  # 255 würde trotzdem den langsameren Blend Pfad nehmen
+                        fblits.append((chunk, (cx * chunk_px - offset[0], cy * chunk_px - offset[1])))
+            surf.fblits(fblits)
+            fblits.clear()
         if render_offgrid:
             for tile in self.offgrid_tiles:
                 # surf.blit(CFG.am.get(f"{tile["type"]}/{tile["variant"]}"), (tile['pos'][0] - offset[0], tile['pos'][1] - offset[1]))
                 fblits.append((
-                    CFG.am.get(f"{tile["type"]}/{tile["variant"]}"),
+                    CFG.am.handle(tile["type"])[tile["variant"]].get(),
                     (tile['pos'][0] - offset[0], tile['pos'][1] - offset[1])
                 ))
         surf.fblits(fblits)
@@ -413,6 +471,48 @@ class TileMap:
                 r = pygame.Rect(tile.pos[0] * CFG.TILESIZE - offset[0], tile.pos[1] * CFG.TILESIZE-offset[1], CFG.TILESIZE, CFG.TILESIZE)
                 pygame.draw.rect(surf, (0, 100, 0), r, 1)
 
+    def _chunk_tile_list(self, layer: int, cx: int, cy: int, render_dont_render: bool) -> list[dict]:
+        tiles = self.tilemap[layer]
+        chunk_tiles = []
+        for x in range(cx * CHUNK_TILES, (cx + 1) * CHUNK_TILES):
+            for y in range(cy * CHUNK_TILES, (cy + 1) * CHUNK_TILES):
+                loc = str(x) + ';' + str(y)
+                if loc in tiles and (render_dont_render or tiles[loc]["type"] not in DONT_RENDER):
+                    chunk_tiles.append(tiles[loc])
+        return chunk_tiles
+
+    def _chunk_tiles(self, fblits: list, layer: int, cx: int, cy: int, render_dont_render: bool, offset: tuple, alpha: int) -> None:
+        """Tile by tile, for chunks that can't be baked."""
+        for tile in self._chunk_tile_list(layer, cx, cy, render_dont_render):
+            fblits.append((
+                CFG.am.handle(tile["type"])[tile["variant"]].get(alpha=alpha),
+                (tile['pos'][0] * CFG.TILESIZE - offset[0], tile['pos'][1] * CFG.TILESIZE - offset[1])
+            ))
+
+    def _bake_chunk(self, layer: int, cx: int, cy: int, render_dont_render: bool) -> pygame.Surface | None:
+        """
+        All tiles of a chunk on one colorkeyed Surface, so it looks exactly like the single tiles.
+        None if a tile doesn't fit that (own alpha, per pixel alpha, other colorkey, larger than a tile),
+        EMPTY_CHUNK if there are no tiles. Cleared by `tiles_changed`.
+        """
+        chunk_tiles = self._chunk_tile_list(layer, cx, cy, render_dont_render)
+        if not chunk_tiles:
+            return EMPTY_CHUNK
+        origin = (cx * CHUNK_TILES, cy * CHUNK_TILES)
+        blits = []
+        for tile in chunk_tiles:
+            img = CFG.am.handle(tile["type"])[tile["variant"]].get()
+            x, y = tile['pos'][0] - origin[0], tile['pos'][1] - origin[1]
+            if (img.get_flags() & pygame.SRCALPHA or img.get_alpha() not in (None, 255) or img.get_colorkey() != CHUNK_COLORKEY + (255,)
+                    or img.width > CFG.TILESIZE or img.height > CFG.TILESIZE or not (0 <= x < CHUNK_TILES and 0 <= y < CHUNK_TILES)):
+                return None
+            blits.append((img, (x * CFG.TILESIZE, y * CFG.TILESIZE)))
+        chunk = pygame.Surface((CHUNK_TILES * CFG.TILESIZE, CHUNK_TILES * CFG.TILESIZE)).convert()
+        chunk.fill(CHUNK_COLORKEY)
+        chunk.fblits(blits)
+        chunk.set_colorkey(CHUNK_COLORKEY)
+        return chunk
+
     def autotile(self, layer=0):
         for loc, tile in self.tilemap[layer].items():
             neighbors = set()
@@ -424,6 +524,7 @@ class TileMap:
             neighbors = tuple(sorted(neighbors))
             if (tile['type'] in AUTOTILE_TYPES) and (neighbors in AUTOTILE_MAP):
                 tile['variant'] = atlas_coords_to_1d_array(AUTOTILE_MAP[neighbors], 4)
+        self.tiles_changed()
 
     def make_shadow2(self, shadow_length=CFG.TILESIZE, shadow_dir=(-1, 1)):
         # ! Für vllt besseres rendering kann man die final surface in chunks unterteilen und nur die dann rendern. Müsste man testen
@@ -471,7 +572,7 @@ class TileMap:
         for tile in shadow_making_tiles:
             yoffset = abs(tl[1])
             pos = ((tile["pos"][0]-1)*CFG.TILESIZE, (tile["pos"][1]+yoffset)*CFG.TILESIZE)
-            shadow_surf.blit(fill_img(CFG.am.get(f"{tile["type"]}/{tile["variant"]}"), color=shadow_color), pos)
+            shadow_surf.blit(fill_img(CFG.am.handle(tile["type"])[tile["variant"]].get(), color=shadow_color), pos)
 
         offset = (
             shadow_dir[0] * shadow_length,
@@ -501,7 +602,7 @@ class TileMap:
                 pos[0] += abs(shadow_dir[0]) * CFG.TILESIZE
             if shadow_dir[1] < 1:
                 pos[1] += abs(shadow_dir[1]) * CFG.TILESIZE
-            final_shadow_surf.blit(fill_img(CFG.am.get(f"{tile["type"]}/{tile["variant"]}"), color=(255, 0, 0)), pos)
+            final_shadow_surf.blit(fill_img(CFG.am.handle(tile["type"])[tile["variant"]].get(), color=(255, 0, 0)), pos)
 
         pos = list(tl)
         if shadow_dir[0] < 0:
@@ -697,6 +798,7 @@ class TileMap:
                     self.tilemap[layer][pos_below] = {"type": "sides", "variant": lt[tile["type"]], "pos": [pos[0], pos[1] + 1]}
         make_stone_walls(layer)
         make_island_walls()
+        self.tiles_changed()
 
 
 def pos_to_str(pos: tuple) -> str:
@@ -712,11 +814,12 @@ def atlas_coords_to_1d_array(pos: tuple, n_rows: int) -> int:
 
 
 MAX_GRASS_STEPS = 25
+GRASS_BLADES = CFG.am.handle("grass_blades")
 
 
 def make_rot(variant, angle, b_pos, radius=6) -> tuple[pygame.Surface, pygame.FRect, pygame.Surface, pygame.FRect]:
     # org_image: pygame.Surface = game.assets["grass_blades"][variant]
-    org_image: pygame.Surface = CFG.am.get(f"grass_blades/{variant}")
+    org_image: pygame.Surface = GRASS_BLADES[variant].get()
     org_rect = org_image.get_frect()
     org_rect.topleft = b_pos
     rot_image = make_rot_image(variant, angle)
@@ -724,20 +827,20 @@ def make_rot(variant, angle, b_pos, radius=6) -> tuple[pygame.Surface, pygame.FR
     shadow = make_shadow(r=radius)
     shadow_pos = (b_pos[0]-radius+2, b_pos[1]+radius*2-1)
 
-    # print(make_rot_image.cache_info(), make_shadow.cache_info())
+    # print(make_rot_image.cache, make_shadow.cache)
 
     return (rot_image, rot_rect, shadow, shadow_pos)
 
 
-@ functools.lru_cache(maxsize=2048)
+@ memoize(LRUCache(GRASS_CACHE_BUDGET, "grass rotations", max_entries=2048))
 def make_rot_image(variant, angle) -> pygame.Surface:
     # org_image: pygame.Surface = game.assets["grass_blades"][variant]
-    org_image: pygame.Surface = CFG.am.get(f"grass_blades/{variant}")
+    org_image: pygame.Surface = GRASS_BLADES[variant].get()
     rot_image = pygame.transform.rotate(org_image, angle)
     return rot_image
 
 
-@ functools.lru_cache(maxsize=2048)
+@ memoize(LRUCache(None, "grass shadows", max_entries=2048))
 def make_shadow(r=6, alpha=60) -> pygame.Surface:
     s = pygame.Surface((r * 2, r * 2))
     s.fill((255, 0, 0))
@@ -880,6 +983,17 @@ class EntityMap:
     def query(self, position: tuple, size: tuple = (0, 0), ignore_points: set[tuple] = set()) -> list:
         return self.entity_hashmap.query(position, size=size, ignore_points=ignore_points)
 
+    def entities_near(self, position: tuple, radius: float) -> list:
+        """Broad phase: every entity (once) in the cells under the bounding box of the circle, no distance check."""
+        cell_size = self.entity_hashmap.cell_size
+        grid = self.entity_hashmap.grid
+        found = {}
+        for x in range(int((position[0] - radius) // cell_size), int((position[0] + radius) // cell_size) + 1):
+            for y in range(int((position[1] - radius) // cell_size), int((position[1] + radius) // cell_size) + 1):
+                for _, data in grid.get((x * cell_size, y * cell_size), ()):
+                    found[id(data["ent"])] = data["ent"]
+        return list(found.values())
+
     def query_circle(self, position: tuple, radius: float) -> list:
         cell_size = self.entity_hashmap.cell_size
         found = []
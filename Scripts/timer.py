@@ -1,83 +1,153 @@
 from typing import Callable, Any
+import heapq
+import itertools
 import time
+import weakref
+
+# Uhr, nach der alle Timer laufen. Game stellt sie auf die Simulationszeit um, damit Replays gleich ablaufen.
+clock: Callable[[], float] = time.perf_counter
+
+
+def set_clock(func: Callable[[], float] = None) -> None:
+    """`None` goes back to the wall clock."""
+    global clock
+    clock = func if func else time.perf_counter
 
 
 class TimerManager:
-    timers: list["Timer"] = []
+    """
+    Min-heap of `(deadline, seq, weakref(timer), generation)` for every running timer.
+    `update` only pops the entries that are due, so the cost per frame depends on the timers that fire,
+    not on how many exist. Restarting, pausing or stopping a timer bumps its generation; the old entry
+    stays in the heap and is dropped when it comes up. Timers of items that got garbage collected are
+    dropped the same way (weakref is dead), so nobody has to unregister them.
+    """
+    _heap: list[tuple[float, int, weakref.ref, int]] = []
+    _seq = itertools.count()
+    # Timer, die beim letzten update fertig wurden, bei denen just_ended wieder zurückgesetzt werden muss
+    _just_ended: list["Timer"] = []
+    stats = {"scheduled": 0, "fired": 0, "stale": 0}
 
     @staticmethod
     def update() -> None:
-        [t.update() for t in TimerManager.timers]
+        for timer in TimerManager._just_ended:
+            timer.just_ended = False
+        TimerManager._just_ended = []
+
+        heap = TimerManager._heap
+        now = clock()
+        while heap:
+            _, _, ref, generation = heap[0]
+            timer = ref()
+            if timer is None or timer._generation != generation:
+                heapq.heappop(heap)
+                TimerManager.stats["stale"] += 1
+                continue
+            # gleiche Bedingung wie Timer.update, der deadline Schlüssel ist nur fürs Sortieren
+            if now - timer.start_time < timer.duration:
+                break
+            heapq.heappop(heap)
+            timer._end()
+            TimerManager.stats["fired"] += 1
 
     @staticmethod
     def add(timer: "Timer") -> None:
-        TimerManager.timers.append(timer)
+        """(Re)schedules `timer` if it is running. Timers do that themselves on start/reset/resume."""
+        timer._generation += 1
+        if timer.start_time is not None and timer.paused is None:
+            heapq.heappush(TimerManager._heap, (timer.start_time + timer.duration, next(TimerManager._seq), weakref.ref(timer), timer._generation))
+            TimerManager.stats["scheduled"] += 1
 
     @staticmethod
     def extend(timers: list["Timer"]) -> None:
-        TimerManager.timers.extend(timers)
+        for timer in timers:
+            TimerManager.add(timer)
 
     @staticmethod
     def remove(timer: "Timer") -> None:
-        if timer in TimerManager.timers:
-            TimerManager.timers.remove(timer)
+        """The timer won't fire anymore (until it is started again)."""
+        timer._generation += 1
+
+    @staticmethod
+    def clear() -> None:
+        TimerManager._heap.clear()
+        TimerManager._just_ended = []
+        for k in TimerManager.stats:
+            TimerManager.stats[k] = 0
+
+    @staticmethod
+    def pending() -> int:
+        """Heap entries, including stale ones that weren't popped yet."""
+        return len(TimerManager._heap)
 
 
 class Timer:
     def __init__(self, duration: float, autostart=False, start_on_end=False) -> None:
         self.duration = duration
-        self.start_time = .0
-        self.paused = .0
+        self.start_time: float | None = None  # None = läuft nicht (die Simulationszeit fängt bei 0 an)
+        self.paused: float | None = None
         self.ended = False
         self.just_ended = False
+        self._generation = 0
 
         if autostart:
             self.start()
         if start_on_end:
             self.ended = True
             self.just_ended = True
-
-        TimerManager.add(self)
+            TimerManager._just_ended.append(self)
 
     def update(self):
+        """Checks only this timer. Normally `TimerManager.update` does that for all of them."""
         self.just_ended = False
-        if self.start_time and not self.paused:
-            if time.perf_counter() - self.start_time >= self.duration:
+        if self.start_time is not None and self.paused is None:
+            if clock() - self.start_time >= self.duration:
+                TimerManager.remove(self)
                 self._end()
 
     def reset(self):
-        self.start_time = time.perf_counter()
+        self.start_time = clock()
+        TimerManager.add(self)
 
     def start(self):
-        if self.start_time:
+        if self.start_time is not None:
             return
-        self.start_time = time.perf_counter()
+        self.start_time = clock()
         self.ended = False
+        TimerManager.add(self)
 
     def stop(self):
-        pass
+        """Stops without ending (no just_ended) and takes the timer out of the scheduler."""
+        self.start_time = None
+        TimerManager.remove(self)
 
     def _end(self):
-        self.start_time = .0
+        self.start_time = None
         self.ended = True
         self.just_ended = True
+        TimerManager._just_ended.append(self)
 
     def pause(self):
-        if self.paused:
+        if self.paused is not None:
             return
-        self.paused = time.perf_counter()
+        self.paused = clock()
+        TimerManager.remove(self)
 
     def resume(self):
-        self.start_time = time.perf_counter() - (self.paused - self.start_time)
-        self.paused = .0
+        if self.paused is None:
+            return
+        if self.start_time is not None:
+            self.start_time = clock() - (self.paused - self.start_time)
+        self.paused = None
+        TimerManager.add(self)
 
     def remaining(self):
-        if self.paused:
+        if self.paused is not None and self.start_time is not None:
             return self.duration - (self.paused - self.start_time)
-        elif not self.start_time:
+        elif self.start_time is None:
             return 0.0
         else:
-            return self.duration - (time.perf_counter() - self.start_time)
+            return self.duration - (clock() - self.start_time)
 
 
 # class Timer:
@@ -16,21 +16,31 @@ if not pygame.font.get_init():
 
 
 def load_image(path: str, flip_x: bool = False, flip_y: bool = False, colorkey: Tuple = (0, 0, 0)) -> Surface:
-    i = pygame.image.load(path).convert()
-    i = pygame.transform.flip(i, flip_x=flip_x, flip_y=flip_y)
+    return prepare_image(pygame.image.load(path), flip_x, flip_y, colorkey)
+
+
+def prepare_image(i: Surface, flip_x: bool = False, flip_y: bool = False, colorkey: Tuple = (0, 0, 0), convert=True) -> Surface:
+    """
+    Everything `load_image` does after decoding the file. Needs the display (convert), so main thread only.
+    `convert=False`: `i` is already in display format (subsurface of a converted atlas page) and stays a view on it.
+    """
+    if convert:
+        i = i.convert()
+    if flip_x or flip_y:
+        i = pygame.transform.flip(i, flip_x=flip_x, flip_y=flip_y)
     i.set_colorkey(colorkey)
     return i
 
 
-def load_images(path: str, colorkey: Tuple = (0, 0, 0), imgnames_are_ints: bool = False) -> List[Surface]:
-    images = []
+def list_images(path: str, imgnames_are_ints: bool = False) -> List[str]:
+    """The files `load_images` loads, in its order."""
     file_names = sorted(int(x.split(".")[0]) if imgnames_are_ints else x for x in os.listdir(path))
     # print(path, file_names)
-    for img_name in file_names:
-        if not imgnames_are_ints and not img_name.endswith(".png"):
-            continue
-        images.append(load_image(path + '/' + f"{img_name}{'.png' if imgnames_are_ints else ''}", colorkey=colorkey))
-    return images
+    return [path + '/' + f"{img_name}{'.png' if imgnames_are_ints else ''}" for img_name in file_names if imgnames_are_ints or img_name.endswith(".png")]
+
+
+def load_images(path: str, colorkey: Tuple = (0, 0, 0), imgnames_are_ints: bool = False) -> List[Surface]:
+    return [load_image(img_path, colorkey=colorkey) for img_path in list_images(path, imgnames_are_ints)]
 
 
 def props(cls):
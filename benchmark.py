@@ -0,0 +1,202 @@
+"""
+Headless benchmarks, no window is opened.
+
+    python benchmark.py sim --seconds 60 --zombies 40
+    python benchmark.py sim --seconds 30 --render
+    python benchmark.py sim --seconds 64 --record round.rec
+    python benchmark.py replay round.rec
+    python benchmark.py replay round.rec --render --caches
+    python benchmark.py assets
+"""
+import argparse
+import hashlib
+import os
+import struct
+import time
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+os.chdir(os.path.dirname(os.path.abspath(__file__)))  # assets werden relativ geladen
+
+import numpy as np
+import pygame
+
+pygame.init()
+
+import Scripts.CONFIG as CFG  # noqa: E402
+import Scripts.Input as Input  # noqa: E402
+import Scripts.rng as rng  # noqa: E402
+from Scripts.cache import format_snapshot  # noqa: E402
+from Scripts.replay import Replay  # noqa: E402
+import main  # noqa: E402
+
+
+def spawn_zombies(game: main.Game, n: int) -> None:
+    for i in range(n):
+        pos = rng.spawn.choice(game.zombie_spawn_poses)
+        if i % 4 == 0:
+            zombie = main.SucideZombie(pygame.FRect(pos[0], pos[1], *game.zombie_size))
+        else:
+            zombie = main.Zombie(pygame.FRect(pos[0], pos[1], *game.zombie_size))
+        game.n_zombies_spawned += 1
+        game.entities["enemies"].append(zombie)
+
+
+def entity_counts(game: main.Game) -> dict[str, int]:
+    counts = {k: len(v) for k, v in game.entities.items()}
+    counts["corpses"] = len(game.corpses.corpses)
+    counts["sparks"] = len(game.particles["sparks"])
+    counts["circle_particles"] = len(game.particles["circle"])
+    return counts
+
+
+def state_digest(game: main.Game) -> str:
+    """Short hash over the simulation state, equal digests = the runs played out the same way."""
+    h = hashlib.sha1()
+    h.update(struct.pack("<dii", game.sim_time, game.n_zombies_spawned, game.n_zombies_killed))
+    for group in ("player", "enemies", "items", "items_pickedup", "projectiles", "objects"):
+        for ent in game.entities[group]:
+            h.update(struct.pack("<ddd", ent.pos[0], ent.pos[1], getattr(ent, "health", 0.0)))
+    return h.hexdigest()[:16]
+
+
+def report(name: str, tick_times: list[float], wall: float, sim_seconds: float, counts: dict[str, int], peak: dict[str, int]) -> None:
+    ms = np.array(tick_times) * 1000
+    print(f"--- {name} ---")
+    print(f"ticks:       {len(tick_times)} ({sim_seconds:.1f}s sim in {wall:.2f}s wall, {sim_seconds / wall:.1f}x realtime)")
+    print(f"ticks/sec:   {len(tick_times) / wall:.1f}")
+    print("tick ms:     " + "  ".join(f"p{p}={np.percentile(ms, p):.2f}" for p in (50, 90, 99)) + f"  max={ms.max():.2f}  mean={ms.mean():.2f}")
+    print("entities:    " + "  ".join(f"{k}={v}(peak {peak[k]})" for k, v in counts.items()))
+
+
+def run_sim(args) -> None:
+    if args.record and (args.zombies or args.god):
+        raise SystemExit("--record only works without --zombies / --god, a replay can't reproduce those")
+    game = main.Game(headless=True, seed=args.seed)
+    game.setup_run()
+    if args.record:
+        game.start_recording(args.record)
+    spawn_zombies(game, args.zombies)
+    player = game.entities["player"][0]
+    if args.god:
+        player.health = player.max_health = 1e9
+
+    script = Input.ScriptedInput(Input.ScriptedInput.patrol(args.seconds, fire=not args.no_fire), game.input_manager)
+    n_ticks = int(args.seconds / CFG.SIM_DT)
+    tick_times = []
+    peak: dict[str, int] = {}
+
+    start = time.perf_counter()
+    for tick in range(n_ticks):
+        t = time.perf_counter()
+        game.advance(script.events(tick * CFG.SIM_DT), render=args.render)
+        tick_times.append(time.perf_counter() - t)
+        if tick % 30 == 0:
+            for k, v in entity_counts(game).items():
+                peak[k] = max(peak.get(k, 0), v)
+        if not game.running:
+            break
+    wall = time.perf_counter() - start
+
+    counts = entity_counts(game)
+    for k, v in counts.items():
+        peak[k] = max(peak.get(k, 0), v)
+    report(f"sim{' +render' if args.render else ''}", tick_times, wall, len(tick_times) * CFG.SIM_DT, counts, peak)
+    print(f"state:       {state_digest(game)}")
+    if args.record:
+        game.recorder.save(args.record)
+        print(f"recorded:    {args.record} ({len(game.recorder.frames)} steps, seed {game.recorder.seed})")
+
+
+def run_replay(args) -> None:
+    replay = Replay.load(args.path)
+    game = main.Game(headless=True, seed=replay.seed)
+    game.setup_run()
+    game.make_deterministic()  # wie beim Aufnehmen
+    tick_times = []
+    peak: dict[str, int] = {}
+
+    start = time.perf_counter()
+    for tick, (dt, frame) in enumerate(replay):
+        t = time.perf_counter()
+        game.advance(render=args.render, frame=frame, dt=dt)
+        tick_times.append(time.perf_counter() - t)
+        if tick % 30 == 0:
+            for k, v in entity_counts(game).items():
+                peak[k] = max(peak.get(k, 0), v)
+    wall = time.perf_counter() - start
+
+    counts = entity_counts(game)
+    for k, v in counts.items():
+        peak[k] = max(peak.get(k, 0), v)
+    report(f"replay {args.path}{' +render' if args.render else ''}", tick_times, wall, replay.duration, counts, peak)
+    print(f"state:       {state_digest(game)}")
+    if args.caches:
+        print("--- caches ---")
+        print("\n".join(format_snapshot()))
+
+
+def run_assets(args) -> None:
+    """Lookup cost of the string `AssetManager.get` against kept `Asset` handles, everything already cached."""
+    main.Game(headless=True, seed=0)
+    am = CFG.am
+    angles = [i * 7.3 - 90 for i in range(50)]
+    tile = {"type": "grass", "variant": 3}
+    head_type = "zombie"
+    cases = {
+        "projectile, rotated": (
+            lambda a: am.get("items/guns/projectile", angle=a),
+            lambda a, h=am.handle("items/guns/projectile"): h.get(a),
+        ),
+        "head, f-string path": (
+            lambda a: am.get(f"{head_type}_head", angle=a),
+            lambda a, h=am.handle(f"{head_type}_head"): h.get(a),
+        ),
+        "tile variant": (
+            lambda a: am.get(f"{tile['type']}/{tile['variant']}"),
+            lambda a: am.handle(tile["type"])[tile["variant"]].get(),
+        ),
+    }
+    print(f"--- asset lookups ({args.n} calls each, ns/call) ---")
+    for name, (by_path, by_handle) in cases.items():
+        times = []
+        for func in (by_path, by_handle):
+            func(0.0)
+            start = time.perf_counter()
+            for i in range(args.n):
+                func(angles[i % 50])
+            times.append((time.perf_counter() - start) / args.n * 1e9)
+        print(f"{name:22} path={times[0]:7.0f}  handle={times[1]:7.0f}  ({times[0] / times[1]:.2f}x)")
+    print("\n".join(format_snapshot()))
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sim = sub.add_parser("sim", help="run N simulated seconds as fast as possible")
+    sim.add_argument("--seconds", type=float, default=60.0, help="simulated seconds")
+    sim.add_argument("--zombies", type=int, default=0, help="zombies spawned at the start (on top of the normal waves)")
+    sim.add_argument("--render", action="store_true", help="also render every tick into the offscreen surface")
+    sim.add_argument("--seed", type=int, default=0)
+    sim.add_argument("--god", action="store_true", help="player can't die, so the run doesn't stop early")
+    sim.add_argument("--no-fire", action="store_true", help="scripted player doesn't shoot")
+    sim.add_argument("--record", metavar="PATH", default=None, help="save the run as a replay")
+    sim.set_defaults(func=run_sim)
+
+    replay = sub.add_parser("replay", help="play a recording (main.py --record / sim --record) as fast as possible")
+    replay.add_argument("path")
+    replay.add_argument("--render", action="store_true", help="also render every tick into the offscreen surface")
+    replay.add_argument("--caches", action="store_true", help="print size and hit rate of every cache at the end")
+    replay.set_defaults(func=run_replay)
+
+    assets = sub.add_parser("assets", help="lookup cost of AssetManager.get by path vs. kept Asset handles")
+    assets.add_argument("-n", type=int, default=200_000, help="calls per case")
+    assets.set_defaults(func=run_assets)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -4,13 +4,30 @@ import sys
 import pygame
 import random
 
-from Scripts.utils import load_image, load_images
+from Scripts.asset_loader import AssetLoader, Image, Images, Tileset
 from Scripts.tilemap import TileMap
 import Scripts.CONFIG as CFG
 
 
 RENDER_SCALE = 2.0
 
+ASSET_MANIFEST = {
+    "blocker": [Image("assets/tiles/blocker.png")],
+    "sides": [Image("assets/tiles/grass/side.png"), Image("assets/tiles/stone/side.png"), Image("assets/tiles/dirt/side.png")],
+    "grass": [Image("assets/tiles/grass/top0.png")],
+    # "dirt": [Image("assets/tiles/dirt/top.png")],
+    "dirt": Tileset("assets/tiles/dirt/tilemap.png"),
+    "stone": Tileset("assets/tiles/stone/tilemap.png"),
+    "spawners": Images("assets/tiles/spawners", imgnames_are_ints=True),
+    "blades_cover": [Image("assets/tiles/blades_cover.png")],
+    "grass_blades": Images("assets/tiles/grass_blades"),
+    "deco": Images("assets/tiles/deco"),
+    # "tilesets": {
+    #     "grass-stone": Images("assets/tiles/tileset/grass-stone", imgnames_are_ints=True),
+    #     "dirt-grass": Images("assets/tiles/tileset/dirt-grass", imgnames_are_ints=True),
+    # },
+}
+
 
 class Editor:
     def __init__(self):
@@ -24,23 +41,10 @@ class Editor:
         self.font = pygame.font.SysFont("arial", 16)
         self.clock = pygame.time.Clock()
 
-        assets = {
-            "blocker": [load_image("assets/tiles/blocker.png")],
-            "sides": [load_image("assets/tiles/grass/side.png"), load_image("assets/tiles/stone/side.png"), load_image("assets/tiles/dirt/side.png")],
-            "grass": [load_image("assets/tiles/grass/top0.png")],
-            # "dirt": [load_image("assets/tiles/dirt/top.png")],
-            "dirt": CFG.parse_tileset("assets/tiles/dirt/tilemap.png", as_array=True),
-            "stone": CFG.parse_tileset("assets/tiles/stone/tilemap.png", as_array=True),
-            "spawners": load_images("assets/tiles/spawners", imgnames_are_ints=True),
-            "blades_cover": [load_image("assets/tiles/blades_cover.png")],
-            "grass_blades": load_images("assets/tiles/grass_blades"),
-            "deco": load_images("assets/tiles/deco"),
-            # "tilesets": {
-            #     "grass-stone": load_images("assets/tiles/tileset/grass-stone", imgnames_are_ints=True),
-            #     "dirt-grass": load_images("assets/tiles/tileset/dirt-grass", imgnames_are_ints=True),
-            # },
-        }
-        CFG.am.assets = assets
+        # Bilder parallel dekodieren, siehe Scripts/asset_loader.py
+        loader = AssetLoader()
+        CFG.am.assets = loader.load(ASSET_MANIFEST)
+        print(loader.timer.report())
         self.blade_cover_group = 6
 
         self.movement = [False, False, False, False]
@@ -1,29 +1,146 @@
+import time
+_import_start = time.perf_counter()  # Startup Zeiten, Imports inkl. font/mixer init in Scripts.utils
 import json
 import pygame
 from pygame import Surface, FRect, Rect, Surface
 import Scripts.CONFIG as CFG
 from Scripts.tilemap import TileMap, EntityMap
-from Scripts.utils import load_image, load_images, draw_rect_alpha
-from Scripts.utils_math import vector2d_from_angle, vector2d_add, vector2d_mult, sign, dist, vector2d_sub
+from Scripts.flowfield import FlowField
+from Scripts.ai_scheduler import AIScheduler
+from Scripts.blackboard import LastSeenBlackboard
+from Scripts.cache import format_snapshot
+from Scripts.line_of_sight import LineOfSight
+from Scripts.corpses import CorpseLayer
+from Scripts.explosions import ExplosionSystem
+from Scripts.markers import load_markers
+from Scripts.pool import ObjectPool
+from Scripts.utils import draw_rect_alpha
+from Scripts.utils_math import vector2d_from_angle, vector2d_add, vector2d_mult, sign, dist
 from Scripts.particles import Spark
-from Scripts.timer import TimerManager, Timer
+from Scripts.timer import TimerManager, Timer, set_clock
+from Scripts.replay import InputFrame, InputRecorder
 from Scripts.entities import (
-    ItemABC, Gun, ItemStats, Medkit,
-    Player, Zombie, SucideZombie, LootDrop, Decal,
-    Bullet, BulletCasing,
+    BaseEntityABC, ItemABC, Gun, ItemStats, Medkit,
+    Player, ZombieBase, Zombie, SucideZombie, LootDrop, Decal,
+    Bullet, BulletCasing, PROJECTILE_ASSET,
     handle_collision, handle_pickup, handle_drop, update_held_items, handle_item_outlines, handle_bullet_collision
 )
 import math
-import random
-import time
+import os
 import Scripts.Input as Input
+import Scripts.InverseKinematics as ik
+import Scripts.rng as rng
 from Scripts.particles import AnimationParticle, ParticleGroup
+from Scripts.asset_loader import AssetLoader, StartupTimer, Image, Images, Lazy, Tileset, lazy_each
+
+IMPORT_MS = (time.perf_counter() - _import_start) * 1000
 
 
 PROJECTILE_DECAY_TIME = 5  # in sekunden.
 
 font = pygame.font.SysFont("arial", 14)
 
+# diese Gruppen bewegen sich und werden zwischen zwei Simulationsschritten interpoliert gezeichnet
+INTERPOLATED_ENTITIES = {"player", "enemies", "projectiles", "bullet_casings"}
+
+
+def zombie_spawn_func(x: float) -> float: return 0.035*math.pow(x, 2)
+
+
+ZOMBIE_PREFETCH_LEAD = 300  # master_time Einheiten (~3s) bevor die nächste Welle kommt, werden die Zombie Assets geladen
+ZOMBIE_ASSETS = ("zombie_head", "zombie_suicide_head", "zombie_portrait", "zombie_suicide_portrait", "ANIMATIONS/zombie", "ANIMATIONS/zombie_suicide")
+LEVEL_PATH = "map.json"
+# spawner variante -> waffe
+SPAWNER_GUNS = {
+    2: "rifle",
+    3: "pistol",
+    4: "shotgun",
+    5: "rocketlauncher",
+    10: "pistol_silenced",
+    11: "kriss_vector",
+    12: "m60",
+    13: "ring",
+}
+
+
+ASSET_MANIFEST = {
+    "blocker": [Image("assets/tiles/blocker.png")],
+    "sides": [Image("assets/tiles/grass/side.png"), Image("assets/tiles/stone/side.png"), Image("assets/tiles/dirt/side.png")],
+    "grass": [Image(f"assets/tiles/grass/top{i}.png") for i in range(9)],
+    # "dirt": [Image("assets/tiles/dirt/top.png")],
+    "dirt": Tileset("assets/tiles/dirt/tilemap.png"),
+    "stone": Tileset("assets/tiles/stone/tilemap.png"),
+    "shadow": Tileset("assets/tiles/shadow/tilemap.png", colorkey=(255, 0, 0), alpha=125),
+    "spawners": Lazy(Images("assets/tiles/spawners", imgnames_are_ints=True)),  # nur im Editor sichtbar
+    "blades_cover": [Image("assets/tiles/blades_cover.png")],
+    "grass_blades": Images("assets/tiles/grass_blades"),
+    "player_head": Image("assets/entities/player/head.png"),
+    "player_portrait": Image("assets/entities/player/player_portrait.png"),
+    # Lazy: wird erst beim ersten Zugriff geladen oder vorher mit CFG.am.prefetch (parse_level, Wellen)
+    **lazy_each({
+        "zombie_head": Image("assets/entities/enemies/zombie/head.png"),
+        "zombie_portrait": Image("assets/entities/enemies/zombie/zombie_portrait.png"),
+        "zombie_suicide_head": Image("assets/entities/enemies/zombie_suicide/head.png"),
+        "zombie_suicide_portrait": Image("assets/entities/enemies/zombie_suicide/zombie_portrait.png"),
+    }),
+    "creates": Images("assets/entities/create"),
+    "deco": Images("assets/tiles/deco"),
+    "items": {
+        **lazy_each({
+            "apple": Image("assets/items/apple.png"),
+            "apple_lt": Image("assets/items/apple_lt.png"),
+            "grenade": Image("assets/items/grenade.png"),
+            "grenade_lt": Image("assets/items/grenade_lt.png"),
+            "cluster_grenade": Image("assets/items/cluster_grenade.png"),
+            "cluster_grenade_lt": Image("assets/items/cluster_grenade_lt.png"),
+            "ammo": Image("assets/items/ammo.png"),
+            "ammo_lt": Image("assets/items/ammo_lt.png"),
+        }),
+        "medkit": Image("assets/items/medkit.png"),
+        "medkit_lt": Image("assets/items/medkit_lt.png"),
+        "planks": Images("assets/items/planks", imgnames_are_ints=True),
+        "guns": {
+            "projectile": Image("assets/items/guns/projectile.png"),
+            **lazy_each({
+                "ring": Image("assets/items/guns/ring.png"),
+                "rifle": Image("assets/items/guns/rifle.png"),
+                "pistol": Image("assets/items/guns/pistol.png"),
+                "pistol_silenced": Image("assets/items/guns/pistol_silenced.png"),
+                "shotgun": Image("assets/items/guns/shotgun.png"),
+                "rocketlauncher": Image("assets/items/guns/rocketlauncher.png"),
+                "kriss_vector": Image("assets/items/guns/kriss_vector.png"),
+                "m60": Image("assets/items/guns/m60.png"),
+                # gun lts
+                "ring_lt": Image("assets/items/guns/ring_lt.png"),
+                "rifle_lt": Image("assets/items/guns/rifle_lt.png"),
+                "pistol_lt": Image("assets/items/guns/pistol_lt.png"),
+                "pistol_silenced_lt": Image("assets/items/guns/pistol_silenced_lt.png"),
+                "shotgun_lt": Image("assets/items/guns/shotgun_lt.png"),
+                "rocketlauncher_lt": Image("assets/items/guns/rocketlauncher_lt.png"),
+                "kriss_vector_lt": Image("assets/items/guns/kriss_vector_lt.png"),
+                "m60_lt": Image("assets/items/guns/m60_lt.png"),
+            }),
+        }
+    },
+    "ANIMATIONS": {},
+}
+
+
+def level_assets(path: str) -> list[str]:
+    """The lazy assets `parse_level` will need for the level at `path` (read from its spawners)."""
+    with open(path, "r") as f:
+        map_data = json.load(f)
+    tiles = [tile for layer in map_data["tilemap"].values() for tile in layer.values()] + map_data["offgrid"]
+    variants = {tile["variant"] for tile in tiles if tile["type"] == "spawners"}
+    ids = [f"items/guns/{SPAWNER_GUNS[v]}" for v in sorted(variants & SPAWNER_GUNS.keys())]
+    if variants & {1, 15}:  # zombies, normale haben eine Pistole
+        ids += ZOMBIE_ASSETS + ("items/guns/pistol",)
+    if 6 in variants:
+        ids.append("items/apple")
+    if 8 in variants:  # kisten
+        ids += LootDrop.LOOT_ASSETS
+    return list(dict.fromkeys(ids))
+
 
 class Game:
     __last_tick = time.perf_counter()
@@ -31,73 +148,49 @@ class Game:
     __fps_timer = .0
     __frames_drawn = 0
 
-    def __init__(self) -> None:
-        # random.seed(0)
-        # , flags=pygame.DOUBLEBUF | pygame.OPENGL)
-        self.master_screen = pygame.display.set_mode(CFG.ORG_RES)
-        self.screen = Surface(CFG.RES)
-        self.clock = pygame.time.Clock()
-        assets = {
-            "blocker": [load_image("assets/tiles/blocker.png")],
-            "sides": [load_image("assets/tiles/grass/side.png"), load_image("assets/tiles/stone/side.png"), load_image("assets/tiles/dirt/side.png")],
-            "grass": [load_image(f"assets/tiles/grass/top{i}.png") for i in range(9)],
-            # "dirt": [load_image("assets/tiles/dirt/top.png")],
-            "dirt": CFG.parse_tileset("assets/tiles/dirt/tilemap.png", as_array=True),
-            "stone": CFG.parse_tileset("assets/tiles/stone/tilemap.png", as_array=True),
-            "shadow": CFG.parse_tileset("assets/tiles/shadow/tilemap.png", as_array=True, colorkey=(255, 0, 0), alpha=125),
-            "spawners": load_images("assets/tiles/spawners", imgnames_are_ints=True),
-            "blades_cover": [load_image("assets/tiles/blades_cover.png")],
-            "grass_blades": load_images("assets/tiles/grass_blades"),
-            "player_head": load_image("assets/entities/player/head.png"),
-            "player_portrait": load_image("assets/entities/player/player_portrait.png"),
-            "zombie_head": load_image("assets/entities/enemies/zombie/head.png"),
-            "zombie_portrait": load_image("assets/entities/enemies/zombie/zombie_portrait.png"),
-            "zombie_suicide_head": load_image("assets/entities/enemies/zombie_suicide/head.png"),
-            "zombie_suicide_portrait": load_image("assets/entities/enemies/zombie_suicide/zombie_portrait.png"),
-            "creates": load_images("assets/entities/create"),
-            "deco": load_images("assets/tiles/deco"),
-            "items": {
-                "apple": load_image("assets/items/apple.png"),
-                "apple_lt": load_image("assets/items/apple_lt.png"),
-                "grenade": load_image("assets/items/grenade.png"),
-                "grenade_lt": load_image("assets/items/grenade_lt.png"),
-                "cluster_grenade": load_image("assets/items/cluster_grenade.png"),
-                "cluster_grenade_lt": load_image("assets/items/cluster_grenade_lt.png"),
-                "medkit": load_image("assets/items/medkit.png"),
-                "medkit_lt": load_image("assets/items/medkit_lt.png"),
-                "ammo": load_image("assets/items/ammo.png"),
-                "ammo_lt": load_image("assets/items/ammo_lt.png"),
-                "planks": load_images("assets/items/planks", imgnames_are_ints=True),
-                "guns": {
-                    "ring": load_image("assets/items/guns/ring.png"),
-                    "rifle": load_image("assets/items/guns/rifle.png"),
-                    "pistol": load_image("assets/items/guns/pistol.png"),
-                    "pistol_silenced": load_image("assets/items/guns/pistol_silenced.png"),
-                    "shotgun": load_image("assets/items/guns/shotgun.png"),
-                    "rocketlauncher": load_image("assets/items/guns/rocketlauncher.png"),
-                    "projectile": load_image("assets/items/guns/projectile.png"),
-                    "kriss_vector": load_image("assets/items/guns/kriss_vector.png"),
-                    "m60": load_image("assets/items/guns/m60.png"),
-                    # gun lts
-                    "ring_lt": load_image("assets/items/guns/ring_lt.png"),
-                    "rifle_lt": load_image("assets/items/guns/rifle_lt.png"),
-                    "pistol_lt": load_image("assets/items/guns/pistol_lt.png"),
-                    "pistol_silenced_lt": load_image("assets/items/guns/pistol_silenced_lt.png"),
-                    "shotgun_lt": load_image("assets/items/guns/shotgun_lt.png"),
-                    "rocketlauncher_lt": load_image("assets/items/guns/rocketlauncher_lt.png"),
-                    "kriss_vector_lt": load_image("assets/items/guns/kriss_vector_lt.png"),
-                    "m60_lt": load_image("assets/items/guns/m60_lt.png"),
-                }
-            },
-            "ANIMATIONS": {},
-        }
-        CFG.am.assets = assets
-
-        CFG.am.load_animation("assets/entities/player/config.json")
-        CFG.am.load_animation("assets/entities/enemies/zombie/config.json")
-        CFG.am.load_animation("assets/entities/enemies/zombie_suicide/config.json")
-        CFG.am.load_animation("assets/particles/config-blood.json")
-        CFG.am.load_animation("assets/particles/config-heal.json")
+    def __init__(self, headless=False, seed: int = None) -> None:
+        # alles Zufällige (Level Varianten, Kisten, Wellen, Effekte) hängt an diesem Seed
+        rng.streams.seed(seed)
+        BaseEntityABC.counter = 0  # ids gehen in den AI Scheduler ein
+        self.headless = headless
+        self.show_cache_stats = False  # F3: Speicher und Trefferquote aller Caches
+        self.startup = StartupTimer()
+        self.startup.phases["imports"] = IMPORT_MS
+        with self.startup.phase("display"):
+            if headless:
+                # kein Fenster: dummy Treiber, damit convert() geht, und eine normale Surface als Bildschirm
+                if pygame.display.get_init() and pygame.display.get_driver() != "dummy":
+                    pygame.display.quit()
+                os.environ["SDL_VIDEODRIVER"] = "dummy"
+                pygame.display.init()
+                pygame.display.set_mode((1, 1))
+                self.master_screen = Surface(CFG.ORG_RES)
+            else:
+                # , flags=pygame.DOUBLEBUF | pygame.OPENGL)
+                self.master_screen = pygame.display.set_mode(CFG.ORG_RES)
+            self.screen = Surface(CFG.RES)
+            self.clock = pygame.time.Clock()
+
+        # Bilder werden parallel dekodiert, convert() danach hier im Main Thread
+        loader = AssetLoader(timer=self.startup)
+        CFG.am.assets = loader.load(ASSET_MANIFEST)
+        loader.load_animations([
+            "assets/entities/player/config.json",
+            "assets/particles/config-blood.json",
+            "assets/particles/config-heal.json",
+        ])
+        # Frames erst bei Bedarf, parse_level und die Wellen holen sie vorher im Hintergrund (ZOMBIE_ASSETS)
+        loader.load_animations([
+            "assets/entities/enemies/zombie/config.json",
+            "assets/entities/enemies/zombie_suicide/config.json",
+        ], lazy=True)
+        # was das Level braucht dekodiert im Hintergrund, während markers und der Level Aufbau laufen
+        CFG.am.prefetch(level_assets(LEVEL_PATH))
+        with self.startup.phase("markers"):
+            # head offsets + item marker in einem Rutsch statt Pixel-Scans beim ersten Spawn
+            load_markers()
+        # alle Drehungen von Waffen, Items, Projektil und Köpfen im Hintergrund vorbereiten
+        CFG.am.premake_all_rotations()
 
         # print(CFG.am.assets)
 
@@ -136,25 +229,69 @@ class Game:
             "circle": [],  # particle = [pos: list, vel: tuple, color: tuple, alive: float, alive_time: float, size: float]
             "sparks": list(),
         }
-        self.animation_particle_group = ParticleGroup()
+        # kurzlebige Objekte werden wiederverwendet, statt bei jedem Schuss neu erstellt zu werden
+        self.pools: dict[str, ObjectPool] = {
+            "bullets": ObjectPool(Bullet, on_release=lambda b: setattr(b, "owner", None)),
+            "bullet_casings": ObjectPool(BulletCasing),
+            "sparks": ObjectPool(Spark),
+            "animation_particles": ObjectPool(AnimationParticle),
+            "planks": ObjectPool(Decal),
+        }
+        self.animation_particle_group = ParticleGroup(pool=self.pools["animation_particles"])
 
         # misc
         self.timer_manager = TimerManager()
         self.running = True
+        # Timer laufen nach der Simulationszeit, nicht nach der Uhr, und bleiben stehen, wenn das Spiel steht
+        self.sim_time = 0.0
+        set_clock(lambda: self.sim_time)
+        TimerManager.clear()
+        self.recorder: InputRecorder = None
 
         # map
         self.zombie_spawn_poses = []
-        self.tilemap = TileMap(self)
-        self.parse_level()
+        with self.startup.phase("level"):
+            self.tilemap = TileMap(self)
+            self.parse_level()
+
+        # ein gemeinsames Flowfield zum Spieler statt pathfinding pro Zombie
+        self.flow_field = FlowField(self.tilemap, threaded=True)
+        ZombieBase.flow_field = self.flow_field
+        # gemeinsames Wissen, wo der Spieler zuletzt gesehen wurde (grobes Grid, Einträge laufen ab)
+        self.blackboard = LastSeenBlackboard()
+        ZombieBase.blackboard = self.blackboard
+        self.line_of_sight = LineOfSight(self.tilemap)
+        ZombieBase.line_of_sight = self.line_of_sight
+        # fertig gestorbene Zombies werden in den Boden gebacken und aus allen Listen entfernt
+        self.corpses = CorpseLayer()
+        self.explosions = ExplosionSystem(self.entitymap)
+        # alle Arme werden einmal pro Frame zusammen gelöst (update_arms queued nur)
+        self.ik_batch = ik.IKBatchSolver()
+        ik.IKArmTwoBone.batch = self.ik_batch
+        # weit entfernte Zombies werden seltener (mit aufsummiertem dt) geupdated
+        self.ai_scheduler = AIScheduler()
 
         # print(self.zombie_spawn_poses)
+        print(self.startup.report())
+
+    def get_line_of_sight_queries(self) -> list[tuple[tuple, tuple]]:
+        player_pos = self.entities["player"][0].pos
+        queries = []
+        for zombie in self.get_entities({"enemies"}):
+            if zombie.dead or not isinstance(zombie, Zombie):
+                continue
+            if dist(zombie.pos, player_pos) <= zombie.see_dist:
+                queries.append((zombie.pos, player_pos))
+            if zombie.held_item and zombie.shoot_input:
+                queries.append((zombie.held_item.pos, zombie.target_point))
+        return queries
 
     def parse_level(self):
         def get_spawner_pos(spawner: dict, ignore_int=False):
             if ignore_int:
                 return spawner["pos"]
             return (int(spawner["pos"][0]), int(spawner["pos"][1]))
-        self.tilemap.load("map.json")
+        self.tilemap.load(LEVEL_PATH)
         self.tilemap.make_walls()
         self.tilemap.make_random_variations()
         self.tilemap.init_grass()
@@ -188,21 +325,11 @@ class Game:
                               type=f"items/{lt[spawner['variant']][0]}")
                 )
                 self.entities["items"].append(item)
-            elif spawner["variant"] in {2, 3, 4, 5, 10, 11, 12, 13}:  # items (guns)
-                lt = {
-                    2: "rifle",
-                    3: "pistol",
-                    4: "shotgun",
-                    5: "rocketlauncher",
-                    10: "pistol_silenced",
-                    11: "kriss_vector",
-                    12: "m60",
-                    13: "ring",
-                }
-                size = CFG.am.get(f"items/guns/{lt[spawner["variant"]]}").size
+            elif spawner["variant"] in SPAWNER_GUNS:  # items (guns)
+                size = CFG.am.get(f"items/guns/{SPAWNER_GUNS[spawner["variant"]]}").size
                 gun = Gun(
                     FRect(*get_spawner_pos(spawner), *size),
-                    f"items/guns/{lt[spawner['variant']]}"
+                    f"items/guns/{SPAWNER_GUNS[spawner['variant']]}"
                 )
                 self.entities["items"].append(gun)
             elif spawner["variant"] in {8}:  # kisten
@@ -224,8 +351,10 @@ class Game:
     def get_entities(self, ent_type: set[str] = {}, ignore: set[str] = {}) -> list:
         if ent_type:
             l = []
-            for type_ in ent_type:
-                l += self.entities[type_]
+            # in der Reihenfolge von self.entities, nicht der des Sets (hängt vom String-Hash ab)
+            for type_, entities in self.entities.items():
+                if type_ in ent_type:
+                    l += entities
             return l
         else:
             l = []
@@ -239,46 +368,48 @@ class Game:
         ret = []
         for i in range(n):
             vel = (
-                (random.random() * math.pi * 16 - 8*math.pi) * (random.random() * 2),
-                (random.random() * math.pi * 16 - 8*math.pi) * (random.random() * 2)
+                (rng.particles.random() * math.pi * 16 - 8*math.pi) * (rng.particles.random() * 2),
+                (rng.particles.random() * math.pi * 16 - 8*math.pi) * (rng.particles.random() * 2)
             )
             ret.append([
                 # [pos: list, vel: tuple, color: tuple, alive: float, alive_time: float]
                 list(pos),
                 vel,
-                random.choice(colors),
+                rng.particles.choice(colors),
                 0.0,
-                random.randint(4, 12)
+                rng.particles.randint(4, 12)
             ])
         return ret
 
-    def render_all_ents(self, scroll, render_scroll) -> None:
+    def render_all_ents(self, scroll, render_scroll, alpha: float = 1.0) -> None:
         # alle entities (außer: Player, gehaltene Items)
         for ent in sorted(self.get_entities(ignore={"player", "items_pickedup", "bullet_casings", "enemies"}), key=lambda x: x.y):
-            p = (ent.x - scroll[0], ent.frect.y - ent.z_offset - scroll[1])
+            ent_scroll = self.interpolated_scroll(ent, scroll, alpha)
+            p = (ent.x - ent_scroll[0], ent.frect.y - ent.z_offset - ent_scroll[1])
             if ent.outlined:
-                self.screen.blit(CFG.am.get_outlined(ent.type, angle=ent.angle_degrees, outline_color=(255, 255, 255)), (p[0]-1, p[1]-1))  # -1, -1, wegen der outline.
+                self.screen.blit(CFG.am.handle(ent.type).get_outlined(ent.angle_degrees, outline_color=(255, 255, 255)), (p[0]-1, p[1]-1))  # -1, -1, wegen der outline.
             else:
-                self.screen.blit(CFG.am.get(ent.type, angle=ent.angle_degrees, flip_x=ent.render_fliped), p)
+                self.screen.blit(CFG.am.handle(ent.type).get(ent.angle_degrees, flip_x=ent.render_fliped), p)
             # pygame.draw.rect(self.screen, (0, 255, 255), [ent.x - scroll[0], ent.y - scroll[1], *ent.frect.size], 1)
 
         # player und Zombies
         for ent in sorted(self.get_entities({"player", "enemies"}), key=lambda x: x.pos[1]-x.z_offset):
-            ent.render(self.screen, scroll, draw_rect=False)
+            ent.render(self.screen, self.interpolated_scroll(ent, scroll, alpha), draw_rect=False)
 
         for bullet_casing in self.get_entities({"bullet_casings"}):
             p1 = bullet_casing.p1
             p2 = bullet_casing.p2
+            bc_scroll = self.interpolated_scroll(bullet_casing, scroll, alpha)
             pygame.draw.line(
                 self.screen,
                 bullet_casing.color,
                 (
-                    p1[0] - scroll[0],
-                    p1[1] - scroll[1],
+                    p1[0] - bc_scroll[0],
+                    p1[1] - bc_scroll[1],
                 ),
                 (
-                    p2[0] - scroll[0],
-                    p2[1] - scroll[1],
+                    p2[0] - bc_scroll[0],
+                    p2[1] - bc_scroll[1],
                 ),
                 width=2
             )
@@ -309,378 +440,508 @@ class Game:
         for p in to_remove:
             self.particles["circle"].remove(p)
 
-        self.particles["sparks"] = [p for p in self.particles["sparks"] if p.update(dt)]
+        self.particles["sparks"] = self.pools["sparks"].keep_alive(self.particles["sparks"], lambda p: p.update(dt))
 
-    def run(self):
-        master_time = 0
-        speed = 75
-        screen_shake = [0, 0]
-        sh_amp = 7
+    def setup_run(self) -> None:
+        # was früher lokale Variablen in run() waren, damit step() und render() getrennt laufen können
+        self.master_time = 0
+        self.speed = 75
+        self.screen_shake = [0, 0]
+        self.sh_amp = 7
 
-        input_manager = Input.InputManager()
-        input_manager["hmove"] = Input.Axis(
+        self.input_manager = Input.InputManager()
+        self.input_manager["hmove"] = Input.Axis(
             (pygame.K_a,),
             (pygame.K_d,),
             Input.JoyAxis(0, 0)
         )
-        input_manager["vmove"] = Input.Axis(
+        self.input_manager["vmove"] = Input.Axis(
             (pygame.K_w,),
             (pygame.K_s,),
             Input.JoyAxis(1, 0)
         )
-        input_manager["interact"] = Input.Button(pygame.K_e, Input.JoyButtonPress(pygame.CONTROLLER_BUTTON_X, 0), just_down=True)
-        input_manager["drop"] = Input.Button(pygame.K_q, Input.JoyButtonPress(pygame.CONTROLLER_BUTTON_Y, 0), toggle=False, just_down=True)
-        input_manager["boost"] = Input.Button(pygame.K_LCTRL)
-        input_manager["reload"] = Input.Button(pygame.K_r, Input.JoyButtonPress(pygame.CONTROLLER_BUTTON_A, 0))
-        input_manager["noclip"] = Input.Button(pygame.K_TAB)
-        input_manager["fire"] = Input.Button(Input.MouseTrigger(1), Input.JoyAxisTrigger(5))
-        input_manager["scroll"] = Input.ScrollAxis()
-        joysticks = {}
-
-        def zombie_spawn_func(x: float) -> float: return 0.035*math.pow(x, 2)
+        self.input_manager["interact"] = Input.Button(pygame.K_e, Input.JoyButtonPress(pygame.CONTROLLER_BUTTON_X, 0), just_down=True)
+        self.input_manager["drop"] = Input.Button(pygame.K_q, Input.JoyButtonPress(pygame.CONTROLLER_BUTTON_Y, 0), toggle=False, just_down=True)
+        self.input_manager["boost"] = Input.Button(pygame.K_LCTRL)
+        self.input_manager["reload"] = Input.Button(pygame.K_r, Input.JoyButtonPress(pygame.CONTROLLER_BUTTON_A, 0))
+        self.input_manager["noclip"] = Input.Button(pygame.K_TAB)
+        self.input_manager["fire"] = Input.Button(Input.MouseTrigger(1), Input.JoyAxisTrigger(5))
+        self.input_manager["scroll"] = Input.ScrollAxis()
+        self.joysticks = {}
+        # Eingaben, die nur einen Frame lang da sind, bis zum nächsten Simulationsschritt merken
+        self.pending_pickup = False
+        self.pending_drop = False
+        self.pending_inventory_cycle = 0
+
+        self.n_zombies_spawned = 0
+        self.zombie_size = (9, 7)
+        self.n_zombies_killed = 0
+
+        self.global_timer = Timer(64, True)
+
+        self.lost = False
+        self.won = False
+
+        self.last_input = self.sample_input()
+        self.scroll = self.get_scroll(self.entities["player"][0].pos, self.last_input.mouse)
+        self.sim_accumulator = 0.0
+        self.prev_positions: dict = {}
 
-        n_zombies_spawned = 0
-        zombie_size = (9, 7)
-        n_zombies_killed = 0
-
-        global_timer = Timer(64, True)
-
-        lost = False
-        won = False
+    def run(self):
+        self.setup_run()
 
         while self.running:
-            self.screen.fill((0, 150, 200))
-            dt = self.clock.tick(0) * 0.001
-            dt = time.perf_counter() - self.__last_tick
+            self.clock.tick(0)
+            frame_dt = time.perf_counter() - self.__last_tick
             self.__last_tick = time.perf_counter()
-            self.__fps_timer += dt
-            master_time += dt * 100
-
-            # region calc scroll
-            # _mx, _my = CFG.get_mouse_pos(s=CFG.DOWNSCALE_FACTOR)
-            _mx, _my = input_manager.get_pos(downscale_factor=CFG.DOWNSCALE_FACTOR)
-            _look_factor = 3.5
-            _look_factor_scaled = _look_factor * 2
-            _mx, _my = _mx / _look_factor, _my / _look_factor
-            scroll = (
-                self.entities["player"][0].frect.x - CFG.RES[0] / 2 + (_mx - CFG.RES[0]/_look_factor_scaled),
-                self.entities["player"][0].frect.y - CFG.RES[1] / 2 + (_my - CFG.RES[1]/_look_factor_scaled),
-            )
-            render_scroll = (int(scroll[0]), int(scroll[1]))
-            # endregion
-            viewport = pygame.Rect(render_scroll[0], render_scroll[1], CFG.RES[0], CFG.RES[1])  # * später hier WIDTH & HEIGHT als variablen passen, damit man das Fenster resizen kann
-            self.timer_manager.update()
-
-            # self.tilemap.shadows.clear()
-            # self.tilemap.make_shadow(shadow_dir=(math.sin(master_time/100), math.cos(master_time/100)))
-
-            def rot_function(x, y) -> int: return int(math.sin(master_time / 60 + x / 100 + y / 250 + x / (y * 2 + .001)) * 25)
-            # def rot_function(x, y): return random.random() * 180 - 90
-            all_entity_rects = [ent.frect for ent in self.get_entities()]
-            self.tilemap.update_grass(all_entity_rects, 1.5, 7, dt)
-            self.tilemap.rotate_grass(rot_function=rot_function)
-
-            if lost or won:
-                dt = 0.0
-                global_timer.pause()
-
-            if global_timer.ended:
-                if n_zombies_killed >= 64:
-                    won = True
-                else:
-                    lost = True
+            self.__fps_timer += frame_dt
+
+            self.handle_events()
+
+            # Simulation mit festem dt, gerendert wird zwischen den letzten beiden Schritten interpoliert
+            self.sim_accumulator += frame_dt
+            steps = 0
+            while self.sim_accumulator >= CFG.SIM_DT and steps < CFG.MAX_SIM_STEPS_PER_FRAME:
+                self.step(CFG.SIM_DT)
+                self.sim_accumulator -= CFG.SIM_DT
+                steps += 1
+            if steps == CFG.MAX_SIM_STEPS_PER_FRAME:
+                # Rückstand verwerfen: lieber kurz langsamer als immer mehr Schritte pro Frame
+                self.sim_accumulator = min(self.sim_accumulator, CFG.SIM_DT)
+
+            self.render(self.sim_accumulator / CFG.SIM_DT)
+
+        if self.recorder is not None:
+            self.recorder.save(self.record_path)
+            print(f"saved replay {self.record_path}: {len(self.recorder.frames)} steps, seed {self.recorder.seed}")
+
+    def advance(self, events: list[pygame.Event] = None, render=True, frame: InputFrame = None, dt: float = CFG.SIM_DT) -> None:
+        """
+        Exactly one simulation step, no matter how much wall time passed. For headless runs (benchmark, replays).
+        Takes either scripted `events` or a recorded input `frame`. `setup_run` has to be called once before.
+        """
+        if events is not None:
+            self.handle_events(events)
+        self.step(dt, frame)
+        if render:
+            self.render()
+        else:
+            self.ik_batch.flush()
+
+    def get_scroll(self, player_pos: tuple, mouse_pos: tuple) -> tuple[float, float]:
+        # _mx, _my = CFG.get_mouse_pos(s=CFG.DOWNSCALE_FACTOR)
+        _mx, _my = mouse_pos
+        _look_factor = 3.5
+        _look_factor_scaled = _look_factor * 2
+        _mx, _my = _mx / _look_factor, _my / _look_factor
+        return (
+            player_pos[0] - CFG.RES[0] / 2 + (_mx - CFG.RES[0]/_look_factor_scaled),
+            player_pos[1] - CFG.RES[1] / 2 + (_my - CFG.RES[1]/_look_factor_scaled),
+        )
 
-            # region events
+    def store_previous_positions(self) -> None:
+        self.prev_positions = {ent: ent.pos for ent in self.get_entities(INTERPOLATED_ENTITIES)}
+
+    def interpolated_pos(self, ent, alpha: float) -> tuple[float, float]:
+        prev = self.prev_positions.get(ent)
+        pos = ent.pos
+        if prev is None:
+            return pos
+        return (prev[0] + (pos[0] - prev[0]) * alpha, prev[1] + (pos[1] - prev[1]) * alpha)
+
+    def interpolated_scroll(self, ent, scroll: tuple, alpha: float) -> tuple[float, float]:
+        # Statt die Position zu ändern, wird die scroll verschoben. So landen auch Arme, Kopf und Waffe an der interpolierten Stelle.
+        prev = self.prev_positions.get(ent)
+        if prev is None:
+            return scroll
+        pos = ent.pos
+        return (scroll[0] + (pos[0] - prev[0]) * (1 - alpha), scroll[1] + (pos[1] - prev[1]) * (1 - alpha))
+
+    def handle_events(self, events: list[pygame.Event] = None) -> None:
+        """Without `events` the real event queue is polled, headless runs pass scripted events instead."""
+        if events is None:
             events = pygame.event.get()
-            input_manager.update(events)
-
-            reload = input_manager["reload"]
-            boost = input_manager["boost"]
-            movement = [input_manager["hmove"].value * speed, input_manager["vmove"].value * speed]
-            pickup = input_manager["interact"].pressed()
-            drop = input_manager["drop"].pressed()
-
-            for event in events:
-                # Handle hotplugging
-                if event.type == pygame.JOYDEVICEADDED:
-                    # This event will be generated when the program starts for every
-                    # joystick, filling up the list without needing to create them manually.
-                    joy = pygame.joystick.Joystick(event.device_index)
-                    joysticks[joy.get_instance_id()] = joy
-                    print(f"Joystick {joy.get_instance_id()} connencted")
-
-                if event.type == pygame.JOYDEVICEREMOVED:
-                    del joysticks[event.instance_id]
-                    print(f"Joystick {event.instance_id} disconnected")
-                if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
-                    self.running = False
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_z:
-                        self.entities["player"].pos = (200, 100)
-            # endregion
-
-            # region player update
-            self.entities["player"][0].update(dt, movement, input_manager["scroll"].value, boost=False)
-            if self.entities["player"][0].health <= 0:
-                lost = True
-            # endregion
-
-            handle_collision(dt, self.get_entities(ent_type={"player", "enemies"}), self.tilemap)
-
-            explosion_poses: set[tuple] = set()
-
-            # region crate update
-            for create in self.get_entities({"objects"}):
-                create_ret = create.update(dt)
-                if not create_ret["alive"]:
-                    for dropped_item in create_ret["items"]:
-                        self.entities["items"].append(dropped_item)
-                        print(dropped_item.pos, dropped_item.type)
-                    self.entities["objects"].remove(create)
-                else:
-                    for plank_data in create_ret["planks"]:
-                        d = Decal(FRect(*plank_data[0], 6, 2), type="items/planks", vel=plank_data[1])
-                        d.type = f"{d.base_type}/{plank_data[2]}"
-                        self.entities["decals"].append(d)
-            # endregion
-
-            # region Bullets colls
-            for bullet_to_remove, effect_data, killed in handle_bullet_collision(self.get_entities({"player", "enemies", "objects"}), self.projectilemap, self.tilemap):
-                try:
-                    self.entities["projectiles"].remove(bullet_to_remove)
-                except ValueError:  # eigentlich nicht gut, das so zu machen, aber bei gamejam ist ok
-                    pass
+        self.input_manager.update(events)
+
+        self.pending_pickup |= self.input_manager["interact"].pressed()
+        self.pending_drop |= self.input_manager["drop"].pressed()
+        self.pending_inventory_cycle += self.input_manager["scroll"].value
+
+        for event in events:
+            # Handle hotplugging
+            if event.type == pygame.JOYDEVICEADDED:
+                # This event will be generated when the program starts for every
+                # joystick, filling up the list without needing to create them manually.
+                joy = pygame.joystick.Joystick(event.device_index)
+                self.joysticks[joy.get_instance_id()] = joy
+                print(f"Joystick {joy.get_instance_id()} connencted")
+
+            if event.type == pygame.JOYDEVICEREMOVED:
+                del self.joysticks[event.instance_id]
+                print(f"Joystick {event.instance_id} disconnected")
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                self.running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_z:
+                    self.entities["player"].pos = (200, 100)
+                elif event.key == pygame.K_F3:
+                    self.show_cache_stats = not self.show_cache_stats
+
+    def start_recording(self, path: str) -> None:
+        """The input of every step is saved to `path` (see Scripts/replay.py) when `run` ends."""
+        self.recorder = InputRecorder(rng.streams.base_seed, CFG.SIM_DT)
+        self.record_path = path
+        self.make_deterministic()
+
+    def make_deterministic(self) -> None:
+        """Turns off everything whose result depends on timing instead of the input. For recording and replaying."""
+        # das Zeitbudget hängt von der Rechnerlast ab, beim Abspielen muss jeder Zombie gleich oft dran sein
+        self.ai_scheduler.frame_budget_ms = None
+        # im Thread wird das Flow Field irgendwann fertig, synchron im selben Schritt wie die Anfrage
+        if self.flow_field.threaded:
+            self.flow_field.stop()
+            self.flow_field.threaded = False
+
+    def sample_input(self) -> InputFrame:
+        """What the next step sees of the input. Consumes the latched one-frame inputs."""
+        input_manager = self.input_manager
+        frame = InputFrame(
+            hmove=input_manager["hmove"].value,
+            vmove=input_manager["vmove"].value,
+            mouse=input_manager.get_pos(downscale_factor=CFG.DOWNSCALE_FACTOR),
+            fire=bool(input_manager["fire"]),
+            reload=bool(input_manager["reload"]),
+            pickup=bool(self.pending_pickup),
+            drop=bool(self.pending_drop),
+            inventory_cycle=self.pending_inventory_cycle,
+        )
+        self.pending_pickup = self.pending_drop = False
+        self.pending_inventory_cycle = 0
+        return frame
+
+    def step(self, dt: float, frame: InputFrame = None) -> None:
+        """`frame`: recorded input to use instead of the live input."""
+        if frame is None:
+            frame = self.sample_input()
+        if self.recorder is not None:
+            self.recorder.record(dt, frame)
+        self.last_input = frame
+
+        self.store_previous_positions()
+        self.master_time += dt * 100
+        # ist die Runde vorbei, bleibt die Simulationszeit und damit jeder Timer stehen
+        self.sim_time += 0.0 if self.lost or self.won else dt
+
+        # für das Zielen (Maus ist in screenspace) und die Zombie LOD
+        self.scroll = scroll = self.get_scroll(self.entities["player"][0].pos, frame.mouse)
+        self.timer_manager.update()
+
+        all_entity_rects = [ent.frect for ent in self.get_entities()]
+        self.tilemap.update_grass(all_entity_rects, 1.5, 7, dt)
+
+        if self.lost or self.won:
+            dt = 0.0
+            self.global_timer.pause()
+
+        if self.global_timer.ended:
+            if self.n_zombies_killed >= 64:
+                self.won = True
+            else:
+                self.lost = True
+
+        movement = [frame.hmove * self.speed, frame.vmove * self.speed]
+
+        # region player update
+        self.entities["player"][0].update(dt, movement, frame.inventory_cycle, boost=False)
+        if self.entities["player"][0].health <= 0:
+            self.lost = True
+        # endregion
+
+        handle_collision(dt, self.get_entities(ent_type={"player", "enemies"}), self.tilemap)
+        self.flow_field.update(self.entities["player"][0].center)
+        self.blackboard.update(dt)
+        # alle Sichtlinien dieses Schritts (Zombie -> Spieler, Lauf -> Ziel) in einem Rutsch
+        self.line_of_sight.new_frame()
+        self.line_of_sight.prefetch(self.get_line_of_sight_queries())
+
+        # region crate update
+        for create in self.get_entities({"objects"}):
+            create_ret = create.update(dt)
+            if not create_ret["alive"]:
+                for dropped_item in create_ret["items"]:
+                    self.entities["items"].append(dropped_item)
+                    print(dropped_item.pos, dropped_item.type)
+                self.entities["objects"].remove(create)
+            else:
+                for plank_data in create_ret["planks"]:
+                    d = self.pools["planks"].acquire(FRect(*plank_data[0], 6, 2), type="items/planks", vel=plank_data[1])
+                    d.type = f"{d.base_type}/{plank_data[2]}"
+                    self.entities["decals"].append(d)
+        # endregion
+
+        # region Bullets colls
+        for bullet_to_remove, effect_data, killed in handle_bullet_collision(self.get_entities({"player", "enemies", "objects"}), self.projectilemap, self.tilemap):
+            try:
+                self.entities["projectiles"].remove(bullet_to_remove)
+                self.pools["bullets"].release(bullet_to_remove)
+            except ValueError:  # eigentlich nicht gut, das so zu machen, aber bei gamejam ist ok
+                pass
+            for i in range(-2, 2+1):
+                new_angle = -effect_data[1] + i * 0.2
+                self.particles["sparks"].append(self.pools["sparks"].acquire(
+                    effect_data[0], new_angle, 7, decay_speed=2
+                ))
+            if effect_data[2]:  # bool ob mit ents collided -> blood partikel spawnen
                 for i in range(-2, 2+1):
-                    new_angle = -effect_data[1] + i * 0.2
-                    self.particles["sparks"].append(Spark(
-                        effect_data[0], new_angle, 7, decay_speed=2
-                    ))
-                if effect_data[2]:  # bool ob mit ents collided -> blood partikel spawnen
+                    new_angle = -effect_data[1] + i * 0.4 * rng.particles.random() * 3
+                    p = self.pools["animation_particles"].acquire(effect_data[0], vector2d_mult(vector2d_from_angle(new_angle), 50), "blood", "blood")
+                    self.animation_particle_group.add(p)
+            if killed:  # bool ob einen kill gemacht
+                self.n_zombies_killed += 1
+        # endregion
+
+        # region items update
+        if (pickedup_item := handle_pickup(self.entities["player"][0], self.get_entities({"items"}), frame.pickup, ignore_items=self.get_entities({"items_pickedup", }))):
+            print("pickedup:", pickedup_item)
+            self.entities["items"].remove(pickedup_item)
+            self.entities["items_pickedup"].append(pickedup_item)
+            pickedup_item.outlined = False
+        if (dropped_item := handle_drop(self.entities["player"][0], self.entitymap, frame.drop)):
+            print("dropped:", dropped_item)
+            self.entities["items_pickedup"].remove(dropped_item)
+            self.entities["items"].append(dropped_item)
+        handle_item_outlines(self.entities["player"][0], self.get_entities({"items"}))
+        item_update_ret = update_held_items(self.get_entities({"items_pickedup"}), dt, reload_input=frame.reload, scroll=scroll, shoot_input=frame.fire, mPos=frame.mouse)
+        for item, data in item_update_ret.items():
+            if isinstance(item, Gun):
+                bullets_to_spawn = data["use"]
+                bullet_spawn_pos = item.get_bullet_spawn_pos()
+                for bullet in bullets_to_spawn:
+                    surf = PROJECTILE_ASSET.get(bullet["angle"])
+                    radius = surf.get_frect(center=bullet_spawn_pos)
+                    b = self.pools["bullets"].acquire(pygame.FRect(radius.x, radius.y, 5, 5), bullet["angle"], bullet["dmg"], owner=item.owner, speed=bullet["speed"])
+                    self.entities["projectiles"].append(b)
+                    bc_maxfall = 15
+                    bc = self.pools["bullet_casings"].acquire(pygame.FRect(*item.bulletcasing_pos, 1, 1), 3, bc_maxfall, bullet["angle"], speed=-200)
+                    self.entities["bullet_casings"].append(bc)
+                    self.particles["circle"].append([
+                        # [pos: list, vel: tuple, color: tuple, alive: float, alive_time: float]
+                        list(item.get_bullet_spawn_pos()),
+                        (item.direction[0] * 15 + rng.particles.random() * 10, item.direction[1] * 10 - 30 - rng.particles.random() * 10),
+                        rng.particles.choice([(70, 70, 70), (100, 100, 100), (150, 150, 150)]),
+                        0.0,
+                        2.0
+                    ])
+                    self.screen_shake[0] = item.stats.screen_shake_duration
+                    self.screen_shake[1] = item.stats.screen_shake_duration
+
+                    _a = bullet["angle"]
+                    for i in range(-2, 2):
+                        s = self.pools["sparks"].acquire(vector2d_add(bullet_spawn_pos, vector2d_mult(vector2d_from_angle(_a), 7.0)), _a + i * 0.3, 4.0, decay_speed=2.0)
+                        self.particles["sparks"].append(s)
+            elif isinstance(item, Medkit):
+                healamount = data["use"]
+                if healamount:
+                    item.owner.heal(healamount)
                     for i in range(-2, 2+1):
-                        new_angle = -effect_data[1] + i * 0.4 * random.random() * 3
-                        p = AnimationParticle(effect_data[0], vector2d_mult(vector2d_from_angle(new_angle), 50), "blood", "blood")
+                        new_angle = rng.particles.choice((-1, 1)) * rng.particles.random() * math.pi
+                        p = self.pools["animation_particles"].acquire(item.owner.center, vector2d_mult(vector2d_from_angle(new_angle), 50), "heal", "heal")
                         self.animation_particle_group.add(p)
-                if killed:  # bool ob einen kill gemacht
-                    n_zombies_killed += 1
-            # endregion
-
-            # region items update
-            if (pickedup_item := handle_pickup(self.entities["player"][0], self.get_entities({"items"}), pickup, ignore_items=self.get_entities({"items_pickedup", }))):
-                print("pickedup:", pickedup_item)
-                self.entities["items"].remove(pickedup_item)
-                self.entities["items_pickedup"].append(pickedup_item)
-                pickedup_item.outlined = False
-            if (dropped_item := handle_drop(self.entities["player"][0], self.entitymap, drop)):
-                print("dropped:", dropped_item)
-                self.entities["items_pickedup"].remove(dropped_item)
-                self.entities["items"].append(dropped_item)
-            handle_item_outlines(self.entities["player"][0], self.get_entities({"items"}))
-            item_update_ret = update_held_items(self.get_entities({"items_pickedup"}), dt, reload_input=reload, scroll=scroll, shoot_input=input_manager["fire"], mPos=input_manager.get_pos())
-            for item, data in item_update_ret.items():
-                if isinstance(item, Gun):
-                    bullets_to_spawn = data["use"]
-                    bullet_spawn_pos = item.get_bullet_spawn_pos()
-                    for bullet in bullets_to_spawn:
-                        surf = CFG.am.get("items/guns/projectile", angle=bullet["angle"])
-                        radius = surf.get_frect(center=bullet_spawn_pos)
-                        b = Bullet(pygame.FRect(radius.x, radius.y, 5, 5), bullet["angle"], bullet["dmg"], owner=item.owner, speed=bullet["speed"])
-                        self.entities["projectiles"].append(b)
-                        bc_maxfall = 15
-                        bc = BulletCasing(pygame.FRect(*item.bulletcasing_pos, 1, 1), 3, bc_maxfall, bullet["angle"], speed=-200)
-                        self.entities["bullet_casings"].append(bc)
-                        self.particles["circle"].append([
-                            # [pos: list, vel: tuple, color: tuple, alive: float, alive_time: float]
-                            list(item.get_bullet_spawn_pos()),
-                            (item.direction[0] * 15 + random.random() * 10, item.direction[1] * 10 - 30 - random.random() * 10),
-                            random.choice([(70, 70, 70), (100, 100, 100), (150, 150, 150)]),
-                            0.0,
-                            2.0
-                        ])
-                        screen_shake[0] = item.stats.screen_shake_duration
-                        screen_shake[1] = item.stats.screen_shake_duration
-
-                        _a = bullet["angle"]
-                        for i in range(-2, 2):
-                            s = Spark(vector2d_add(bullet_spawn_pos, vector2d_mult(vector2d_from_angle(_a), 7.0)), _a + i * 0.3, 4.0, decay_speed=2.0)
-                            self.particles["sparks"].append(s)
-                elif isinstance(item, Medkit):
-                    healamount = data["use"]
-                    if healamount:
-                        item.owner.heal(healamount)
-                        for i in range(-2, 2+1):
-                            new_angle = random.choice((-1, 1)) * random.random() * math.pi
-                            p = AnimationParticle(effect_data[0], vector2d_mult(vector2d_from_angle(new_angle), 50), "heal", "heal")
-                            self.animation_particle_group.add(p)
-
-            # endregion
-
-            # region gegner update
-            for zombie in self.get_entities({"enemies"}):
-                zombie_update_ret = zombie.update(dt, self.entities["player"][0].pos, self.entitymap)
-                if zombie_update_ret["type"] == "zombie":
-                    for item in zombie_update_ret["pickedup_items"]:
-                        # print(item)
-                        try:
-                            self.entities["items"].remove(item)
-                            self.entities["items_pickedup"].append(item)
-                        except ValueError:
-                            pass
-                    for item in zombie_update_ret["dropped_items"]:
-                        # print(item)
-                        try:
-                            self.entities["items_pickedup"].remove(item)
-                            self.entities["items"].append(item)
-                        except ValueError:
-                            pass
-                        # item.outlined = False
-                elif zombie_update_ret["type"] == "zombie_suicide":
-                    if zombie_update_ret["explode"]:
-                        self.particles["circle"].extend(self.make_explosion_particles(zombie.center, int(zombie_update_ret["radius"]*3), [(80, 80, 80), (100, 100, 100), (175, 175, 175), (40, 40, 40)]))
-                        zombie.kill()
-                        sh_amp = 32
-                        screen_shake[0] = 0.9
-                        screen_shake[1] = 0.9
-                        explosion_poses.add((zombie.center, zombie_update_ret["radius"]))
-            # endregion
-
-            # region decals update
-            _decals_to_remove = []
-            for decal in self.get_entities({"decals"}):
-                if decal.base_type != "items/planks":
-                    continue
 
-                decal.update(dt)
-                decal.x += decal.velocity[0] * dt
-                decal.y += decal.velocity[1] * dt
-
-                if decal.alive > 1.5:
-                    _decals_to_remove.append(decal)
-            for decal in _decals_to_remove:
-                self.entities["decals"].remove(decal)
-            # endregion
-
-            self.update_entitymaps()
-
-            # region explosion damage
-            for ex_pos, radius in explosion_poses:
-                tl = (ex_pos[0] - radius, ex_pos[1] - radius)
-                r2 = radius * radius
-                size = (int(r2), int(r2))
-
-                # print(ex_pos, radius, tl, size)
-
-                for entity_to_dmg_data in self.entitymap.query(tl, size=size):
-                    entity_to_dmg = entity_to_dmg_data[1]["ent"]
-                    if not entity_to_dmg.damageable:
-                        continue
-                    # print(entity_to_dmg)
-                    if (dist_from_ex := dist(entity_to_dmg.frect.center, ex_pos)) < radius:
-                        entity_to_dmg.damage((radius / (dist_from_ex+1)) * radius*3.5, vector2d_sub(ex_pos, entity_to_dmg.frect.center))
-            # endregion
-
-            if (n_to_spawn := int(zombie_spawn_func(master_time / 100)) - n_zombies_spawned):
-                # print(n_to_spawn, Player.head_pos_cache_per_type)
-                for n in range(n_to_spawn):
-                    pos = random.choice(self.zombie_spawn_poses)
-                    if random.randint(0, 100) <= 25:
-                        zombie = SucideZombie(FRect(pos[0], pos[1], *zombie_size))
-                    else:
-                        zombie = Zombie(FRect(pos[0], pos[1], *zombie_size))
-                    n_zombies_spawned += 1
-                    zombie.set_animation_state("spawn")
-                    self.entities["enemies"].append(zombie)
-
-            self.update_particles(dt)
-            self.animation_particle_group.update(dt)
-
-            self.tilemap.render(self.screen, offset=render_scroll, render_offgrid=True, main_layer=None, render_layer=[0])
-
-            self.render_all_ents(scroll, render_scroll)
-            self.animation_particle_group.render(self.screen, offset=scroll)
-
-            # ? debug_draw_entitymap
-            # s = self.entitymap.entity_hashmap.cell_size
-            # for cell_data in self.entitymap.get_cells():
-            #     pygame.draw.rect(self.screen, (255, 255, 0), [cell_data[0][0] - scroll[0], cell_data[0][1]-scroll[1], s, s], 1)
-
-            self.tilemap.render(self.screen, offset=render_scroll, render_offgrid=False, main_layer=None, render_layer=[1])
-
-            # region rerender head for human entities
-            for human_ent in self.get_entities({"player", "enemies"}):
-                rerender_head = False
-                p0 = (
-                    int((human_ent.frect.x + sign(human_ent.velocity[0]) * CFG.TILESIZE) // CFG.TILESIZE),
-                    int((human_ent.frect.y - CFG.TILESIZE) // CFG.TILESIZE)
-                )
-                p1 = (
-                    int((human_ent.frect.x) // CFG.TILESIZE),
-                    int((human_ent.frect.y - CFG.TILESIZE*2) // CFG.TILESIZE)
-                )
-                p11 = (
-                    int((human_ent.frect.x + sign(human_ent.velocity[0]) * CFG.TILESIZE) // CFG.TILESIZE),
-                    int((human_ent.frect.y - CFG.TILESIZE*2) // CFG.TILESIZE)
-                )
-                tile_above = self.tilemap.get_tile(p1, layer=1)
-                if tile_above:
-                    rerender_head = True
-                tile_above2 = self.tilemap.get_tile(p11, layer=1)
-                if tile_above2:
-                    rerender_head = True
-                tile_right = self.tilemap.get_tile(p0, layer=1)
-                if tile_right and tile_right["type"] == "sides":
-                    rerender_head = True
-                # pygame.draw.rect(self.screen, (255, 255, 0), [p0[0]*CFG.TILESIZE - scroll[0], p0[1]*CFG.TILESIZE - scroll[1], CFG.TILESIZE, CFG.TILESIZE], 1)
-                # pygame.draw.rect(self.screen, (255, 255, 0), [p1[0]*CFG.TILESIZE - scroll[0], p1[1]*CFG.TILESIZE - scroll[1], CFG.TILESIZE, CFG.TILESIZE], 1)
-
-                if rerender_head:
-                    human_ent.render_head(self.screen, scroll)
-            # endregion
-
-            self.tilemap.render_shadows(self.screen, offset=render_scroll)
-
-            self.entities["player"][0].render_hud(self.screen)
-
-            # for ent in self.get_entities({"items"}):
-            #     r = 30
-            #     pygame.draw.circle(self.screen, (0, 255, 255), (ent.center[0] - scroll[0], ent.center[1] - scroll[1]), r, 1)
-
-            self.entities["projectiles"] = [b for b in self.get_entities({"projectiles"}) if b.update(dt)]
-            self.entities["bullet_casings"] = [bc for bc in self.get_entities({"bullet_casings"}) if bc.update(dt)]
-
-            screen_shake[0] = max(screen_shake[0] - dt, 0)
-            screen_shake[1] = max(screen_shake[1] - dt, 0)
-            sh_amp = max(sh_amp - dt * 25, 7)
-
-            pygame.draw.circle(self.screen, (255, 255, 255), input_manager.get_pos(CFG.DOWNSCALE_FACTOR), 4)
-
-            # self.screen.blit(font.render(f"FPS: {self.get_fps():.0f}, {self.clock.get_fps():.0f} pos: {self.entities["player"][0].tile_pos} {self.entities["player"][0].render_fliped} {self.entities["player"][0].type}", False, (255, 255, 255), (0, 0, 0)), (0, 0))
-            self.screen.blit(font.render(f"FPS: {self.get_fps():.0f}\nTIME: {global_timer.remaining():.0f}\nZOMBIES: {n_zombies_spawned-n_zombies_killed}\nKILLS: {n_zombies_killed}", False, (255, 255, 255)), (5, 20))
-            if lost:
-                s = font.render("You Lost", False, (255, 255, 255))
-                self.screen.blit(s, (self.screen.width//2 - s.width//2, self.screen.height//2 - s.height//2))
-            elif won:
-                s = font.render("You Won", False, (255, 255, 255))
-                self.screen.blit(s, (self.screen.width//2 - s.width//2, self.screen.height//2 - s.height//2))
-
-            r = [5, 5, self.screen.width - 10, 10]
-            pygame.draw.rect(self.screen, (255, 255, 255), r, 1)
-            r = [6, 6, max(1, (self.screen.width - 12) * global_timer.remaining() / global_timer.duration), 8]
-            draw_rect_alpha(self.screen, (255, 255, 255), r, 125)
-
-            render_offset = (
-                random.random() * sh_amp - sh_amp/2 if screen_shake[0] else 0,
-                random.random() * sh_amp - sh_amp/2 if screen_shake[1] else 0
+        # endregion
+
+        # region gegner update
+        player_pos = self.entities["player"][0].pos
+        camera_center = (scroll[0] + CFG.RES[0] / 2, scroll[1] + CFG.RES[1] / 2)
+        def update_zombie(zombie, zombie_dt): return zombie.update(zombie_dt, player_pos, self.entitymap)
+        for zombie, zombie_update_ret in self.ai_scheduler.run(self.get_entities({"enemies"}), dt, camera_center, update_zombie):
+            if zombie_update_ret["type"] == "zombie":
+                for item in zombie_update_ret["pickedup_items"]:
+                    # print(item)
+                    try:
+                        self.entities["items"].remove(item)
+                        self.entities["items_pickedup"].append(item)
+                    except ValueError:
+                        pass
+                for item in zombie_update_ret["dropped_items"]:
+                    # print(item)
+                    try:
+                        self.entities["items_pickedup"].remove(item)
+                        self.entities["items"].append(item)
+                    except ValueError:
+                        pass
+                    # item.outlined = False
+            elif zombie_update_ret["type"] == "zombie_suicide":
+                if zombie_update_ret["explode"]:
+                    self.explosions.add(zombie.center, zombie_update_ret["radius"], source=zombie)
+
+        # Leichen, die nichts mehr tun, kommen in den Decal Layer
+        for zombie in [z for z in self.get_entities({"enemies"}) if not z.needs_update]:
+            self.corpses.bake(zombie)
+            self.entities["enemies"].remove(zombie)
+        self.corpses.update(dt)
+        # endregion
+
+        # region decals update
+        _decals_to_remove = []
+        for decal in self.get_entities({"decals"}):
+            if decal.base_type != "items/planks":
+                continue
+
+            decal.update(dt)
+            decal.x += decal.velocity[0] * dt
+            decal.y += decal.velocity[1] * dt
+
+            if decal.alive > 1.5:
+                _decals_to_remove.append(decal)
+        for decal in _decals_to_remove:
+            self.entities["decals"].remove(decal)
+            self.pools["planks"].release(decal)
+        # endregion
+
+        self.update_entitymaps()
+
+        # region explosion damage
+        # alle Explosionen des Schritts auf einmal, Kettenreaktionen inklusive
+        for explosion in self.explosions.resolve():
+            self.particles["circle"].extend(self.make_explosion_particles(explosion.pos, int(explosion.radius*3), [(80, 80, 80), (100, 100, 100), (175, 175, 175), (40, 40, 40)]))
+            if explosion.source is not None:
+                explosion.source.kill()
+            self.sh_amp = 32
+            self.screen_shake[0] = 0.9
+            self.screen_shake[1] = 0.9
+        # endregion
+
+        if int(zombie_spawn_func((self.master_time + ZOMBIE_PREFETCH_LEAD) / 100)) > self.n_zombies_spawned:
+            CFG.am.prefetch(ZOMBIE_ASSETS)  # schon geladene/gestartete werden übersprungen
+        if (n_to_spawn := int(zombie_spawn_func(self.master_time / 100)) - self.n_zombies_spawned):
+            # print(n_to_spawn, Player.head_pos_cache_per_type)
+            for n in range(n_to_spawn):
+                pos = rng.spawn.choice(self.zombie_spawn_poses)
+                if rng.spawn.randint(0, 100) <= 25:
+                    zombie = SucideZombie(FRect(pos[0], pos[1], *self.zombie_size))
+                else:
+                    zombie = Zombie(FRect(pos[0], pos[1], *self.zombie_size))
+                self.n_zombies_spawned += 1
+                zombie.set_animation_state("spawn")
+                self.entities["enemies"].append(zombie)
+
+        self.update_particles(dt)
+        self.animation_particle_group.update(dt)
+
+        self.entities["projectiles"] = self.pools["bullets"].keep_alive(self.entities["projectiles"], lambda b: b.update(dt))
+        self.entities["bullet_casings"] = self.pools["bullet_casings"].keep_alive(self.entities["bullet_casings"], lambda bc: bc.update(dt))
+
+        self.screen_shake[0] = max(self.screen_shake[0] - dt, 0)
+        self.screen_shake[1] = max(self.screen_shake[1] - dt, 0)
+        self.sh_amp = max(self.sh_amp - dt * 25, 7)
+
+    def render(self, alpha: float = 1.0) -> None:
+        """`alpha`: how far (0..1) the render state is between the previous and the current simulation step."""
+        CFG.am.publish_prebaked()  # fertig gebackene Drehungen in den Cache
+        CFG.am.finish_prefetched()  # fertig dekodierte lazy Assets in den Baum
+        self.screen.fill((0, 150, 200))
+
+        scroll = self.get_scroll(self.interpolated_pos(self.entities["player"][0], alpha), self.last_input.mouse)
+        render_scroll = (int(scroll[0]), int(scroll[1]))
+        viewport = pygame.Rect(render_scroll[0], render_scroll[1], CFG.RES[0], CFG.RES[1])  # * später hier WIDTH & HEIGHT als variablen passen, damit man das Fenster resizen kann
+
+        # self.tilemap.shadows.clear()
+        # self.tilemap.make_shadow(shadow_dir=(math.sin(self.master_time/100), math.cos(self.master_time/100)))
+
+        def rot_function(x, y) -> int: return int(math.sin(self.master_time / 60 + x / 100 + y / 250 + x / (y * 2 + .001)) * 25)
+        # def rot_function(x, y): return random.random() * 180 - 90
+        self.tilemap.rotate_grass(rot_function=rot_function)
+
+        self.ik_batch.flush()
+
+        self.tilemap.render(self.screen, offset=render_scroll, render_offgrid=True, main_layer=None, render_layer=[0])
+        self.corpses.render(self.screen, offset=render_scroll)
+
+        self.render_all_ents(scroll, render_scroll, alpha)
+        self.animation_particle_group.render(self.screen, offset=scroll)
+
+        # ? debug_draw_entitymap
+        # s = self.entitymap.entity_hashmap.cell_size
+        # for cell_data in self.entitymap.get_cells():
+        #     pygame.draw.rect(self.screen, (255, 255, 0), [cell_data[0][0] - scroll[0], cell_data[0][1]-scroll[1], s, s], 1)
+
+        self.tilemap.render(self.screen, offset=render_scroll, render_offgrid=False, main_layer=None, render_layer=[1])
+
+        # region rerender head for human entities
+        for human_ent in self.get_entities({"player", "enemies"}):
+            rerender_head = False
+            p0 = (
+                int((human_ent.frect.x + sign(human_ent.velocity[0]) * CFG.TILESIZE) // CFG.TILESIZE),
+                int((human_ent.frect.y - CFG.TILESIZE) // CFG.TILESIZE)
             )
+            p1 = (
+                int((human_ent.frect.x) // CFG.TILESIZE),
+                int((human_ent.frect.y - CFG.TILESIZE*2) // CFG.TILESIZE)
+            )
+            p11 = (
+                int((human_ent.frect.x + sign(human_ent.velocity[0]) * CFG.TILESIZE) // CFG.TILESIZE),
+                int((human_ent.frect.y - CFG.TILESIZE*2) // CFG.TILESIZE)
+            )
+            tile_above = self.tilemap.get_tile(p1, layer=1)
+            if tile_above:
+                rerender_head = True
+            tile_above2 = self.tilemap.get_tile(p11, layer=1)
+            if tile_above2:
+                rerender_head = True
+            tile_right = self.tilemap.get_tile(p0, layer=1)
+            if tile_right and tile_right["type"] == "sides":
+                rerender_head = True
+            # pygame.draw.rect(self.screen, (255, 255, 0), [p0[0]*CFG.TILESIZE - scroll[0], p0[1]*CFG.TILESIZE - scroll[1], CFG.TILESIZE, CFG.TILESIZE], 1)
+            # pygame.draw.rect(self.screen, (255, 255, 0), [p1[0]*CFG.TILESIZE - scroll[0], p1[1]*CFG.TILESIZE - scroll[1], CFG.TILESIZE, CFG.TILESIZE], 1)
+
+            if rerender_head:
+                human_ent.render_head(self.screen, self.interpolated_scroll(human_ent, scroll, alpha))
+        # endregion
+
+        self.tilemap.render_shadows(self.screen, offset=render_scroll)
 
-            self.master_screen.blit(
-                pygame.transform.scale(self.screen, CFG.ORG_RES), render_offset)
+        self.entities["player"][0].render_hud(self.screen)
+
+        # for ent in self.get_entities({"items"}):
+        #     r = 30
+        #     pygame.draw.circle(self.screen, (0, 255, 255), (ent.center[0] - scroll[0], ent.center[1] - scroll[1]), r, 1)
+
+        pygame.draw.circle(self.screen, (255, 255, 255), self.last_input.mouse, 4)
+
+        # self.screen.blit(font.render(f"FPS: {self.get_fps():.0f}, {self.clock.get_fps():.0f} pos: {self.entities["player"][0].tile_pos} {self.entities["player"][0].render_fliped} {self.entities["player"][0].type}", False, (255, 255, 255), (0, 0, 0)), (0, 0))
+        self.screen.blit(font.render(f"FPS: {self.get_fps():.0f}\nTIME: {self.global_timer.remaining():.0f}\nZOMBIES: {self.n_zombies_spawned-self.n_zombies_killed}\nKILLS: {self.n_zombies_killed}", False, (255, 255, 255)), (5, 20))
+        if self.lost:
+            s = font.render("You Lost", False, (255, 255, 255))
+            self.screen.blit(s, (self.screen.width//2 - s.width//2, self.screen.height//2 - s.height//2))
+        elif self.won:
+            s = font.render("You Won", False, (255, 255, 255))
+            self.screen.blit(s, (self.screen.width//2 - s.width//2, self.screen.height//2 - s.height//2))
+
+        r = [5, 5, self.screen.width - 10, 10]
+        pygame.draw.rect(self.screen, (255, 255, 255), r, 1)
+        r = [6, 6, max(1, (self.screen.width - 12) * self.global_timer.remaining() / self.global_timer.duration), 8]
+        draw_rect_alpha(self.screen, (255, 255, 255), r, 125)
+
+        sh_amp = self.sh_amp
+        render_offset = (
+            rng.render.random() * sh_amp - sh_amp/2 if self.screen_shake[0] else 0,
+            rng.render.random() * sh_amp - sh_amp/2 if self.screen_shake[1] else 0
+        )
+
+        self.master_screen.blit(
+            pygame.transform.scale(self.screen, CFG.ORG_RES), render_offset)
+        if self.show_cache_stats:  # F3
+            # auf den großen Bildschirm, auf self.screen wäre die Schrift nach dem Skalieren unlesbar
+            self.master_screen.blit(font.render("\n".join(format_snapshot()), False, (255, 255, 255), (0, 0, 0)), (5, 100))
+        if not self.headless:
             pygame.display.flip()
 
-            if self.__fps_timer > 1.0:
-                self.__fps = self.__frames_drawn
-                self.__frames_drawn = 0
-                self.__fps_timer = .0
-            self.__frames_drawn += 1
+        if self.__fps_timer > 1.0:
+            self.__fps = self.__frames_drawn
+            self.__frames_drawn = 0
+            self.__fps_timer = .0
+        self.__frames_drawn += 1
 
     def update_entitymaps(self) -> None:
         self.entitymap.clear()
@@ -691,17 +952,26 @@ class Game:
 
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--record", metavar="PATH", default=None, help="save the input of this round as a replay (benchmark.py replay PATH)")
+    args = parser.parse_args()
+
     pygame.init()
     pygame.joystick.init()
 
+    game = Game(seed=args.seed)
+    if args.record:
+        game.start_recording(args.record)
+
     DEBUG = False
     if DEBUG:
-        import os
         from profiling import run_profiling, end_profiling
         run_profiling()
-        Game().run()
+        game.run()
         end_profiling()
         # das lässt das programm laufen, bis der tab geschlossen ist. nicht so gut..
         os.system("profile_stats.html")
     else:
-        Game().run()
+        game.run()